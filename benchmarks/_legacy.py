@@ -0,0 +1,83 @@
+"""Pre-optimization reference implementations used by the benchmarks."""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+HOST_RE = re.compile(r"^Host\s+(?P<host>.+)$", re.IGNORECASE)
+INDENTED_RE = re.compile(r"^\s+(?P<key>[A-Za-z][A-Za-z0-9]*)\s+(?P<value>.+)$")
+
+
+@dataclass
+class LegacyHostConfig:
+    host: str
+    hostname: str
+    user: str = "root"
+    port: int = 22
+    identity_file: Optional[str] = None
+    extra_options: List[str] = field(default_factory=list)
+
+    def serialize(self) -> str:
+        lines = [f"Host {self.host}"]
+        lines.append(f"  HostName {self.hostname}")
+        if self.user:
+            lines.append(f"  User {self.user}")
+        if self.port and self.port != 22:
+            lines.append(f"  Port {self.port}")
+        if self.identity_file:
+            lines.append(f"  IdentityFile {self.identity_file}")
+        lines.extend(self.extra_options)
+        return "\n".join(lines) + "\n"
+
+
+def legacy_parse_ssh_config(text: str) -> List[LegacyHostConfig]:
+    """The regex loop used before iter_host_blocks."""
+    hosts: List[LegacyHostConfig] = []
+    current = None
+    for line in text.splitlines():
+        if not line.strip() or line.strip().startswith('#'):
+            continue
+        m = HOST_RE.match(line)
+        if m:
+            if current:
+                hosts.append(current)
+            first_alias = m.group('host').strip().split()[0]
+            current = LegacyHostConfig(host=first_alias, hostname=first_alias)
+            continue
+        m2 = INDENTED_RE.match(line)
+        if m2 and current:
+            key = m2.group('key').lower()
+            val = m2.group('value').strip()
+            if key == 'hostname':
+                current.hostname = val
+            elif key == 'user':
+                current.user = val
+            elif key == 'port':
+                try:
+                    current.port = int(val)
+                except ValueError:
+                    pass
+            elif key == 'identityfile':
+                current.identity_file = val
+            else:
+                current.extra_options.append(line)
+    if current:
+        hosts.append(current)
+    return hosts
+
+
+def make_config(n_hosts: int) -> str:
+    """Synthetic monolithic config with ``n_hosts`` blocks."""
+    out = []
+    for i in range(n_hosts):
+        out.append(f"# host {i}")
+        out.append(f"Host node{i} node{i}-alt")
+        out.append(f"  HostName 10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}")
+        out.append("  User deploy")
+        out.append(f"  Port {2200 + i % 50}")
+        out.append(f"  IdentityFile ~/.ssh/keys/node{i}_ed25519")
+        out.append("  ForwardAgent yes")
+        out.append("  ServerAliveInterval 30")
+        out.append("")
+    return "\n".join(out) + "\n"
@@ -0,0 +1,43 @@
+"""Warm audit of a synthetic layout with N hosts and N keys.
+
+Usage: python benchmarks/bench_audit.py [--hosts N] [--workers W]
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from ssh_manager.core import audit
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--hosts", type=int, default=50000)
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        cfgd = home / ".ssh" / "config.d"
+        keys = home / ".ssh" / "keys"
+        cache = home / ".ssh" / "manager_cache"
+        cfgd.mkdir(parents=True)
+        keys.mkdir()
+        for i in range(args.hosts):
+            (cfgd / f"node{i}.conf").write_text(
+                f"Host node{i}\n  HostName n{i}\n  IdentityFile ~/.ssh/keys/node{i}_ed25519\n",
+                encoding="utf-8")
+            key = keys / f"node{i}_ed25519"
+            key.write_bytes(b"K")
+            key.chmod(0o600)
+        for label in ["cold", "warm"]:
+            t0 = time.perf_counter()
+            result = audit.audit_layout(cfgd, keys, cache, home=home, workers=args.workers)
+            secs = time.perf_counter() - t0
+            print(f"{label}: {args.hosts} hosts/keys in {secs * 1000:.1f} ms, "
+                  f"{len(result.findings)} findings")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Repeated snapshots of a synthetic ~/.ssh tree: copytree vs content-addressed.
+
+Usage: python benchmarks/bench_backup.py [--files N] [--snapshots S]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from ssh_manager.core import backup
+
+
+def copytree_snapshot(ssh_dir: Path, dest: Path) -> None:
+    """The pre-deduplication backup_snapshot body."""
+    dest.mkdir(mode=0o700, parents=True)
+    for name in ["config", "config.d", "keys"]:
+        p = ssh_dir / name
+        if p.exists():
+            if p.is_dir():
+                shutil.copytree(p, dest / name)
+            else:
+                shutil.copy2(p, dest / name)
+
+
+def make_tree(ssh_dir: Path, n_files: int) -> None:
+    (ssh_dir / "config.d").mkdir(parents=True)
+    (ssh_dir / "keys").mkdir()
+    (ssh_dir / "config").write_text("Include config.d/*.conf\n", encoding="utf-8")
+    n_hosts = n_files // 3
+    for i in range(n_hosts):
+        (ssh_dir / "config.d" / f"node{i}.conf").write_text(
+            f"Host node{i}\n  HostName 10.0.{i // 256 % 256}.{i % 256}\n", encoding="utf-8")
+        (ssh_dir / "keys" / f"node{i}_ed25519").write_bytes(os.urandom(400))
+        (ssh_dir / "keys" / f"node{i}_ed25519.pub").write_bytes(os.urandom(100))
+
+
+def du(path: Path) -> int:
+    seen = set()
+    total = 0
+    for p in path.rglob("*"):
+        st = p.lstat()
+        if p.is_file() and (st.st_dev, st.st_ino) not in seen:
+            seen.add((st.st_dev, st.st_ino))
+            total += st.st_size
+    return total
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--files", type=int, default=10000)
+    ap.add_argument("--snapshots", type=int, default=3)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        ssh = Path(tmp) / ".ssh"
+        make_tree(ssh, args.files)
+        legacy_dir = Path(tmp) / "legacy_backups"
+        cas_dir = Path(tmp) / "cas_backups"
+        print(f"~{args.files} files, {args.snapshots} snapshots each")
+        for i in range(args.snapshots):
+            t0 = time.perf_counter()
+            copytree_snapshot(ssh, legacy_dir / str(i))
+            legacy = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            backup.create_snapshot(ssh, cas_dir)
+            cas = time.perf_counter() - t0
+            print(f"  snapshot {i + 1}: copytree {legacy * 1000:8.1f} ms   content-addressed {cas * 1000:8.1f} ms")
+        print(f"  bytes on disk: copytree {du(legacy_dir):,}   content-addressed {du(cas_dir):,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Deploy a public key to N hosts serially vs through the worker pool.
+
+Usage: python benchmarks/bench_deploy.py [--hosts N] [--workers W] [--latency S]
+
+Runs against the stand-in paramiko server from tests/sshd.py on localhost
+(one user per host). ``--latency`` delays each handshake to mimic a real
+network round trip, which is where the pool pays off. Each run deploys to
+fresh users, so every host reports ``added``.
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import os
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+
+from sshd import StubSSHServer  # noqa: E402
+
+from ssh_manager.core import deploy  # noqa: E402
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--hosts", type=int, default=200)
+    ap.add_argument("--workers", type=int, default=32)
+    ap.add_argument("--latency", type=float, default=0.05)
+    args = ap.parse_args()
+    blob = b"".join(struct.pack(">I", len(p)) + p for p in (b"ssh-ed25519", os.urandom(32)))
+    key = f"ssh-ed25519 {base64.b64encode(blob).decode()} bench"
+    with tempfile.TemporaryDirectory() as tmp:
+        with StubSSHServer(Path(tmp) / "remote", delay=args.latency) as server:
+            known = Path(tmp) / "known_hosts"
+            known.write_text(server.known_hosts_line())
+            print(f"{args.hosts} hosts, {args.latency * 1000:.0f} ms handshake latency")
+            for label, workers in (("serial", 1), (f"{args.workers} workers", args.workers)):
+                targets = [deploy.Target(f"h{i}", "127.0.0.1", f"{label[0]}{i}", server.port, key)
+                           for i in range(args.hosts)]
+                d = deploy.Deployer(known, password=server.password, allow_agent=False,
+                                    look_for_keys=False, timeout=30)
+                report = d.deploy(targets, workers)
+                assert report.count(deploy.ADDED) == args.hosts, report.to_dict()
+                print(f"  {label:<12} {report.elapsed:8.2f} s  {args.hosts / report.elapsed:8.1f} hosts/s")
+
+
+if __name__ == "__main__":
+    main()
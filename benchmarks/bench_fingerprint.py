@@ -0,0 +1,78 @@
+"""Fingerprint N public keys with ssh-keygen subprocesses vs in-process.
+
+Usage: python benchmarks/bench_fingerprint.py [--keys N]
+
+Writes N synthetic ed25519 ``.pub`` files and reports the time for one
+``ssh-keygen -lf`` per key, in-process parsing, and a warm pass through
+FingerprintCache (stat only).
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from ssh_manager.core import fingerprint
+
+
+def _string(data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + data
+
+
+def write_keys(directory: Path, n: int) -> list:
+    paths = []
+    for i in range(n):
+        blob = _string(b"ssh-ed25519") + _string(os.urandom(32))
+        p = directory / f"node{i}_ed25519.pub"
+        p.write_text(f"ssh-ed25519 {base64.b64encode(blob).decode()} node{i}\n", encoding="utf-8")
+        paths.append(str(p))
+    return paths
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--keys", type=int, default=5000)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_keys(Path(tmp), args.keys)
+        results = {}
+        if shutil.which("ssh-keygen"):
+            t0 = time.perf_counter()
+            sub = [subprocess.run(["ssh-keygen", "-lf", p], capture_output=True, text=True,
+                                  check=True).stdout.split()[1] for p in paths]
+            results["ssh-keygen -lf"] = time.perf_counter() - t0
+        else:
+            sub = None
+            print("ssh-keygen not found; skipping subprocess run")
+
+        t0 = time.perf_counter()
+        ours = [fingerprint.fingerprint_file(p) for p in paths]
+        results["in-process"] = time.perf_counter() - t0
+        if sub is not None:
+            assert sub == ours, "fingerprints differ from ssh-keygen"
+
+        cache = fingerprint.FingerprintCache(Path(tmp) / "cache")
+        for p, fp in zip(paths, ours):
+            cache.put(p, os.stat(p), fp, None)
+        cache.save()
+        t0 = time.perf_counter()
+        warm = fingerprint.FingerprintCache(Path(tmp) / "cache")
+        warm.load()
+        for p in paths:
+            warm.get(p, os.stat(p))
+        results["cached (warm)"] = time.perf_counter() - t0
+        assert warm.hits == len(paths)
+
+        print(f"{args.keys} keys")
+        for name, secs in results.items():
+            print(f"  {name:<16} {secs * 1000:9.1f} ms  {args.keys / secs:10,.0f} keys/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Parse a config that Includes the same fragments from several places.
+
+Usage: python benchmarks/bench_include.py [--fragments N] [--groups G]
+
+Writes N fragment files (one host each) and a main config whose G Host
+groups each ``Include frag/*.conf``, then parses it with an
+IncludeExpander (every glob and file handled once) and with a plain
+recursive expansion that globs and re-reads on every Include.
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from ssh_manager.core import parser
+
+
+def naive_lines(path: str, base: str, depth: int = 0):
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            token = parser.tokenize_line(line)
+            if token and token[0].lower() == "include" and depth < parser.MAX_INCLUDE_DEPTH:
+                for pattern in token[1].split():
+                    for inc in sorted(glob.glob(os.path.join(base, pattern))):
+                        yield from naive_lines(inc, base, depth + 1)
+            else:
+                yield line
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--fragments", type=int, default=500)
+    ap.add_argument("--groups", type=int, default=20)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        (base / "frag").mkdir()
+        for i in range(args.fragments):
+            (base / "frag" / f"h{i:05d}.conf").write_text(
+                f"Host h{i}\n  HostName 10.0.{i >> 8 & 255}.{i & 255}\n  User deploy\n"
+                f"  IdentityFile ~/.ssh/keys/h{i}_ed25519\n", encoding="utf-8")
+        main_cfg = base / "config"
+        main_cfg.write_text("".join(f"Host group{g}\n  User g{g}\n  Include frag/*.conf\n"
+                                    for g in range(args.groups)), encoding="utf-8")
+
+        t0 = time.perf_counter()
+        includes = parser.IncludeExpander(base)
+        with open(main_cfg, encoding="utf-8") as fh:
+            memo = sum(1 for _ in parser.iter_host_blocks(fh, includes, str(main_cfg)))
+        memo_t = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        naive = sum(1 for _ in parser.iter_host_blocks(naive_lines(str(main_cfg), tmp)))
+        naive_t = time.perf_counter() - t0
+
+    assert memo == naive == args.groups * (args.fragments + 1), (memo, naive)
+    print(f"{args.fragments} fragments included by {args.groups} groups ({memo} host blocks)")
+    print(f"  memoized  {memo_t:8.3f} s  ({includes.reads} reads, {includes.globs} globs)")
+    print(f"  naive     {naive_t:8.3f} s  ({args.fragments * args.groups} reads, {args.groups} globs)")
+
+
+if __name__ == "__main__":
+    main()
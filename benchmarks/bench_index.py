@@ -0,0 +1,42 @@
+"""Cold vs warm load of a synthetic config.d through the parse index.
+
+Usage: python benchmarks/bench_index.py [--hosts N]
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from ssh_manager.core import index
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--hosts", type=int, default=20000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cfgd = Path(tmp) / "config.d"
+        cache = Path(tmp) / "cache"
+        cfgd.mkdir()
+        for i in range(args.hosts):
+            (cfgd / f"node{i}.conf").write_text(
+                f"Host node{i}\n  HostName 10.0.{i // 256 % 256}.{i % 256}\n  User deploy\n"
+                f"  IdentityFile ~/.ssh/keys/node{i}_ed25519\n  ForwardAgent yes\n",
+                encoding="utf-8",
+            )
+        timings = {}
+        for label, cache_dir in [("uncached", None), ("cold index", cache), ("warm index", cache)]:
+            t0 = time.perf_counter()
+            loaded = index.load_host_files(cfgd, cache_dir)
+            timings[label] = time.perf_counter() - t0
+            assert len(loaded) == args.hosts
+        print(f"{args.hosts} host files")
+        for label, secs in timings.items():
+            print(f"  {label:<11} {secs * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
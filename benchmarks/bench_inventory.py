@@ -0,0 +1,81 @@
+"""Export N hosts and re-import them with a few changes (a nightly CMDB sync).
+
+Usage: python benchmarks/bench_inventory.py [--hosts N] [--changed PCT]
+
+Writes N host files to a temporary config.d, then times `export` in each
+format and the peak memory of the streamed JSON export against dumping a
+list built in memory. Finally the NDJSON export is edited (PCT percent of
+hosts get a new HostName, one host is dropped and one added) and imported
+with pruning; only the changed files are written.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from ssh_manager.core import index, inventory, store
+from ssh_manager.core.model import HostConfig
+
+
+def peak(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--hosts", type=int, default=30000)
+    ap.add_argument("--changed", type=float, default=1.0)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        cfgd, cache = Path(tmp) / "config.d", Path(tmp) / "cache"
+        with store.ConfigDWriter(cfgd) as tx:
+            for i in range(args.hosts):
+                tx.write(HostConfig(f"h{i:06d}", f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", user="deploy",
+                                    identity_file=f"~/.ssh/keys/h{i:06d}_ed25519",
+                                    options=[("ProxyJump", f"bastion-{i % 20}")]))
+        index.load_host_files(cfgd, cache)  # warm the parse index, as after any earlier command
+        print(f"{args.hosts} hosts")
+
+        def hosts():
+            return (f.host for f in index.iter_host_files(cfgd, cache))
+
+        for fmt in inventory.FORMATS:
+            out = io.StringIO()
+            t0 = time.perf_counter()
+            inventory.export_hosts(hosts(), out, fmt)
+            print(f"  export {fmt:<7} {time.perf_counter() - t0:7.2f} s  {len(out.getvalue()) >> 10:8d} KiB")
+            if fmt == "ndjson":
+                exported = out.getvalue()
+
+        streamed = peak(lambda: inventory.export_hosts(hosts(), io.StringIO(), "json"))
+        listed = peak(lambda: io.StringIO().write(json.dumps([h.to_dict() for h in hosts()])))
+        print(f"  json peak memory: streamed {streamed >> 20} MiB, list {listed >> 20} MiB "
+              "(both include the parse index)")
+
+        every = max(1, int(100 / args.changed)) if args.changed else 0
+        lines = exported.splitlines()[1:]  # drop the first host
+        for n in range(0, len(lines), every or len(lines) + 1):
+            record = json.loads(lines[n])
+            record["hostname"] = "changed-" + record["hostname"]
+            lines[n] = json.dumps(record)
+        lines.append(json.dumps({"host": "brand-new", "hostname": "10.255.255.255"}))
+        t0 = time.perf_counter()
+        result = inventory.import_hosts(inventory.iter_records(io.StringIO("\n".join(lines)), "ndjson"),
+                                        cfgd, cache, prune=True)
+        elapsed = time.perf_counter() - t0
+        print(f"  import          {elapsed:7.2f} s  {len(result.added)} added, {len(result.changed)} changed, "
+              f"{result.unchanged} unchanged, {len(result.removed)} removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Traced memory of 50k parsed hosts: legacy dataclass vs slotted HostConfig.
+
+Also parses hosts that each have their own LocalForward lines (nothing to
+share) and reports peak memory, what stays allocated once the hosts are
+dropped, and the size of the option intern table.
+
+Usage: python benchmarks/bench_model_memory.py [--hosts N] [--unique-options K]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+
+from _legacy import legacy_parse_ssh_config, make_config
+from ssh_manager.core import model, parser
+
+
+def measure(fn, text: str):
+    gc.collect()
+    tracemalloc.start()
+    hosts = fn(text)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return hosts, current
+
+
+def unique_config(n_hosts: int, per_host: int) -> str:
+    """``n_hosts`` blocks with ``per_host`` LocalForwards no other host has."""
+    out = []
+    for i in range(n_hosts):
+        out.append(f"Host u{i}")
+        out.append(f"  HostName u{i}.example")
+        out.extend(f"  LocalForward {i * per_host + j} localhost:{j}" for j in range(per_host))
+    return "\n".join(out) + "\n"
+
+
+def measure_unique(text: str):
+    """Peak traced bytes while parsing, and bytes still held after the hosts
+    are deleted."""
+    gc.collect()
+    tracemalloc.start()
+    hosts = parser.parse_ssh_config(text)
+    _, peak = tracemalloc.get_traced_memory()
+    del hosts
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, retained
+
+
+def first_alias_only(text: str) -> str:
+    """``serialize()`` output with only the first alias on the Host line,
+    which is all the legacy model kept."""
+    head, _, rest = text.partition("\n")
+    return f"{' '.join(head.split()[:2])}\n{rest}"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--hosts", type=int, default=50000)
+    ap.add_argument("--unique-options", type=int, default=8, metavar="K",
+                    help="LocalForwards per host in the unshared run (default 8)")
+    args = ap.parse_args()
+
+    text = make_config(args.hosts)
+    legacy, legacy_bytes = measure(legacy_parse_ssh_config, text)
+    compact, compact_bytes = measure(parser.parse_ssh_config, text)
+    mismatched = sum(1 for a, b in zip(legacy, compact)
+                     if a.serialize() != first_alias_only(b.serialize()))
+    print(f"{args.hosts} hosts retained in memory")
+    print(f"  legacy dataclass   {legacy_bytes / 1e6:8.1f} MB  ({legacy_bytes / args.hosts:6.0f} B/host)")
+    print(f"  slotted HostConfig {compact_bytes / 1e6:8.1f} MB  ({compact_bytes / args.hosts:6.0f} B/host)")
+    print(f"  serialize() mismatches: {mismatched}")
+
+    del legacy, compact
+    n = min(args.hosts, 20000)
+    peak, retained = measure_unique(unique_config(n, args.unique_options))
+    print(f"{n} hosts with {args.unique_options} unshared options each")
+    print(f"  peak while parsing {peak / 1e6:8.1f} MB")
+    print(f"  held after delete  {retained / 1e6:8.1f} MB")
+    print(f"  interned sets      {len(model._OPTION_SETS):8d} (cap {model._OPTION_SETS_MAX})")
+
+
+if __name__ == "__main__":
+    main()
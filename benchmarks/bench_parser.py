@@ -0,0 +1,67 @@
+"""Compare the streaming tokenizer with the previous regex-based parser.
+
+Usage: python benchmarks/bench_parser.py [--hosts N] [--repeat R]
+
+Reports lines/sec for both implementations on a synthetic config and the
+peak traced memory of consuming ``iter_host_blocks`` from a file handle.
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from _legacy import legacy_parse_ssh_config, make_config
+from ssh_manager.core import parser
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--hosts", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    text = make_config(args.hosts)
+    n_lines = text.count("\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "config"
+        path.write_text(text, encoding="utf-8")
+
+        def stream() -> None:
+            with path.open(encoding="utf-8") as fh:
+                for _ in parser.iter_host_blocks(fh):
+                    pass
+
+        results = {
+            "legacy (regex, list)": best_of(args.repeat, lambda: legacy_parse_ssh_config(text)),
+            "parse_ssh_config (list)": best_of(args.repeat, lambda: parser.parse_ssh_config(text)),
+            "iter_host_blocks (file)": best_of(args.repeat, stream),
+        }
+        print(f"{args.hosts} hosts, {n_lines} lines")
+        for name, secs in results.items():
+            print(f"  {name:<26} {secs * 1000:9.1f} ms  {n_lines / secs:12,.0f} lines/s")
+
+        tracemalloc.start()
+        stream()
+        _, stream_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        tracemalloc.start()
+        legacy_parse_ssh_config(path.read_text(encoding="utf-8"))
+        _, legacy_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  peak memory: legacy {legacy_peak / 1e6:.1f} MB, streaming {stream_peak / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Probe N hosts one at a time vs concurrently.
+
+Usage: python benchmarks/bench_probe.py [--hosts N] [--concurrency C] [--latency S]
+
+Every host points at one local listener that waits ``--latency`` seconds
+before sending its SSH banner, standing in for a network round trip;
+probes read the banner, so each one costs at least that long. Loopback
+connects alone are too fast to show the difference.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import threading
+import time
+
+from ssh_manager.core import probe
+
+
+def start_server(latency: float) -> int:
+    ready = threading.Event()
+    port: list = []
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await asyncio.sleep(latency)
+        writer.write(b"SSH-2.0-Bench\r\n")
+        try:
+            await writer.drain()
+        except OSError:
+            pass
+        writer.close()
+
+    async def serve() -> None:
+        server = await asyncio.start_server(handle, "127.0.0.1", 0, backlog=4096)
+        port.append(server.sockets[0].getsockname()[1])
+        ready.set()
+        await server.serve_forever()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return port[0]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--hosts", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=200)
+    ap.add_argument("--latency", type=float, default=0.02)
+    args = ap.parse_args()
+    port = start_server(args.latency)
+    targets = [probe.Target(f"h{i}", "127.0.0.1", port) for i in range(args.hosts)]
+    print(f"{args.hosts} hosts, {args.latency * 1000:.0f} ms banner latency")
+    # One at a time over a tenth of the hosts is enough to extrapolate from
+    serial = targets[: max(1, args.hosts // 10)]
+    for label, batch, concurrency in (("sequential", serial, 1),
+                                      (f"{args.concurrency} at once", targets, args.concurrency)):
+        t0 = time.perf_counter()
+        results = asyncio.run(probe.probe_all(batch, concurrency, timeout=10, banner=True))
+        report = probe.ProbeReport(results, time.perf_counter() - t0)
+        assert report.count(probe.REACHABLE) == len(batch), report.to_dict()
+        rate = len(batch) / report.elapsed
+        pct = report.latency_percentiles()
+        print(f"  {label:<14} {rate:9.1f} hosts/s  ({args.hosts / rate:6.2f} s for all)  "
+              f"connect p50 {pct['p50']:.2f} ms  p99 {pct['p99']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Provision N hosts one `new` at a time vs `new --from` a manifest.
+
+Usage: python benchmarks/bench_provision.py [--hosts N] [--key-type ed25519|rsa] [--workers W]
+
+Both runs use a throwaway HOME and real ssh-keygen. The serial run repeats
+what one `ssh-manager new --no-copy-id` does per host (generate the key,
+write its file, regenerate ~/.ssh/config); the bulk run validates the
+manifest, generates keys across W parallel ssh-keygen processes, writes
+config.d in one transaction and regenerates the main config once.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from ssh_manager.cli import main as cli_main
+
+
+def run(home: Path, argv_list: list) -> float:
+    home.mkdir()
+    os.environ["HOME"] = str(home)
+    runner = CliRunner()
+    t0 = time.perf_counter()
+    for argv in argv_list:
+        result = runner.invoke(cli_main, argv)
+        assert result.exit_code == 0, result.output
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--hosts", type=int, default=100)
+    ap.add_argument("--key-type", default="ed25519", choices=["ed25519", "rsa"])
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+    entries = [{"host": f"node{i}", "hostname": f"10.0.{i // 256}.{i % 256}", "user": "deploy"}
+               for i in range(args.hosts)]
+    saved_home = os.environ.get("HOME")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            serial = run(Path(tmp) / "serial", [
+                ["new", "--host", e["host"], "--hostname", e["hostname"], "--user", e["user"],
+                 "--key-type", args.key_type, "--no-copy-id"] for e in entries
+            ])
+            manifest = Path(tmp) / "hosts.json"
+            manifest.write_text(json.dumps(entries), encoding="utf-8")
+            argv = ["new", "--from", str(manifest), "--key-type", args.key_type]
+            if args.workers:
+                argv += ["--workers", str(args.workers)]
+            bulk = run(Path(tmp) / "bulk", [argv])
+    finally:
+        if saved_home is not None:
+            os.environ["HOME"] = saved_home
+    print(f"{args.hosts} {args.key_type} hosts, {args.workers or os.cpu_count()} workers")
+    print(f"  new x N          {serial:8.2f} s")
+    print(f"  new --from       {bulk:8.2f} s  ({serial / bulk:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
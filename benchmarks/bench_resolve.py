@@ -0,0 +1,89 @@
+"""Resolve every alias of an N-host config: pattern index vs fnmatch scan.
+
+Usage: python benchmarks/bench_resolve.py [--hosts N] [--sample S]
+
+Generates one block per host (some with two aliases), a few dozen wildcard
+and negated blocks and a trailing ``Host *`` defaults block, then times
+Resolver.resolve_all() against the obvious loop that fnmatch-es every
+alias against every block. The scan is quadratic, so it only runs over
+``--sample`` aliases and the full time is extrapolated.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from fnmatch import fnmatchcase
+
+from ssh_manager.core.parser import iter_blocks
+from ssh_manager.core.resolve import MULTI_VALUED, Resolver
+
+
+def make_config(n: int) -> str:
+    roles = ["web", "db", "cache", "api", "bastion"]
+    regions = ["eu", "us", "ap"]
+    lines = []
+    for i in range(n):
+        role, region = roles[i % len(roles)], regions[i % len(regions)]
+        alias = f"{role}-{region}-{i:05d}"
+        extra = f" {alias}.{region}.corp" if i % 4 == 0 else ""
+        lines += [f"Host {alias}{extra}", f"  HostName 10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+                  f"  IdentityFile ~/.ssh/keys/{alias}_ed25519", ""]
+    for role in roles:
+        for region in regions:
+            lines += [f"Host {role}-{region}-* !bastion-*", f"  ProxyJump bastion-{region}-00004",
+                      f"  User {role}", ""]
+        lines += [f"Host *.{role}.corp", "  ForwardAgent no", ""]
+    lines += ["Host db-??-0000?", "  Port 5432", "", "Host *",
+              "  ServerAliveInterval 10", "  IdentityFile ~/.ssh/id_ed25519", ""]
+    return "\n".join(lines)
+
+
+def naive(blocks: list, alias: str) -> dict:
+    name = alias.lower()
+    options: dict = {"host": [alias]}
+    for block in blocks:
+        pats = [p.lower() for p in block.patterns]
+        if pats and (not any(fnmatchcase(name, p) for p in pats if not p.startswith("!"))
+                     or any(fnmatchcase(name, p[1:]) for p in pats if p.startswith("!"))):
+            continue
+        for key, value in block.options:
+            lkey = key.lower()
+            if lkey in MULTI_VALUED:
+                options.setdefault(lkey, []).append(value)
+            elif lkey not in options:
+                options[lkey] = [value]
+    return options
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--hosts", type=int, default=20000)
+    ap.add_argument("--sample", type=int, default=200)
+    args = ap.parse_args()
+    text = make_config(args.hosts)
+
+    t0 = time.perf_counter()
+    resolver = Resolver(iter_blocks(text.splitlines()))
+    built = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    resolved = dict(resolver.resolve_all())
+    indexed = time.perf_counter() - t0
+    aliases = list(resolved)
+    print(f"{len(aliases)} aliases, {len(resolver.blocks)} blocks")
+    print(f"  index build     {built:8.3f} s")
+    print(f"  indexed         {indexed:8.3f} s  ({len(aliases) / indexed:10.0f} aliases/s)")
+
+    sample = aliases[:: max(1, len(aliases) // args.sample)][: args.sample]
+    t0 = time.perf_counter()
+    for alias in sample:
+        expected = naive(resolver.blocks, alias)
+        got = resolver.resolve(alias)
+        assert {k: v for k, v in got.items() if k not in ("hostname", "port")} == \
+            {k: v for k, v in expected.items() if k not in ("hostname", "port")}, alias
+    scan = (time.perf_counter() - t0) / len(sample)
+    print(f"  fnmatch scan    {scan * len(aliases):8.3f} s  ({1 / scan:10.0f} aliases/s, "
+          f"extrapolated from {len(sample)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Per-keystroke host search over N hosts: trigram index vs a linear scan.
+
+Usage: python benchmarks/bench_search.py [--hosts N]
+
+Builds N synthetic hosts, then types a few queries one character at a time
+(as the TUI search box does) and reports the median and worst keystroke
+for the SearchIndex (ranked, top 200) and for a plain substring scan over
+every host's fields (unranked). Short prefixes that match most hosts still
+have to rank every match; the index pays off once a query gets selective.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from ssh_manager.core.model import HostConfig
+from ssh_manager.core.search import SearchIndex, host_fields
+
+QUERIES = ["web-prod-0042", "db eu", "bastion-12", "wbprd", "nosuchhost"]
+
+
+def make_hosts(n: int) -> list:
+    roles = ["web-prod", "web-stage", "db", "cache", "bastion"]
+    regions = ["eu", "us", "ap"]
+    hosts = []
+    for i in range(n):
+        role, region = roles[i % len(roles)], regions[i % len(regions)]
+        h = HostConfig(f"{role}-{i:04d}", f"{role}{i}.{region}.example.com", user="deploy",
+                       identity_file=f"~/.ssh/keys/{role}_ed25519",
+                       options=[("ProxyJump", f"bastion-{i % 50}")])
+        hosts.append((f"{role}-{i:04d}.conf", h))
+    return hosts
+
+
+def linear(fields: dict, query: str) -> list:
+    terms = query.lower().split()
+    return [d for d, f in fields.items() if all(any(t in x for x in f) for t in terms)]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--hosts", type=int, default=20000)
+    args = ap.parse_args()
+    hosts = make_hosts(args.hosts)
+
+    t0 = time.perf_counter()
+    idx = SearchIndex.build(hosts)
+    idx.ensure_postings()
+    build = time.perf_counter() - t0
+    fields = {d: host_fields(h) for d, h in hosts}
+    print(f"{args.hosts} hosts, index built in {build * 1000:.0f} ms")
+    print(f"  {'query':<16} {'index median/worst (ms)':>24} {'scan median/worst (ms)':>24} {'matches':>8}")
+    for q in QUERIES:
+        t_idx, t_scan = [], []
+        for i in range(1, len(q) + 1):
+            t0 = time.perf_counter()
+            found = idx.search(q[:i], limit=200)
+            t_idx.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            linear(fields, q[:i])
+            t_scan.append(time.perf_counter() - t0)
+        cols = [f"{statistics.median(t) * 1000:10.1f} /{max(t) * 1000:7.1f}    " for t in (t_idx, t_scan)]
+        print(f"  {q:<16} {cols[0]:>24} {cols[1]:>24} {len(found):8}")
+
+
+if __name__ == "__main__":
+    main()
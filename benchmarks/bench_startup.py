@@ -0,0 +1,80 @@
+"""Import cost of `ssh-manager --help`, `audit --json` and `build` against a budget.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--budget-ms MS] [--top K]
+
+Runs each command R times in a fresh interpreter under ``python -X importtime``
+(HOME points at a small temporary ~/.ssh) and reports the median total import
+time, the median wall time and the heaviest top-level imports. An "eager" row
+loads every subcommand, as the CLI did before commands were imported lazily.
+Exits 1 if any command's median import time is over the budget, so it can run
+as a startup regression check.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CASES = {
+    "--help": "from ssh_manager.cli import main; main(['--help'])",
+    "audit --json": "from ssh_manager.cli import main; main(['audit', '--json'])",
+    "build": "from ssh_manager.cli import main; main(['build'])",
+}
+EAGER = "import ssh_manager.cli as c; [c.main.get_command(None, n) for n in c.COMMANDS]"
+
+
+def run(code: str, env: dict) -> tuple[float, float, dict[str, float]]:
+    """One interpreter: (total import ms, wall ms, top-level module -> cumulative ms)."""
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = (time.perf_counter() - t0) * 1000
+    if proc.returncode not in (0, 1):
+        raise SystemExit(proc.stderr[-2000:])
+    top: dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # nested imports are already in their parent's total
+            top[name.strip()] = int(cumulative) / 1000
+    return sum(top.values()), wall, top
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=150.0)
+    ap.add_argument("--top", type=int, default=3)
+    args = ap.parse_args()
+    src = Path(__file__).resolve().parent.parent / "src"
+    with tempfile.TemporaryDirectory() as home:
+        cfgd = Path(home) / ".ssh" / "config.d"
+        cfgd.mkdir(parents=True)
+        for i in range(50):
+            (cfgd / f"h{i:02d}.conf").write_text(f"Host h{i}\n  HostName 10.0.0.{i}\n", encoding="utf-8")
+        env = dict(os.environ, HOME=home, PYTHONPATH=os.pathsep.join([str(src), os.environ.get("PYTHONPATH", "")]))
+        over = []
+        print(f"median of {args.runs} runs, budget {args.budget_ms:.0f} ms of imports")
+        for label, code in [*CASES.items(), ("eager (all commands)", EAGER)]:
+            runs = [run(code, env) for _ in range(args.runs)]
+            imports = statistics.median(r[0] for r in runs)
+            wall = statistics.median(r[1] for r in runs)
+            heaviest = sorted(runs[-1][2].items(), key=lambda kv: -kv[1])[: args.top]
+            flag = ""
+            if label in CASES and imports > args.budget_ms:
+                over.append(label)
+                flag = "  OVER BUDGET"
+            print(f"  {label:<22} imports {imports:7.1f} ms  wall {wall:7.1f} ms{flag}")
+            print("      " + ", ".join(f"{name} {ms:.1f}" for name, ms in heaviest))
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Time and peak memory of parse, write, build, audit, backup and TUI load at scale.
+
+Usage: python benchmarks/bench_suite.py [--hosts 1000,10000,100000] [--seed S]
+           [--skip GROUP,...] [--output results.json] [--compare baseline.json]
+
+For each size a synthetic ~/.ssh (see _synth.py) is generated under a
+temporary HOME and the operations below run in order. Each one runs in a
+forked child, like a separate CLI invocation, so its peak RSS is its own.
+On-disk caches carry over, which is what the "warm" steps measure.
+
+    parse         parser.parse_ssh_config on the monolithic config
+    write         store.write_host_config for every parsed host
+    build         mainconfig.regenerate_main_config(single=True), then again warm
+    audit         audit.audit_layout, cold then warm
+    backup        store.backup_snapshot, first then a deduplicated second one
+    tui           headless TUI start until every host is loaded (needs textual)
+
+Results are printed and, with --output, written as JSON. --compare reads an
+earlier --output file and exits 1 if any operation got slower than
+--max-slowdown times (and by at least 20 ms), so runs before and after an
+upgrade can be checked against each other.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from _synth import make_tree
+
+from ssh_manager.core import audit, mainconfig, parser, settings, store
+
+SCHEMA = 1
+SKIPPABLE = {"build", "audit", "backup", "tui"}
+
+
+def _rss_kib() -> int:
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * (os.sysconf("SC_PAGE_SIZE") // 1024)
+    except OSError:
+        return 0
+
+
+def measure(fn: Callable[[], dict]) -> dict:
+    """Run ``fn`` in a forked child; its wall time, peak RSS and own results."""
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # child
+        os.close(r)
+        try:
+            start = _rss_kib()
+            t0 = time.perf_counter()
+            detail = fn()
+            seconds = time.perf_counter() - t0
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            peak //= 1024 if sys.platform == "darwin" else 1  # bytes there, KiB on Linux
+            out = {"seconds": seconds, "peak_rss_kib": peak, "rss_growth_kib": max(0, peak - start), **detail}
+        except BaseException as exc:
+            out = {"error": f"{type(exc).__name__}: {exc}"}
+        with os.fdopen(w, "w") as fh:
+            json.dump(out, fh)
+        os._exit(0)
+    os.close(w)
+    with os.fdopen(r) as fh:
+        data = fh.read()
+    os.waitpid(pid, 0)
+    return json.loads(data)
+
+
+def _parse() -> dict:
+    return {"blocks": len(parser.parse_ssh_config(settings.config_file().read_text(encoding="utf-8")))}
+
+
+def _write() -> dict:
+    hosts = parser.parse_ssh_config(settings.config_file().read_text(encoding="utf-8"))
+    settings.config_d_dir().mkdir(exist_ok=True)
+    names = {store.write_host_config(settings.config_d_dir(), h).name for h in hosts}
+    return {"files": len(names)}
+
+
+def _build() -> dict:
+    return {"bytes": len(mainconfig.regenerate_main_config(single=True))}
+
+
+def _audit() -> dict:
+    result = audit.audit_layout(settings.config_d_dir(), settings.keys_dir(), settings.cache_dir(),
+                                home=Path.home(), workers=4)
+    return {"findings": len(result.findings)}
+
+
+def _backup() -> dict:
+    settings.backup_dir().mkdir(exist_ok=True)
+    store.backup_snapshot(settings.ssh_dir(), settings.backup_dir())
+    return {}
+
+
+def _tui() -> dict:
+    from ssh_manager.tui.app import SSHManagerApp
+
+    async def run() -> int:
+        app = SSHManagerApp()
+        async with app.run_test(size=(120, 40)) as pilot:
+            while not app.hosts_loaded:
+                await pilot.pause(0.005)
+            return len(app.host_list.rows)
+
+    return {"rows": asyncio.run(run())}
+
+
+OPS: list[tuple[str, str, Callable[[], dict]]] = [
+    ("parse", "parse", _parse),
+    ("write", "write", _write),
+    ("build", "build", _build),
+    ("build", "build_warm", _build),
+    ("audit", "audit", _audit),
+    ("audit", "audit_warm", _audit),
+    ("backup", "backup", _backup),
+    ("backup", "backup_again", _backup),
+    ("tui", "tui_load", _tui),
+]
+
+
+def run_size(hosts: int, seed: int, skip: set[str]) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["HOME"] = tmp  # settings resolve ~/.ssh from HOME on each call
+        t0 = time.perf_counter()
+        counts = make_tree(Path(tmp), hosts, seed)
+        generated = time.perf_counter() - t0
+        print(f"{hosts} hosts ({counts['blocks']} blocks, {counts['keys']} keys), generated in {generated:.1f} s")
+        ops = {}
+        for group, name, fn in OPS:
+            if group in skip:
+                continue
+            result = ops[name] = measure(fn)
+            if "error" in result:
+                print(f"  {name:<13} failed: {result['error']}")
+                continue
+            detail = ", ".join(f"{k} {v}" for k, v in result.items()
+                               if k not in ("seconds", "peak_rss_kib", "rss_growth_kib"))
+            print(f"  {name:<13} {result['seconds']:8.3f} s  peak {result['peak_rss_kib'] >> 10:6d} MiB  "
+                  f"(+{result['rss_growth_kib'] >> 10} MiB)  {detail}")
+    return {"tree": counts, "generate_seconds": generated, "ops": ops}
+
+
+def compare(results: dict, baseline: dict, max_slowdown: float) -> list[str]:
+    """Operations slower than ``max_slowdown`` times the baseline (and by >= 20 ms)."""
+    slower = []
+    print(f"against {baseline.get('created', 'baseline')}:")
+    for size, run in results["sizes"].items():
+        old_ops = baseline.get("sizes", {}).get(size, {}).get("ops", {})
+        for name, new in run["ops"].items():
+            old = old_ops.get(name)
+            if not old or "seconds" not in old or "seconds" not in new:
+                continue
+            ratio = new["seconds"] / max(old["seconds"], 1e-9)
+            flag = ""
+            if ratio > max_slowdown and new["seconds"] - old["seconds"] >= 0.02:
+                slower.append(f"{size}/{name}")
+                flag = "  SLOWER"
+            print(f"  {size:>7} {name:<13} {old['seconds']:8.3f} -> {new['seconds']:8.3f} s  x{ratio:5.2f}  "
+                  f"peak {old['peak_rss_kib'] >> 10} -> {new['peak_rss_kib'] >> 10} MiB{flag}")
+    return slower
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--hosts", default="1000,10000")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--skip", default="", help="comma-separated groups out of build, audit, backup, tui")
+    ap.add_argument("--output", type=Path)
+    ap.add_argument("--compare", type=Path)
+    ap.add_argument("--max-slowdown", type=float, default=1.25)
+    args = ap.parse_args()
+    skip = {s for s in args.skip.split(",") if s}
+    if skip - SKIPPABLE:  # parse and write create the files the other steps use
+        ap.error(f"--skip takes {', '.join(sorted(SKIPPABLE))}")
+    results = {
+        "schema": SCHEMA,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "sizes": {str(n): run_size(n, args.seed, skip) for n in (int(x) for x in args.hosts.split(","))},
+    }
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"wrote {args.output}")
+    if args.compare:
+        if compare(results, json.loads(args.compare.read_text(encoding="utf-8")), args.max_slowdown):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
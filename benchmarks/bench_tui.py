@@ -0,0 +1,82 @@
+"""Headless Textual pilot benchmark of the TUI host list.
+
+Usage: python benchmarks/bench_tui.py [--hosts 1000,10000,50000] [--scrolls N]
+
+For each size a synthetic ~/.ssh is generated under a temporary HOME and
+the app is started twice (cold and warm parse index). Reported per run:
+time until the first rows are in the list, time until every host is
+loaded, and the latency of PageDown presses (median / p95 / max) next to
+the same round trip for an unbound key, which is the pilot's own cost.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+
+def make_tree(home: Path, n: int) -> None:
+    cfgd = home / ".ssh" / "config.d"
+    cfgd.mkdir(parents=True)
+    for i in range(n):
+        (cfgd / f"node{i:06d}.conf").write_text(
+            f"Host node{i}\n  HostName 10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}\n  User deploy\n",
+            encoding="utf-8",
+        )
+
+
+async def run_once(scrolls: int) -> dict:
+    from ssh_manager.tui.app import SSHManagerApp
+
+    app = SSHManagerApp()
+    t0 = time.perf_counter()
+    async with app.run_test(size=(120, 40)) as pilot:
+        while not app.host_list.rows:
+            await pilot.pause(0.001)
+        first_paint = time.perf_counter() - t0
+        while not app.hosts_loaded:
+            await pilot.pause(0.005)
+        loaded = time.perf_counter() - t0
+        latencies = []
+        baseline = []
+        for _ in range(scrolls):
+            for key, out in (("pagedown", latencies), ("f24", baseline)):
+                s0 = time.perf_counter()
+                await pilot.press(key)
+                await pilot.pause()
+                out.append(time.perf_counter() - s0)
+    latencies.sort()
+    return {
+        "first_paint": first_paint,
+        "loaded": loaded,
+        "scroll_median": statistics.median(latencies),
+        "scroll_p95": latencies[int(len(latencies) * 0.95) - 1],
+        "scroll_max": latencies[-1],
+        # Same round trip for an unbound key: the pilot's own overhead
+        "baseline": statistics.median(baseline),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--hosts", default="1000,10000,50000")
+    ap.add_argument("--scrolls", type=int, default=40)
+    args = ap.parse_args()
+    for n in [int(x) for x in args.hosts.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["HOME"] = tmp  # settings resolve ~/.ssh from HOME on each call
+            make_tree(Path(tmp), n)
+            for label in ["cold", "warm"]:
+                r = asyncio.run(run_once(args.scrolls))
+                print(f"{n:>6} hosts {label}: first paint {r['first_paint'] * 1000:7.1f} ms, "
+                      f"all loaded {r['loaded'] * 1000:8.1f} ms, PageDown median "
+                      f"{r['scroll_median'] * 1000:5.1f} ms / p95 {r['scroll_p95'] * 1000:5.1f} ms "
+                      f"/ max {r['scroll_max'] * 1000:5.1f} ms (unbound key {r['baseline'] * 1000:5.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Per-host write_host_config vs one ConfigDWriter transaction.
+
+Usage: python benchmarks/bench_writer.py [--hosts N]
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from ssh_manager.core import store
+from ssh_manager.core.model import HostConfig
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--hosts", type=int, default=5000)
+    args = ap.parse_args()
+    hosts = [
+        HostConfig(f"node{i}", f"10.0.{i // 256 % 256}.{i % 256}", user="deploy",
+                   identity_file=f"~/.ssh/keys/node{i}_ed25519", options={"ForwardAgent": ["yes"]})
+        for i in range(args.hosts)
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        timings = {}
+        per_host = Path(tmp) / "a" / "config.d"
+        t0 = time.perf_counter()
+        for h in hosts:
+            store.write_host_config(per_host, h)
+        timings["write_host_config x N"] = time.perf_counter() - t0
+
+        tx_dir = Path(tmp) / "b" / "config.d"
+        for label in ["ConfigDWriter (fresh)", "ConfigDWriter (unchanged)"]:
+            t0 = time.perf_counter()
+            with store.ConfigDWriter(tx_dir) as tx:
+                for h in hosts:
+                    tx.write(h)
+            timings[label] = time.perf_counter() - t0
+        print(f"{args.hosts} hosts (ConfigDWriter includes fsync; per-host writes do not)")
+        for label, secs in timings.items():
+            print(f"  {label:<27} {secs * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
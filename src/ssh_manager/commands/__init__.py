@@ -0,0 +1 @@
+"""Subcommand implementations, imported by ``ssh_manager.cli`` on first use."""
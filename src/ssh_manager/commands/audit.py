@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+
+import click
+
+from ..core import audit as audit_mod
+from ..core import settings
+from . import common
+
+
+@click.command()
+@click.option("--json", "as_json", is_flag=True, help="Output JSON for scripting")
+@click.option("--workers", type=int, default=4, show_default=True,
+              help="Threads for filesystem checks (helps on network-mounted homes)")
+@click.option("--watch", is_flag=True,
+              help="Keep running and report findings as files change (NDJSON with --json)")
+def audit(as_json: bool, workers: int, watch: bool) -> None:
+    """Report orphaned keys, missing keys, duplicate hosts, and permission issues."""
+    common.ensure_layout()
+    if watch:
+        _watch_audit(as_json)
+        return
+    result = audit_mod.run_audit(common.load_hosts(), settings.keys_dir(), workers=workers,
+                                 cache_dir=common.cache_dir())
+    report = result.to_report()
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+
+    click.echo(f"Hosts: {report['host_count']}")
+    if report["duplicates"]:
+        click.echo(f"Duplicate host aliases: {', '.join(report['duplicates'])}")
+    if report["orphaned_private_keys"]:
+        click.echo(f"Orphaned private keys: {', '.join(report['orphaned_private_keys'])}")
+    if report["missing_referenced_keys"]:
+        click.echo(f"Missing referenced keys: {', '.join(report['missing_referenced_keys'])}")
+    if report["bad_key_permissions"]:
+        click.echo(f"Keys with insecure permissions: {', '.join(report['bad_key_permissions'])}")
+    if report["unparseable_files"]:
+        click.echo(f"Unparseable host files: {', '.join(report['unparseable_files'])}")
+    for line in report["duplicate_keys"]:
+        click.echo(f"Same key under several names: {line}")
+    if report["mismatched_public_keys"]:
+        mismatched = ", ".join(report["mismatched_public_keys"])
+        click.echo(f"Public key does not match private key: {mismatched}")
+    if not result.findings:
+        click.echo("No issues detected")
+
+
+def _watch_audit(as_json: bool) -> None:
+    """Print finding changes until interrupted; one JSON object per line with ``as_json``."""
+    from ..core import watch as watch_mod  # only needed with --watch
+    watcher = watch_mod.AuditWatcher(settings.ssh_dir(), settings.config_d_dir(),
+                                     settings.keys_dir(), cache_dir=common.cache_dir())
+
+    def emit(changes: list[watch_mod.Change]) -> None:
+        for change in changes:
+            if as_json:
+                click.echo(json.dumps(change.to_dict(), separators=(",", ":")))
+            else:
+                f = change.finding
+                mark = "+" if change.kind == watch_mod.ADDED else "-"
+                click.echo(f"{mark} [{f.severity.value}] {f.code}: {f.message}")
+
+    try:
+        with watcher:
+            emit(watcher.start())
+            state = watcher.state
+            ready = {"event": "ready", "host_count": state.host_count,
+                     "findings": len(state.result().findings)}
+            click.echo(json.dumps(ready, separators=(",", ":")) if as_json
+                       else f"Watching {settings.ssh_dir()} ({ready['host_count']} hosts, "
+                            f"{ready['findings']} findings); Ctrl-C to stop")
+            while True:
+                emit(watcher.poll())
+    except OSError as exc:
+        raise click.ClickException(f"Cannot watch {settings.ssh_dir()}: {exc}")
+    except KeyboardInterrupt:
+        pass
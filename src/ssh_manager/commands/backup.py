@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Optional
+
+import click
+
+from ..core import backup as backup_mod
+from ..core import settings, store
+from . import common
+
+
+@click.group(invoke_without_command=True)
+@click.option("--format", "fmt", type=click.Choice(["dir", *backup_mod.ARCHIVE_FORMATS]),
+              default="dir",
+              help="dir: deduplicated snapshot; tar.gz/tar.xz: one compressed archive")
+@click.pass_context
+def backup(ctx: click.Context, fmt: str) -> None:
+    """Create a backup snapshot of the ~/.ssh layout."""
+    if ctx.invoked_subcommand is not None:
+        return
+    common.ensure_layout()
+    if fmt == "dir":
+        snapshot = store.backup_snapshot(settings.ssh_dir(), settings.backup_dir())
+    else:
+        snapshot = backup_mod.create_archive(settings.ssh_dir(), settings.backup_dir(), fmt)
+    click.echo(f"Backup created: {snapshot}")
+
+
+def resolve_snapshot(name: Optional[str]) -> Path:
+    """Snapshot by directory name or path; the newest one when ``name`` is None."""
+    snapshots = backup_mod.list_snapshots(settings.backup_dir())
+    if name is None:
+        if not snapshots:
+            raise click.ClickException("No snapshots found")
+        return snapshots[-1]
+    candidate = Path(name)
+    if not candidate.exists():
+        candidate = settings.backup_dir() / name
+    if not candidate.exists():
+        raise click.ClickException(f"Snapshot not found: {name}")
+    return candidate
+
+
+@backup.command("verify")
+@click.argument("snapshot", required=False)
+@click.option("--all", "verify_all", is_flag=True, help="Verify every snapshot")
+@click.option("--json", "as_json", is_flag=True, help="Output JSON for scripting")
+def backup_verify(snapshot: Optional[str], verify_all: bool, as_json: bool) -> None:
+    """Check snapshot files against their manifest hashes (default: newest)."""
+    if verify_all:
+        targets = backup_mod.list_snapshots(settings.backup_dir())
+    else:
+        targets = [resolve_snapshot(snapshot)]
+    reports = [backup_mod.verify_snapshot(t) for t in targets]
+    if as_json:
+        click.echo(json.dumps([
+            {"snapshot": str(r.snapshot), "checked": r.checked, "problems": r.problems}
+            for r in reports
+        ], indent=2))
+    else:
+        for r in reports:
+            status = "OK" if r.ok else f"{len(r.problems)} problem(s)"
+            click.echo(f"{r.snapshot.name}: {r.checked} files, {status}")
+            for problem in r.problems:
+                click.echo(f"  {problem}")
+    if not all(r.ok for r in reports):
+        raise SystemExit(1)
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import click
+
+from ..core import settings, store, timing
+from . import common
+
+
+@click.command()
+@click.option("--single", is_flag=True,
+              help="Generate single combined config instead of Include-based")
+def build(single: bool) -> None:
+    """Regenerate the main ~/.ssh/config file."""
+    common.ensure_layout()
+    with timing.span("rebuild"):
+        changed = store.write_if_changed(settings.config_file(), common.render_main_config(single))
+    if changed:
+        click.echo("Main config regenerated")
+    else:
+        click.echo("Main config already up to date")
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import json
+
+import click
+
+from ..core import fingerprint, index, settings
+from ..core import probe as probe_mod
+
+
+@click.group()
+def cache() -> None:
+    """Inspect or reset the config.d parse index."""
+
+
+@cache.command("stats")
+@click.option("--json", "as_json", is_flag=True, help="Output JSON for scripting")
+def cache_stats(as_json: bool) -> None:
+    """Show how many host files the parse index can serve without reparsing."""
+    idx = index.ParseIndex(settings.cache_dir())
+    idx.load()
+    stats = idx.stats(settings.config_d_dir())
+    if as_json:
+        click.echo(json.dumps(stats, indent=2))
+        return
+    click.echo(f"Index: {stats['index_path']} ({stats['index_bytes']} bytes)")
+    click.echo(f"Entries: {stats['entries']}")
+    click.echo(f"Fresh: {stats['fresh']}  Stale: {stats['stale']}  "
+               f"Untracked: {stats['untracked']}  Removed: {stats['removed']}")
+
+
+@cache.command("clear")
+def cache_clear() -> None:
+    """Delete the parse index, build fragments, key fingerprints and saved probe results."""
+    index.ParseIndex(settings.cache_dir()).clear()
+    index.FragmentCache(settings.cache_dir()).clear()
+    (settings.cache_dir() / fingerprint.FINGERPRINTS_NAME).unlink(missing_ok=True)
+    (settings.cache_dir() / probe_mod.PROBES_NAME).unlink(missing_ok=True)
+    click.echo("Parse index cleared")
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional, Sequence
+
+import click
+
+from ..core import index, settings
+from ..core.model import HostConfig
+
+
+def ensure_layout() -> None:
+    dirs = [settings.ssh_dir(), settings.config_d_dir(), settings.keys_dir(), settings.backup_dir()]
+    for p in dirs:
+        p.mkdir(mode=0o700, exist_ok=True)
+
+
+def cache_dir() -> Optional[Path]:
+    """Parse index location, or None when ``--no-cache`` was given."""
+    ctx = click.get_current_context(silent=True)
+    if ctx is not None and ctx.find_root().params.get("no_cache"):
+        return None
+    return settings.cache_dir()
+
+
+def load_hosts() -> list[index.IndexedFile]:
+    return index.load_host_files(settings.config_d_dir(), cache_dir())
+
+
+def select_hosts(aliases: Sequence[str]) -> list[HostConfig]:
+    """Hosts named by ``aliases`` (any alias of a block finds it), or every
+    parsed host when none are given."""
+    files = load_hosts()
+    if not aliases:
+        return [f.host for f in files if f.host is not None]
+    table = index.AliasTable(files)
+    unknown = [a for a in aliases if a not in table]
+    if unknown:
+        raise click.ClickException(f"Unknown host(s): {', '.join(unknown)}")
+    # The table only holds parsed files, so this drops nothing
+    hosts = [table.files[a].host for a in aliases]
+    return [h for h in hosts if h is not None]
+
+
+def render_main_config(single: bool = False) -> str:
+    # Imported here: store and backup are not needed by read-only commands
+    from ..core import mainconfig
+    return mainconfig.render_main_config(single, use_cache=cache_dir() is not None)
+
+
+def regenerate_main_config(single: bool = False) -> str:
+    from ..core import mainconfig
+    return mainconfig.regenerate_main_config(single, use_cache=cache_dir() is not None)
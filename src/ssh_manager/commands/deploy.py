@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Optional
+
+import click
+
+from ..core import audit as audit_mod
+from ..core import deploy as deploy_mod
+from ..core import settings
+from . import common
+
+
+@click.command()
+@click.argument("aliases", nargs=-1)
+@click.option("--all", "all_hosts", is_flag=True, help="Every host that has an IdentityFile")
+@click.option("--workers", type=int, default=16, show_default=True, help="Hosts handled at once")
+@click.option("--timeout", type=float, default=10.0, show_default=True,
+              help="Seconds allowed per connection attempt")
+@click.option("--retries", type=int, default=2, show_default=True,
+              help="Extra attempts after a connection error or timeout")
+@click.option("--identity", "-i", type=click.Path(exists=True, dir_okay=False),
+              help="Existing private key to log in with (agent and ~/.ssh/id_* are tried too)")
+@click.option("--password", "ask_password", is_flag=True,
+              help="Prompt once for a login password for all hosts")
+@click.option("--accept-new", is_flag=True,
+              help="Trust unknown host keys and add them to known_hosts")
+@click.option("--json", "as_json", is_flag=True, help="Output JSON for scripting")
+def deploy(
+    aliases: tuple[str, ...],
+    all_hosts: bool,
+    workers: int,
+    timeout: float,
+    retries: int,
+    identity: Optional[str],
+    ask_password: bool,
+    accept_new: bool,
+    as_json: bool,
+) -> None:
+    """Add each host's public key to its remote authorized_keys, many hosts at once."""
+    if bool(aliases) == all_hosts:
+        raise click.UsageError("Give host aliases or --all")
+    hosts = common.select_hosts(aliases)
+    if not aliases:
+        hosts = [h for h in hosts if h.identity_file]
+    targets: list[deploy_mod.Target] = []
+    skipped: list[deploy_mod.DeployResult] = []
+    for h in hosts:
+        paths = audit_mod.identity_paths(h, Path.home())
+        try:
+            if not paths:
+                raise OSError("no IdentityFile")
+            public_key = Path(paths[0] + ".pub").read_text(encoding="utf-8").strip()
+        except OSError as exc:
+            skipped.append(deploy_mod.DeployResult(h.host, deploy_mod.FAILED, 0, 0.0,
+                                                   f"public key: {exc}"))
+            continue
+        targets.append(deploy_mod.Target(h.host, h.hostname or h.host, h.user, h.port, public_key))
+    password = click.prompt("Login password", hide_input=True) if ask_password else None
+    deployer = deploy_mod.Deployer(settings.known_hosts_file(), accept_new, password, identity,
+                                   timeout=timeout, retries=retries)
+    report = deployer.deploy(targets, workers)
+    deployer.save_known_hosts()
+    report.results.extend(skipped)
+    if as_json:
+        click.echo(json.dumps(report.to_dict(), indent=2))
+    else:
+        for r in report.results:
+            if r.status == deploy_mod.FAILED:
+                click.echo(f"{r.alias}: {r.error}", err=True)
+        click.echo(f"Added {report.count(deploy_mod.ADDED)}, "
+                   f"already present {report.count(deploy_mod.PRESENT)}, "
+                   f"failed {report.count(deploy_mod.FAILED)} in {report.elapsed:.1f}s")
+    if not report.ok:
+        raise SystemExit(1)
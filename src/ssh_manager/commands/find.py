@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import json
+
+import click
+
+from ..core import search as search_mod
+from . import common
+
+
+@click.command()
+@click.argument("query", nargs=-1, required=True)
+@click.option("--limit", type=int, default=20, show_default=True,
+              help="Maximum matches (0 for all)")
+@click.option("--json", "as_json", is_flag=True, help="Output JSON for scripting")
+def find(query: tuple[str, ...], limit: int, as_json: bool) -> None:
+    """Fuzzy-search hosts by alias, HostName, User and option values."""
+    hosts = {f.name: (f, f.host) for f in common.load_hosts() if f.host is not None}
+    idx = search_mod.SearchIndex.build((name, h) for name, (_, h) in hosts.items())
+    matches = idx.search(" ".join(query), limit=limit or None)
+    results = []
+    for m in matches:
+        f, h = hosts[m.doc_id]
+        results.append({
+            "host": h.host,
+            "hostname": h.hostname,
+            "user": h.user,
+            "port": h.port,
+            "file": str(f.path),
+            **m.to_dict(),
+        })
+    if as_json:
+        click.echo(json.dumps(results, indent=2))
+        return
+    if not results:
+        click.echo("No matching hosts")
+        return
+    for r in results:
+        port = f":{r['port']}" if r["port"] != 22 else ""
+        click.echo(f"{r['host']:<30} {r['user']}@{r['hostname']}{port}  ({r['field']})")
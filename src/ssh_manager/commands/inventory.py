@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterator, Optional
+
+import click
+
+from ..core.model import HostConfig
+from ..core import index, settings, store
+from ..core import inventory as inventory_mod
+from . import common
+
+
+@click.command()
+@click.option("--format", "fmt", type=click.Choice(inventory_mod.FORMATS), default=None,
+              help="Output format (default: from the --output suffix, else json)")
+@click.option("--output", "-o", type=click.Path(dir_okay=False, allow_dash=True, path_type=Path),
+              default=None, help="File to write (default: stdout)")
+def export(fmt: Optional[str], output: Optional[Path]) -> None:
+    """Write every host as structured data, streamed from config.d."""
+    if output is not None and str(output) == "-":
+        output = None
+    fmt = fmt or (inventory_mod.format_for(output) if output else None) or "json"
+    errors: list[str] = []
+
+    def hosts() -> Iterator[HostConfig]:
+        for f in index.iter_host_files(settings.config_d_dir(), common.cache_dir()):
+            if f.host is None:
+                errors.append(f"{f.name}: {f.error}")
+            else:
+                yield f.host
+
+    # Written to a temp file and renamed into place when it is a real file
+    with click.open_file(str(output or "-"), "w", encoding="utf-8",
+                         atomic=output is not None) as fh:
+        patterns = inventory_mod.read_pattern_blocks(settings.config_d_dir())
+        count = inventory_mod.export_hosts(hosts(), fh, fmt, patterns)
+    if output is not None:
+        click.echo(f"Exported {count} record(s) to {output}", err=True)
+    for line in errors:
+        click.echo(f"Skipped unparseable {line}", err=True)
+
+
+@click.command("import")
+@click.argument("source",
+                type=click.Path(exists=True, dir_okay=False, allow_dash=True, path_type=Path))
+@click.option("--format", "fmt", type=click.Choice(inventory_mod.FORMATS), default=None,
+              help="Input format (default: from the file suffix; required for stdin)")
+@click.option("--prune", is_flag=True, help="Remove hosts that are not in the input")
+@click.option("--dry-run", is_flag=True, help="Show what would change without writing anything")
+@click.option("--backup/--no-backup", default=True,
+              help="Create a backup snapshot before importing")
+@click.option("--json", "as_json", is_flag=True, help="Output JSON for scripting")
+def import_(source: Path, fmt: Optional[str], prune: bool, dry_run: bool, backup: bool,
+            as_json: bool) -> None:
+    """Create or update hosts from `export` output; only changed host files are written."""
+    stdin = str(source) == "-"
+    fmt = fmt or (None if stdin else inventory_mod.format_for(source))
+    if fmt is None:
+        raise click.UsageError("Cannot tell the input format; pass --format")
+    common.ensure_layout()
+    if backup and not dry_run:
+        snapshot = store.backup_snapshot(settings.ssh_dir(), settings.backup_dir())
+        if not as_json:
+            click.echo(f"Backup created at {snapshot}")
+    try:
+        with click.open_file(str(source), encoding="utf-8") as fh:
+            result = inventory_mod.import_hosts(inventory_mod.iter_records(fh, fmt),
+                                                settings.config_d_dir(), common.cache_dir(),
+                                                prune=prune, dry_run=dry_run)
+    except inventory_mod.InventoryError as exc:
+        for problem in exc.problems:
+            click.echo(problem, err=True)
+        raise click.ClickException("Nothing imported")
+    if not dry_run and (result.added or result.changed or result.removed):
+        common.regenerate_main_config()
+    if as_json:
+        click.echo(json.dumps({"dry_run": dry_run, **result.to_dict()}, indent=2))
+        return
+    prefix = "Dry run: would import" if dry_run else "Imported"
+    removed = f", removed {len(result.removed)}" if prune else ""
+    click.echo(f"{prefix} {len(result.added)} new, {len(result.changed)} changed, "
+               f"{result.unchanged} unchanged{removed}")
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+import click
+
+from ..core import keygen, settings
+from ..core import manifest as manifest_mod
+from . import common
+
+
+@click.command()
+@click.option("--host", help="Alias of the host to create")
+@click.option("--from", "manifest_path",
+              type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help="Create every host in a .csv/.json/.yaml manifest instead")
+@click.option("--user", default="root")
+@click.option("--hostname", help="Actual host/IP if Host alias differs")
+@click.option("--port", type=int, default=22)
+@click.option("--key-type", type=click.Choice(keygen.KEY_TYPES), default="ed25519")
+@click.option("--no-copy-id", is_flag=True, help="Do not attempt ssh-copy-id after key generation")
+@click.option("--workers", type=int, default=None,
+              help="ssh-keygen processes run at once with --from  [default: CPU count]")
+def new(
+    host: Optional[str],
+    manifest_path: Optional[Path],
+    user: str,
+    hostname: Optional[str],
+    port: int,
+    key_type: str,
+    no_copy_id: bool,
+    workers: Optional[int],
+) -> None:
+    """Create a new host config + key pair (and optionally copy key to remote).
+
+    With --from, every host in the manifest is validated first, then all keys
+    are generated in parallel and the host files written in one transaction;
+    --user, --port and --key-type fill in blank fields. ssh-copy-id is not
+    run for manifests.
+    """
+    if host is not None and manifest_path is not None:
+        raise click.UsageError("Give either --host or --from")
+    if manifest_path is not None:
+        if hostname:
+            raise click.UsageError("--hostname cannot be combined with --from")
+        common.ensure_layout()
+        _new_from_manifest(manifest_path, user, port, key_type, workers)
+        return
+    if host is None:
+        raise click.UsageError("Give either --host or --from")
+    common.ensure_layout()
+    try:
+        hc = keygen.plan_host(settings.config_d_dir(), settings.keys_dir(), host, hostname, user,
+                              port, key_type)
+        keygen.create_host(settings.config_d_dir(), settings.keys_dir(), hc, key_type)
+    except keygen.KeyGenError as exc:
+        click.echo(str(exc), err=True)
+        raise SystemExit(1)
+    common.regenerate_main_config()
+    click.echo(f"Created host config {hc.host} with key {hc.identity_file}")
+
+    if not no_copy_id:
+        try:
+            keygen.copy_id(user, hc.hostname, Path(f"{hc.identity_file}.pub"), port)
+        except keygen.KeyGenError:
+            click.echo("ssh-copy-id failed; you may need to add the key manually", err=True)
+
+
+def _new_from_manifest(path: Path, user: str, port: int, key_type: str,
+                       workers: Optional[int]) -> None:
+    try:
+        planned = manifest_mod.plan_hosts(manifest_mod.read_manifest(path), settings.config_d_dir(),
+                                          settings.keys_dir(), user, port, key_type)
+    except manifest_mod.ManifestError as exc:
+        for problem in exc.problems:
+            click.echo(problem, err=True)
+        raise SystemExit(1)
+    if not planned:
+        click.echo(f"{path.name} lists no hosts")
+        return
+    try:
+        keygen.create_hosts(settings.config_d_dir(), settings.keys_dir(), planned, workers)
+    except (keygen.KeyGenError, OSError) as exc:
+        click.echo(f"{exc}; no hosts were created", err=True)
+        raise SystemExit(1)
+    common.regenerate_main_config()
+    click.echo(f"Created {len(planned)} hosts with keys in {settings.keys_dir()}")
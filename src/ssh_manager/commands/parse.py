@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+import click
+
+from ..core.model import HostConfig
+from ..core import mainconfig, parser, settings, store, timing
+from ..core.names import LEADING_PATTERNS_FILE, PATTERNS_FILE, NameRegistry
+from ..core.resolve import Resolver
+from ..core.util import sanitize_filename
+from . import common
+
+
+@click.command()
+@click.option("--input", "input_path", type=click.Path(path_type=Path), default=None,
+              help="Source SSH config to parse (default ~/.ssh/config)")
+@click.option("--backup/--no-backup", default=True,
+              help="Create a backup snapshot before modifying files")
+@click.option("--show-names", is_flag=True, help="List the file every host block was written to")
+def parse(input_path: Optional[Path], backup: bool, show_names: bool) -> None:
+    """Parse a monolithic SSH config and split into config.d/*.conf.
+
+    Each Host block gets one file named after its first alias, keeping all
+    of its aliases. Blocks that only hold wildcard patterns (Host *.corp)
+    are kept in order in config.d/+patterns.conf when they came before the
+    hosts they match, and in config.d/~patterns.conf otherwise. Blocks whose
+    names sanitize to the same file are kept apart: later ones get
+    <name>-2.conf, <name>-3.conf, ... in input order, and are listed.
+    """
+    common.ensure_layout()
+    input_path = input_path or settings.config_file()
+    config_d_dir = settings.config_d_dir()
+    if backup:
+        snapshot = store.backup_snapshot(settings.ssh_dir(), settings.backup_dir())
+        click.echo(f"Backup created at {snapshot}")
+
+    # Included files are read once and reused by the second pass
+    includes = parser.IncludeExpander(settings.ssh_dir())
+    # First pass: record which hosts reference each identity file so shared
+    # keys can be copied rather than moved, and collect the wildcard blocks.
+    # Only aliases are kept in memory for hosts.
+    identity_owners: dict[Path, list[str]] = {}
+    defaults = parser.parse_host_file(mainconfig.DEFAULTS_BLOCK)
+    pattern_blocks: list[HostConfig] = []
+    try:
+        for h in timing.timed(_iter_input_hosts(input_path, includes), "parse"):
+            if h.is_pattern:
+                # Re-parsing a generated config must not copy the defaults block
+                if h != defaults:
+                    pattern_blocks.append(h)
+            elif h.identity_file and h.hostname != '*':
+                p = Path(h.identity_file).expanduser()
+                if p in identity_owners or p.exists():
+                    identity_owners.setdefault(p, []).append(h.host)
+    except parser.IncludeError as exc:
+        raise click.ClickException(str(exc))
+
+    settings.keys_dir().mkdir(parents=True, exist_ok=True)
+    count = 0
+    # Names are only unique within this run: parsing the same config again
+    # rewrites the same files
+    names = NameRegistry()
+    # Second pass: relocate keys and stage each host as it is parsed; config.d
+    # is only swapped in once every host has been written
+    patterns: list[HostConfig] = []
+    placement = _PatternPlacement(pattern_blocks)
+    # Keys moved or copied so far, put back if config.d is not swapped in
+    relocated: list[tuple[Path, Optional[Path]]] = []
+    tx = store.ConfigDWriter(config_d_dir)
+    try:
+        with tx:
+            for h in timing.timed(_iter_input_hosts(input_path, includes, names), "parse"):
+                if h.hostname == '*':
+                    click.echo("Skipping wildcard/default block with HostName * "
+                               "(not writing separate file)")
+                    continue
+                if h.is_pattern:
+                    if h != defaults:
+                        patterns.append(h)
+                    continue
+                placement.add_host(h, len(patterns))
+                orig_path = Path(h.identity_file).expanduser() if h.identity_file else None
+                owners = identity_owners.get(orig_path) if orig_path else None
+                with timing.span("relocate keys"):
+                    if owners and len(owners) == 1:
+                        # Move (rename) single ownership key
+                        try:
+                            relocate_identity_file(h, h.host, relocated)
+                        except Exception as exc:  # pragma: no cover
+                            click.echo(f"Warning: relocate failed for {h.host}: {exc}", err=True)
+                    elif owners and orig_path:
+                        # Duplicate the key for each host (copy) keeping original in place
+                        _copy_shared_identity(h, orig_path, relocated)
+                tx.write(h)
+                count += 1
+            split = placement.split()
+            if patterns:
+                tx.write_patterns(patterns[:split], patterns[split:])
+    except BaseException:
+        # config.d was rolled back, so its IdentityFile paths must be valid again
+        _undo_relocations(relocated)
+        raise
+    common.regenerate_main_config()
+    click.echo(f"Parsed {count} host blocks -> {config_d_dir} "
+               f"({tx.written} written, {tx.unchanged} unchanged)")
+    placed = ((LEADING_PATTERNS_FILE, patterns[:split]), (PATTERNS_FILE, patterns[split:]))
+    for name, blocks in placed:
+        if blocks:
+            click.echo(f"Kept {len(blocks)} wildcard blocks in {name}")
+    for n, moved in placement.misplaced(split):
+        block = patterns[n]
+        came, now = ("after", "before") if n < split else ("before", "after")
+        click.echo(f"Warning: 'Host {' '.join(block.patterns)}' (line {block.lineno}) came {came} "
+                   f"{moved} host(s) it matches and is now read {now} them; ssh may take "
+                   f"different first values for them", err=True)
+    if show_names:
+        _echo_names("Files written:", names.assigned)
+    elif names.renamed:
+        _echo_names(f"{len(names.renamed)} host blocks share a file name with an earlier one "
+                    f"and were renamed:", names.renamed)
+
+
+class _PatternPlacement:
+    """Where the wildcard blocks go relative to the host files.
+
+    ssh reads config.d in name order, not input order, so a wildcard block
+    is either read before every host file or after all of them. Blocks keep
+    their input order, which leaves one choice: how many of them lead. The
+    split kept is the one that leaves the fewest (block, host it matches)
+    pairs in a different order than the input, since the first value ssh
+    finds for a keyword wins.
+    """
+
+    def __init__(self, blocks: Sequence[HostConfig]):
+        self._resolver = Resolver(parser.Block(h.patterns, (), h.lineno or 0) for h in blocks)
+        # Per block: how many hosts it matches came before it / after it
+        self._before = [0] * len(blocks)
+        self._after = [0] * len(blocks)
+
+    def add_host(self, host: HostConfig, seen: int) -> None:
+        """Count ``host``, which came after the first ``seen`` wildcard blocks."""
+        matched: set[int] = set()
+        for alias in host.aliases:
+            matched.update(self._resolver.matching_blocks(alias))
+        for n in matched:
+            if n < seen:
+                self._after[n] += 1
+            else:
+                self._before[n] += 1
+
+    def split(self) -> int:
+        """Number of blocks to read before the host files."""
+        # Leading blocks move ahead of the hosts they followed; trailing
+        # blocks move behind the hosts they preceded
+        cost = sum(self._after)
+        best, best_cost = 0, cost
+        for n, (before, after) in enumerate(zip(self._before, self._after), 1):
+            cost += before - after
+            if cost < best_cost:
+                best, best_cost = n, cost
+        return best
+
+    def misplaced(self, split: int) -> list[tuple[int, int]]:
+        """``(block, hosts)`` for every block that changes order with some of
+        the hosts it matches when ``split`` blocks lead."""
+        moved = [(n, self._before[n] if n < split else self._after[n])
+                 for n in range(len(self._before))]
+        return [(n, count) for n, count in moved if count]
+
+
+def _echo_names(title: str, rows: list[tuple[str, str]]) -> None:
+    click.echo(title)
+    width = min(max(len(label) for label, _ in rows), 40)
+    for label, stem in rows:
+        click.echo(f"  {label:<{width}}  -> {stem}.conf")
+
+
+def _iter_input_hosts(input_path: Path, includes: parser.IncludeExpander,
+                      names: Optional[NameRegistry] = None) -> Iterator[HostConfig]:
+    """Stream host blocks from ``input_path`` (empty if missing), including
+    those of the files it Includes, with ``host`` set to the sanitized first
+    alias. With ``names`` each block that gets its own file is given a name
+    unique in this run."""
+    if not input_path.exists():
+        return
+    with input_path.open(encoding="utf-8") as fh:
+        for h in parser.iter_host_blocks(fh, includes, str(input_path)):
+            # Wildcard-only blocks get no file of their own and keep their
+            # patterns as written
+            if h.is_pattern:
+                pass
+            elif names is not None and h.hostname != '*':
+                h.host = names.assign(h.host, label=" ".join(h.patterns))
+            else:
+                h.host = sanitize_filename(h.host)
+            yield h
+
+
+def _copy_shared_identity(host_cfg: HostConfig, orig_path: Path,
+                          undo: Optional[list[tuple[Path, Optional[Path]]]] = None) -> None:
+    base = orig_path.name
+    pub_src = _derive_pub_path(orig_path)
+    if base.startswith(host_cfg.host):
+        new_name = base
+    else:
+        new_name = f"{host_cfg.host}_{base}"
+    dest = settings.keys_dir() / new_name
+    if not dest.exists():
+        try:
+            _copy_file(orig_path, dest)
+            if undo is not None:
+                undo.append((dest, None))
+            dest.chmod(0o600)
+        except Exception as exc:  # pragma: no cover
+            click.echo(f"Warning: copy failed for {host_cfg.host}: {exc}", err=True)
+    # Public key
+    if pub_src.exists():
+        pub_dest = _match_pub_dest(dest)
+        if not pub_dest.exists():
+            try:
+                _copy_file(pub_src, pub_dest)
+                if undo is not None:
+                    undo.append((pub_dest, None))
+                pub_dest.chmod(0o644)
+            except Exception:
+                pass
+    host_cfg.identity_file = str(dest)
+
+
+def relocate_identity_file(host_cfg: HostConfig, safe_alias: str,
+                           undo: Optional[list[tuple[Path, Optional[Path]]]] = None) -> None:
+    """Move the referenced identity file (and its .pub) into ~/.ssh/keys.
+
+    Naming strategy:
+      - If original basename already starts with the sanitized alias, keep it.
+      - Else prefix with '<alias>_'. E.g., alias 'web1' + 'id_ed25519' -> 'web1_id_ed25519'.
+      - Preserve original basename when already under the keys dir (no move needed).
+    Updates host_cfg.identity_file with the absolute path to the relocated key.
+    Each move is recorded in ``undo`` as ``(new, old)``, for :func:`_undo_relocations`.
+    """
+    original_str = host_cfg.identity_file
+    if not original_str:
+        return
+    orig_path = Path(original_str).expanduser()
+    if not orig_path.exists():  # nothing to move
+        return
+    keys_dir = settings.keys_dir()
+    # If already in keys_dir, just normalize to absolute path and return
+    if keys_dir in orig_path.parents or orig_path.parent == keys_dir:
+        host_cfg.identity_file = str(orig_path)
+        return
+
+    keys_dir.mkdir(parents=True, exist_ok=True)
+    base = orig_path.name
+    if base.startswith(safe_alias):
+        new_name = base
+    else:
+        new_name = f"{safe_alias}_{base}"
+    dest = keys_dir / new_name
+    if not dest.exists():  # avoid overwriting; if exists we reuse
+        orig_path.replace(dest)
+        if undo is not None:
+            undo.append((dest, orig_path))
+        timing.add(1)
+    # Move .pub if exists
+    pub_src = Path(str(orig_path) + '.pub')
+    if pub_src.exists():
+        pub_dest = Path(str(dest) + '.pub')
+        if not pub_dest.exists():
+            try:
+                pub_src.replace(pub_dest)
+                if undo is not None:
+                    undo.append((pub_dest, pub_src))
+            except Exception:
+                pass
+        # set permissions
+        try:
+            pub_dest.chmod(0o644)
+        except Exception:
+            pass
+    # Set private key perms
+    try:
+        dest.chmod(0o600)
+    except Exception:
+        pass
+    host_cfg.identity_file = str(dest)
+
+
+def _undo_relocations(undo: list[tuple[Path, Optional[Path]]]) -> None:
+    """Move relocated keys back and delete copies, newest first."""
+    for new, old in reversed(undo):
+        try:
+            if old is None:
+                new.unlink()
+            else:
+                new.replace(old)
+        except OSError as exc:  # pragma: no cover
+            click.echo(f"Warning: could not restore {old or new}: {exc}", err=True)
+
+
+def _derive_pub_path(priv: Path) -> Path:
+    # If private key has a suffix (like .pem) append .pub to full name, else just add .pub
+    return priv.with_suffix(priv.suffix + '.pub') if priv.suffix else Path(str(priv) + '.pub')
+
+
+def _match_pub_dest(priv_dest: Path) -> Path:
+    return _derive_pub_path(priv_dest)
+
+
+def _copy_file(src: Path, dest: Path) -> None:
+    data = src.read_bytes()
+    dest.write_bytes(data)
+    timing.add(1, len(data))
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+
+import click
+
+from ..core import probe as probe_mod
+from ..core import settings
+from . import common
+
+
+@click.command()
+@click.argument("aliases", nargs=-1)
+@click.option("--concurrency", type=int, default=200, show_default=True,
+              help="Connections open at once")
+@click.option("--timeout", type=float, default=3.0, show_default=True,
+              help="Seconds allowed per connect")
+@click.option("--count", type=int, default=1, show_default=True,
+              help="Connects per host, for per-host latency percentiles")
+@click.option("--banner", is_flag=True, help="Also read the SSH identification line")
+@click.option("--save/--no-save", default=True,
+              help="Record results for the TUI reachability badge")
+@click.option("--json", "as_json", is_flag=True, help="Output JSON for scripting")
+def probe(aliases: tuple[str, ...], concurrency: int, timeout: float, count: int, banner: bool,
+          save: bool, as_json: bool) -> None:
+    """Check that hosts accept TCP connections and report connect latency."""
+    hosts = common.select_hosts(aliases)
+    report = probe_mod.probe_hosts(hosts, concurrency, timeout, count, banner)
+    if save:
+        probes = probe_mod.ProbeCache(settings.cache_dir())
+        probes.load()
+        probes.put(report.results)
+        probes.save()
+    if as_json:
+        click.echo(json.dumps(report.to_dict(), indent=2))
+    else:
+        for r in report.results:
+            if r.samples:
+                pct = r.to_dict()["latency_ms"]
+                timing = f"{pct['p50']:.1f} ms"
+                if len(r.samples) > 1:
+                    timing += f" (p90 {pct['p90']:.1f} ms)"
+            else:
+                timing = r.error or ""
+            note = f"  [{r.error}]" if r.samples and r.error else ""
+            click.echo(f"{r.alias:<30} {r.status:<11} {timing}{note}")
+        overall = report.latency_percentiles()
+        pcts = (", ".join(f"{k} {v:.1f} ms" for k, v in overall.items()) if overall
+                else "no connects")
+        click.echo(f"Reachable {report.count(probe_mod.REACHABLE)}, unreachable "
+                   f"{report.count(probe_mod.UNREACHABLE)}, "
+                   f"skipped {report.count(probe_mod.SKIPPED)} "
+                   f"in {report.elapsed:.1f}s; connect {pcts}")
+    if not report.ok:
+        raise SystemExit(1)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import json
+from typing import Optional
+
+import click
+
+from ..core import mainconfig, settings
+from ..core import resolve as resolve_mod
+from . import common
+
+
+@click.command()
+@click.argument("alias", required=False)
+@click.option("--all", "all_hosts", is_flag=True, help="Every alias named on a Host line")
+@click.option("--json", "as_json", is_flag=True, help="Output JSON for scripting")
+def resolve(alias: Optional[str], all_hosts: bool, as_json: bool) -> None:
+    """Show the options ssh will apply to a host (like `ssh -G`), from config.d
+    and the defaults block."""
+    if bool(alias) == all_hosts:
+        raise click.UsageError("Give a host alias or --all")
+    blocks = resolve_mod.managed_blocks(settings.config_d_dir(), common.cache_dir(),
+                                        mainconfig.DEFAULTS_BLOCK)
+    resolver = resolve_mod.Resolver(blocks)
+    if alias:
+        options = resolver.resolve(alias)
+        if as_json:
+            click.echo(json.dumps(resolve_mod.to_json(options), indent=2))
+        else:
+            _echo_resolved(options)
+        return
+    resolved = resolver.resolve_all()
+    if as_json:
+        click.echo(json.dumps({a: resolve_mod.to_json(o) for a, o in resolved}, indent=2))
+        return
+    for n, (name, options) in enumerate(resolved):
+        if n:
+            click.echo("")
+        _echo_resolved(options)
+
+
+def _echo_resolved(options: dict[str, list[str]]) -> None:
+    for key, values in options.items():
+        for value in values:
+            click.echo(f"{key} {value}")
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import difflib
+from typing import Optional
+
+import click
+
+from ..core import restore as restore_mod
+from ..core import index, settings, store
+from . import common
+from .backup import resolve_snapshot
+
+
+@click.command()
+@click.argument("snapshot", required=False)
+@click.option("--host", "hosts", multiple=True,
+              help="Only restore this host's config.d file and keys (repeatable)")
+@click.option("--dry-run", is_flag=True, help="Show what would change without writing anything")
+@click.option("--diff", "show_diff", is_flag=True,
+              help="Show unified diffs of changed config files (never keys)")
+@click.option("--yes", is_flag=True, help="Do not ask for confirmation")
+@click.option("--backup/--no-backup", default=True,
+              help="Create a backup snapshot before restoring")
+def restore(snapshot: Optional[str], hosts: tuple[str, ...], dry_run: bool, show_diff: bool,
+            yes: bool, backup: bool) -> None:
+    """Restore files that differ from a snapshot (default: newest)."""
+    common.ensure_layout()
+    ssh_dir = settings.ssh_dir()
+    source = restore_mod.SnapshotSource(resolve_snapshot(snapshot), settings.backup_dir())
+    only: Optional[set[str]] = None
+    if hosts:
+        only = set()
+        for alias in hosts:
+            paths = restore_mod.host_paths(source, alias)
+            if not paths:
+                raise click.ClickException(f"Host {alias} not found in {source.snapshot.name}")
+            only |= paths
+    try:
+        changes = restore_mod.diff_snapshot(source, ssh_dir, only)
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    if not changes:
+        click.echo(f"Nothing to restore: live files match {source.snapshot.name}")
+        return
+    markers = {restore_mod.ADDED: "A", restore_mod.MODIFIED: "M", restore_mod.MODE: "P"}
+    previews = source.read_many(
+        c.entry.path for c in changes
+        if show_diff and c.kind == restore_mod.MODIFIED and not c.entry.path.startswith("keys/")
+    )
+    for c in changes:
+        suffix = f" (mode -> {oct(c.entry.mode)})" if c.kind == restore_mod.MODE else ""
+        click.echo(f"  {markers[c.kind]} {c.entry.path}{suffix}")
+        if c.entry.path in previews:
+            live = (ssh_dir / c.entry.path).read_text(encoding="utf-8", errors="replace")
+            saved = previews[c.entry.path].decode("utf-8", errors="replace")
+            for line in difflib.unified_diff(live.splitlines(), saved.splitlines(),
+                                             "live/" + c.entry.path, "snapshot/" + c.entry.path,
+                                             lineterm=""):
+                click.echo(f"    {line}")
+    if dry_run:
+        click.echo(f"Dry run: {len(changes)} file(s) would be restored")
+        return
+    if not yes and not click.confirm(f"Restore {len(changes)} file(s)?"):
+        raise SystemExit(1)
+    if backup:
+        snap = store.backup_snapshot(ssh_dir, settings.backup_dir())
+        click.echo(f"Backup created at {snap}")
+    count = restore_mod.apply_changes(source, ssh_dir, changes)
+    click.echo(f"Restored {count} file(s) from {source.snapshot.name}")
+    restored = {c.entry.path for c in changes}
+    host_files = [p[len("config.d/"):] for p in restored if p.startswith("config.d/")]
+    if host_files:
+        cache_dir = common.cache_dir()
+        if cache_dir is not None:
+            index.forget_files(cache_dir, host_files)
+        # A restored main config already matches the restored config.d
+        if "config" not in restored:
+            common.regenerate_main_config()
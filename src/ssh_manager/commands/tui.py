@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+import click
+
+
+@click.command()
+def tui() -> None:  # pragma: no cover - UI launcher
+    """Launch the Textual TUI interface."""
+    try:
+        from ..tui.app import SSHManagerApp
+    except Exception as exc:  # broad for user friendliness
+        raise SystemExit(f"TUI not available: {exc}")
+    SSHManagerApp().run()
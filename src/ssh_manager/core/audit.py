@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+from . import fingerprint, index, timing
+from .model import HostConfig
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Fewest items handed to one worker at a time: below this a thread costs
+# more than the stats it would overlap
+_MIN_CHUNK = 16
+
+
+class Severity(str, Enum):
+    INFO = "info"
+    WARNING = "warning"
+    ERROR = "error"
+
+
+# Finding codes
+DUPLICATE_HOST = "duplicate_host"
+ORPHANED_KEY = "orphaned_private_key"
+MISSING_KEY = "missing_referenced_key"
+BAD_PERMISSIONS = "bad_key_permissions"
+UNPARSEABLE = "unparseable_file"
+DUPLICATE_KEY = "duplicate_key"
+PUB_MISMATCH = "mismatched_public_key"
+INVALID_KEY = "invalid_key_file"
+
+
+@dataclass(frozen=True)
+class Finding:
+    code: str
+    severity: Severity
+    subject: str  # host alias, key file name or config.d file name
+    message: str
+    path: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "code": self.code,
+            "severity": self.severity.value,
+            "subject": self.subject,
+            "message": self.message,
+            "path": self.path,
+        }
+
+
+@dataclass
+class AuditResult:
+    host_count: int
+    findings: List[Finding] = field(default_factory=list)
+
+    def by_code(self, code: str) -> List[Finding]:
+        return [f for f in self.findings if f.code == code]
+
+    def to_report(self) -> Dict[str, Any]:
+        """JSON report: the original summary lists plus the typed findings."""
+        return {
+            "host_count": self.host_count,
+            "duplicates": [f.subject for f in self.by_code(DUPLICATE_HOST)],
+            "orphaned_private_keys": [f.subject for f in self.by_code(ORPHANED_KEY)],
+            "missing_referenced_keys": [f.subject for f in self.by_code(MISSING_KEY)],
+            "bad_key_permissions": [f.message for f in self.by_code(BAD_PERMISSIONS)],
+            "unparseable_files": [f.message for f in self.by_code(UNPARSEABLE)],
+            "duplicate_keys": [f.message for f in self.by_code(DUPLICATE_KEY)],
+            "mismatched_public_keys": [f.subject for f in self.by_code(PUB_MISMATCH)],
+            "findings": [f.to_dict() for f in self.findings],
+        }
+
+
+def unparseable_finding(f: index.IndexedFile) -> Finding:
+    return Finding(UNPARSEABLE, Severity.ERROR, f.name, f"{f.name}: {f.error}", str(f.path))
+
+
+def duplicate_host_findings(alias: str, files: Sequence[index.IndexedFile]) -> List[Finding]:
+    """One finding per file that redefines ``alias`` after the first (by name)."""
+    return [
+        Finding(DUPLICATE_HOST, Severity.ERROR, alias,
+                f"Host {alias} defined in {files[0].name} and {f.name}", str(f.path))
+        for f in files[1:]
+    ]
+
+
+def missing_key_finding(path: str, aliases: Sequence[str]) -> Finding:
+    return Finding(MISSING_KEY, Severity.ERROR, path,
+                   f"{path} referenced by {', '.join(aliases)} does not exist", path)
+
+
+def key_file_findings(name: str, path: str, referenced: bool,
+                      st: Optional[os.stat_result]) -> List[Finding]:
+    """Orphan and permission findings for one private key file."""
+    out = []
+    if not referenced:
+        out.append(Finding(ORPHANED_KEY, Severity.WARNING, name,
+                           f"{name} is not referenced by any host", path))
+    mode = st.st_mode & 0o777 if st is not None else 0
+    if mode & 0o077:
+        out.append(Finding(BAD_PERMISSIONS, Severity.ERROR, name,
+                           f"{name} (mode {oct(mode)})", path))
+    return out
+
+
+def key_pair_findings(
+    name: str,
+    path: str,
+    fp: List[Optional[str]],
+    pub_path: Optional[str],
+    pub_fp: List[Optional[str]],
+) -> List[Finding]:
+    """Unreadable key files and ``.pub`` mismatches for one private key.
+
+    ``fp`` and ``pub_fp`` are ``[fingerprint, error]`` pairs.
+    """
+    out = []
+    for bad_name, bad_path, problem in ((name, path, fp[1]), (name + ".pub", pub_path, pub_fp[1])):
+        if bad_path is not None and problem:
+            out.append(Finding(INVALID_KEY, Severity.WARNING, bad_name,
+                               f"{bad_name}: {problem}", bad_path))
+    if fp[0] and pub_fp[0] and fp[0] != pub_fp[0]:
+        out.append(Finding(PUB_MISMATCH, Severity.ERROR, name,
+                           f"{name}.pub ({pub_fp[0]}) does not match the private key ({fp[0]})",
+                           pub_path))
+    return out
+
+
+def duplicate_key_finding(fp: str, keys: Sequence[Tuple[str, str, Sequence[str]]]) -> Finding:
+    """``keys`` holds ``(name, path, aliases using it)`` for each file with key ``fp``."""
+    names = [f"{name} ({', '.join(users)})" if users else name for name, _, users in keys]
+    return Finding(DUPLICATE_KEY, Severity.WARNING, fp, f"{fp} stored as {', '.join(names)}",
+                   keys[0][1])
+
+
+def identity_paths(host: HostConfig, home: Path) -> List[str]:
+    """Absolute paths of every IdentityFile of ``host``.
+
+    ``~`` is expanded against ``home``; relative paths are taken relative to
+    ``home`` as well.
+    """
+    out = []
+    home_s = str(home)
+    for ident in [host.identity_file, *host.get_option("IdentityFile")]:
+        if not ident:
+            continue
+        if ident == "~" or ident.startswith("~/"):
+            ident = home_s + ident[1:]
+        elif not ident.startswith("/"):
+            ident = home_s + "/" + ident
+        # normpath is only needed for paths with ./, ../ or doubled slashes
+        if "/." in ident or "//" in ident:
+            ident = os.path.normpath(ident)
+        out.append(ident)
+    return out
+
+
+def _map_batched(fn: Callable[[T], R], items: Sequence[T], workers: int) -> List[R]:
+    """``[fn(item) for item in items]``, split into one chunk per worker (at
+    least ``_MIN_CHUNK`` items each) so slow stats on network mounts overlap."""
+    if workers <= 1 or len(items) <= _MIN_CHUNK:
+        return [fn(item) for item in items]
+    size = max(_MIN_CHUNK, -(-len(items) // workers))
+    batches = [items[i:i + size] for i in range(0, len(items), size)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda batch: [fn(item) for item in batch], batches)
+        return [r for batch in results for r in batch]
+
+
+def _stat(entry: os.DirEntry) -> Optional[os.stat_result]:
+    try:
+        return entry.stat()
+    except OSError:
+        return None
+
+
+def _exists(path: str) -> bool:
+    return os.path.exists(path)
+
+
+def scan_key_dir(keys_dir: Path) -> Tuple[List[os.DirEntry], Dict[str, os.DirEntry]]:
+    """Private key candidates (sorted by name) and ``.pub`` files by name,
+    from one scandir of ``keys_dir`` (empty if it does not exist)."""
+    private: List[os.DirEntry] = []
+    public: Dict[str, os.DirEntry] = {}
+    try:
+        with os.scandir(keys_dir) as it:
+            for e in it:
+                if not e.is_file():
+                    continue
+                if e.name.endswith(".pub"):
+                    public[e.name] = e
+                else:
+                    private.append(e)
+    except FileNotFoundError:
+        pass
+    private.sort(key=lambda e: e.name)
+    return private, public
+
+
+def scan_keys(keys_dir: Path) -> List[os.DirEntry]:
+    """Private key candidates in ``keys_dir`` (one scandir, no ``.pub`` files)."""
+    return scan_key_dir(keys_dir)[0]
+
+
+def key_fingerprints(
+    entries: List[os.DirEntry],
+    stats: List[Optional[os.stat_result]],
+    cache_dir: Optional[Path],
+    workers: int,
+) -> Dict[str, List[Optional[str]]]:
+    """``path -> [fingerprint, error]`` for the key files in ``entries``.
+
+    ``stats`` is parallel to ``entries``; files whose stat is None are left
+    out. With ``cache_dir`` a file is only read when its stat no longer
+    matches the fingerprint cache, which is then pruned to these files and
+    saved. Reads run on ``workers`` threads.
+    """
+    cache = None
+    if cache_dir is not None:
+        cache = fingerprint.FingerprintCache(cache_dir)
+        cache.load()
+    out: Dict[str, List[Optional[str]]] = {}
+    todo: List[Tuple[str, os.stat_result]] = []
+    for entry, st in zip(entries, stats):
+        if st is None:
+            continue
+        cached = cache.get(entry.path, st) if cache is not None else None
+        if cached is not None:
+            out[entry.path] = cached
+        else:
+            todo.append((entry.path, st))
+    computed = _map_batched(fingerprint.safe_fingerprint, [p for p, _ in todo], workers)
+    timing.add(len(todo))
+    for (path, st), (fp, error) in zip(todo, computed):
+        out[path] = [fp, error]
+        if cache is not None:
+            cache.put(path, st, fp, error)
+    if cache is not None:
+        cache.prune(set(out))
+        try:
+            cache.save()
+        except OSError:  # pragma: no cover - cache is best effort
+            pass
+    return out
+
+
+def run_audit(
+    hosts: Iterable[index.IndexedFile],
+    keys_dir: Path,
+    home: Optional[Path] = None,
+    workers: int = 4,
+    cache_dir: Optional[Path] = None,
+) -> AuditResult:
+    """Audit parsed host files against the key directory.
+
+    ``keys_dir`` is listed once with ``os.scandir``; references into it are
+    resolved against that listing, so only IdentityFile paths elsewhere and
+    key modes need a stat. Those stats run in a thread pool of ``workers``
+    threads, which pays off when ~/.ssh lives on a network mount.
+
+    Key files are fingerprinted in-process to find the same key stored
+    under several names and ``.pub`` files that do not belong to their
+    private key. With ``cache_dir`` fingerprints are cached by mtime/size.
+    """
+    home = home or Path.home()
+    findings: List[Finding] = []
+    loaded = list(hosts)
+    aliases = index.AliasTable()
+    referenced: Dict[str, List[str]] = {}  # absolute key path -> aliases
+    host_count = 0
+    with timing.span("audit hosts"):
+        for f in loaded:
+            if f.host is None:
+                findings.append(unparseable_finding(f))
+                continue
+            host_count += 1
+            aliases.add(f)
+            for p in identity_paths(f.host, home):
+                referenced.setdefault(p, []).append(f.host.host)
+        for alias, files in aliases.duplicates.items():
+            findings.extend(duplicate_host_findings(alias, files))
+
+    with timing.span("audit keys") as span:
+        keys, pubs = scan_key_dir(keys_dir)
+        keys_root = os.path.normpath(keys_dir)
+        key_paths = {f"{keys_root}/{e.name}" for e in keys}
+        # Anything not found in the keys listing needs a real existence check
+        outside = [p for p in referenced if p not in key_paths]
+        exists = dict(zip(outside, _map_batched(_exists, outside, workers)))
+        for p, owners in referenced.items():
+            if p not in key_paths and not exists[p]:
+                findings.append(missing_key_finding(p, owners))
+
+        key_files = keys + list(pubs.values())
+        stats = _map_batched(_stat, key_files, workers)
+        for entry, st in zip(keys, stats):
+            findings.extend(key_file_findings(
+                entry.name, entry.path, f"{keys_root}/{entry.name}" in referenced, st))
+        span.add(len(outside) + len(key_files))
+
+    with timing.span("audit fingerprints"):
+        fps = key_fingerprints(key_files, stats, cache_dir, workers)
+    by_fp: Dict[str, List[os.DirEntry]] = {}
+    unknown: List[Optional[str]] = [None, None]
+    for entry in keys:
+        fp = fps.get(entry.path, unknown)
+        pub = pubs.get(entry.name + ".pub")
+        pub_fp = fps.get(pub.path, unknown) if pub is not None else unknown
+        findings.extend(key_pair_findings(
+            entry.name, entry.path, fp, pub.path if pub is not None else None, pub_fp))
+        # PEM private keys carry no public half; fall back to the .pub
+        identity = fp[0] or pub_fp[0]
+        if identity:
+            by_fp.setdefault(identity, []).append(entry)
+    for identity, entries in by_fp.items():
+        if len(entries) >= 2:
+            findings.append(duplicate_key_finding(identity, [
+                (e.name, e.path, referenced.get(f"{keys_root}/{e.name}", [])) for e in entries
+            ]))
+    return AuditResult(host_count, findings)
+
+
+def audit_layout(
+    config_d_dir: Path,
+    keys_dir: Path,
+    cache_dir: Optional[Path] = None,
+    home: Optional[Path] = None,
+    workers: int = 4,
+) -> AuditResult:
+    """Load config.d (through the parse index when ``cache_dir`` is set) and audit it."""
+    return run_audit(index.load_host_files(config_d_dir, cache_dir), keys_dir, home, workers,
+                     cache_dir)
+
+
+__all__ = [
+    "AuditResult",
+    "Finding",
+    "Severity",
+    "audit_layout",
+    "duplicate_host_findings",
+    "duplicate_key_finding",
+    "identity_paths",
+    "key_file_findings",
+    "key_fingerprints",
+    "key_pair_findings",
+    "missing_key_finding",
+    "run_audit",
+    "scan_key_dir",
+    "scan_keys",
+    "unparseable_finding",
+]
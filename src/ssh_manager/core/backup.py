@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import tarfile
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Literal, Optional, Tuple
+
+from . import timing
+
+MANIFEST_NAME = "manifest.json.gz"
+MANIFEST_VERSION = 1
+OBJECTS_DIR = "objects"
+# Items of ~/.ssh captured by a snapshot
+SNAPSHOT_ITEMS = ("config", "config.d", "keys")
+
+# Single-file snapshot formats: suffix -> tarfile write mode
+ArchiveMode = Literal["w:gz", "w:xz"]
+ARCHIVE_FORMATS: Dict[str, ArchiveMode] = {"tar.gz": "w:gz", "tar.xz": "w:xz"}
+# Name of the manifest member appended at the end of archive snapshots
+ARCHIVE_MANIFEST = "manifest.json"
+
+_CHUNK = 1 << 20
+
+
+@dataclass
+class ManifestEntry:
+    path: str  # relative to the ssh dir, '/'-separated
+    sha256: str
+    size: int
+    mtime_ns: int
+    mode: int
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "path": self.path,
+            "sha256": self.sha256,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "mode": self.mode,
+        }
+
+
+@dataclass
+class VerifyReport:
+    snapshot: Path
+    checked: int = 0
+    problems: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def iter_snapshot_files(ssh_dir: Path) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield ``(relative_path, stat)`` for every regular file a snapshot covers."""
+    for name in SNAPSHOT_ITEMS:
+        p = ssh_dir / name
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        if p.is_dir():
+            yield from _walk(p, name)
+        else:
+            yield name, st
+
+
+def _walk(directory: Path, rel: str) -> Iterator[Tuple[str, os.stat_result]]:
+    try:
+        entries = sorted(os.scandir(directory), key=lambda e: e.name)
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        child = f"{rel}/{entry.name}"
+        try:
+            if entry.is_dir():
+                yield from _walk(Path(entry.path), child)
+            elif entry.is_file():
+                yield child, entry.stat()
+        except FileNotFoundError:  # pragma: no cover - raced with a delete
+            continue
+
+
+def is_archive(snapshot: Path) -> bool:
+    return any(snapshot.name.endswith("." + fmt) for fmt in ARCHIVE_FORMATS)
+
+
+def list_snapshots(backup_dir: Path) -> List[Path]:
+    """Snapshot directories and archives (oldest first), excluding the object store."""
+    if not backup_dir.is_dir():
+        return []
+    return sorted(
+        p for p in backup_dir.iterdir()
+        if p.name != OBJECTS_DIR and not p.name.startswith(".")
+        and (p.is_dir() or (p.is_file() and is_archive(p)))
+    )
+
+
+def load_manifest(snapshot: Path) -> Optional[List[ManifestEntry]]:
+    try:
+        with gzip.open(snapshot / MANIFEST_NAME, "rt", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return [ManifestEntry(**item) for item in data.get("files", [])]
+
+
+def _latest_manifest(backup_dir: Path) -> Dict[str, ManifestEntry]:
+    for snap in reversed(list_snapshots(backup_dir)):
+        entries = load_manifest(snap)
+        if entries is not None:
+            return {e.path: e for e in entries}
+    return {}
+
+
+def object_path(backup_dir: Path, digest: str) -> Path:
+    return backup_dir / OBJECTS_DIR / digest[:2] / digest[2:]
+
+
+def _store_object(backup_dir: Path, src: Path) -> Tuple[str, int]:
+    """Copy ``src`` into the object store and return its digest and size.
+
+    The bytes are hashed as they are copied, so the object is named after
+    exactly what it holds even if ``src`` changes while it is read.
+    """
+    objects = backup_dir / OBJECTS_DIR
+    objects.mkdir(mode=0o700, parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(prefix=".tmp-", dir=objects)  # mode 0600
+    tmp = Path(name)
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out, open(src, "rb") as fh:
+            for chunk in iter(lambda: fh.read(_CHUNK), b""):
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        digest = h.hexdigest()
+        obj = object_path(backup_dir, digest)
+        if obj.exists():
+            tmp.unlink()
+        else:
+            obj.parent.mkdir(mode=0o700, exist_ok=True)
+            tmp.replace(obj)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return digest, size
+
+
+def _snapshot_name(backup_dir: Path, ext: str = "") -> Path:
+    stamp = time.strftime("%Y-%m-%d_%H%M%S")
+    dest = backup_dir / f"{stamp}{ext}"
+    suffix = 1
+    while dest.exists():
+        dest = backup_dir / f"{stamp}_{suffix}{ext}"
+        suffix += 1
+    return dest
+
+
+def _new_snapshot_dir(backup_dir: Path) -> Path:
+    dest = _snapshot_name(backup_dir)
+    dest.mkdir(mode=0o700)
+    return dest
+
+
+class _HashingReader:
+    """File wrapper that hashes bytes as tarfile streams them."""
+
+    def __init__(self, fh: BinaryIO):
+        self._fh = fh
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fh.read(size)
+        self.sha256.update(data)
+        return data
+
+
+def create_snapshot(ssh_dir: Path, backup_dir: Path) -> Path:
+    """Create a deduplicated snapshot of config, config.d and keys.
+
+    File contents live once in ``objects/`` keyed by SHA-256 and the
+    snapshot itself is a directory holding only ``manifest.json.gz``. Files
+    whose size and mtime match the previous manifest reuse its hash, so an
+    unchanged tree costs a stat per file rather than a copy. Other files are
+    read once, hashed as they are copied into the store.
+    """
+    backup_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    with timing.span("backup"):
+        previous = _latest_manifest(backup_dir)
+        dest = _new_snapshot_dir(backup_dir)
+        entries: List[ManifestEntry] = []
+        for rel, st in iter_snapshot_files(ssh_dir):
+            prev = previous.get(rel)
+            if (
+                prev is not None
+                and prev.size == st.st_size
+                and prev.mtime_ns == st.st_mtime_ns
+                and object_path(backup_dir, prev.sha256).exists()
+            ):
+                digest, size = prev.sha256, prev.size
+            else:
+                # New or changed: hashed while copying, in one read; the copy
+                # is dropped if that content is already stored
+                digest, size = _store_object(backup_dir, ssh_dir / rel)
+                timing.add(1, size)
+            entries.append(ManifestEntry(rel, digest, size, st.st_mtime_ns, st.st_mode & 0o7777))
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "files": [e.to_dict() for e in entries],
+        }
+        tmp = dest / (MANIFEST_NAME + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+            json.dump(manifest, fh, separators=(",", ":"))
+        tmp.replace(dest / MANIFEST_NAME)
+    return dest
+
+
+def create_archive(ssh_dir: Path, backup_dir: Path, fmt: str = "tar.xz") -> Path:
+    """Stream config, config.d and keys into one compressed tar archive.
+
+    Files are read straight into the compressor (nothing is copied first);
+    tar headers keep each file's mode and mtime. A manifest in the same
+    format as directory snapshots is appended as the last member.
+    """
+    mode = ARCHIVE_FORMATS[fmt]
+    backup_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    dest = _snapshot_name(backup_dir, "." + fmt)
+    tmp = dest.with_name("." + dest.name + ".tmp")
+    entries: List[ManifestEntry] = []
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with timing.span("backup"), os.fdopen(fd, "wb") as raw, \
+                tarfile.open(fileobj=raw, mode=mode) as tar:
+            for rel, st in iter_snapshot_files(ssh_dir):
+                info = tar.gettarinfo(str(ssh_dir / rel), arcname=rel)
+                with open(ssh_dir / rel, "rb") as fh:
+                    reader = _HashingReader(fh)
+                    tar.addfile(info, reader)  # type: ignore[arg-type]
+                timing.add(1, st.st_size)
+                entries.append(ManifestEntry(
+                    rel, reader.sha256.hexdigest(), st.st_size, st.st_mtime_ns, st.st_mode & 0o7777
+                ))
+            data = json.dumps({
+                "version": MANIFEST_VERSION,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "files": [e.to_dict() for e in entries],
+            }, separators=(",", ":")).encode("utf-8")
+            info = tarfile.TarInfo(ARCHIVE_MANIFEST)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            info.mode = 0o600
+            tar.addfile(info, io.BytesIO(data))
+        os.replace(tmp, dest)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    return dest
+
+
+def verify_archive(archive: Path) -> VerifyReport:
+    """Hash every member of an archive snapshot against its embedded manifest."""
+    report = VerifyReport(archive)
+    digests: Dict[str, str] = {}
+    manifest = None
+    try:
+        with tarfile.open(archive, "r:*") as tar:
+            for member in tar:
+                fh = tar.extractfile(member)
+                if fh is None:
+                    continue
+                if member.name == ARCHIVE_MANIFEST:
+                    manifest = json.loads(fh.read().decode("utf-8"))
+                    continue
+                h = hashlib.sha256()
+                for chunk in iter(lambda: fh.read(_CHUNK), b""):
+                    h.update(chunk)
+                digests[member.name] = h.hexdigest()
+    except (OSError, tarfile.TarError, ValueError) as exc:
+        report.problems.append(f"unreadable archive: {exc}")
+        return report
+    if manifest is None:
+        report.problems.append(f"missing {ARCHIVE_MANIFEST}")
+        return report
+    for item in manifest.get("files", []):
+        e = ManifestEntry(**item)
+        report.checked += 1
+        digest = digests.get(e.path)
+        if digest is None:
+            report.problems.append(f"{e.path}: missing from archive")
+        elif digest != e.sha256:
+            report.problems.append(f"{e.path}: sha256 mismatch")
+    return report
+
+
+def verify_snapshot(snapshot: Path, backup_dir: Optional[Path] = None) -> VerifyReport:
+    """Re-hash every object referenced by ``snapshot``'s manifest.
+
+    ``backup_dir`` defaults to the snapshot's parent directory. Archive
+    snapshots are checked against their embedded manifest instead.
+    """
+    if is_archive(snapshot):
+        return verify_archive(snapshot)
+    backup_dir = backup_dir or snapshot.parent
+    report = VerifyReport(snapshot)
+    entries = load_manifest(snapshot)
+    if entries is None:
+        report.problems.append(f"missing or unreadable {MANIFEST_NAME}")
+        return report
+    # Objects are shared between files and snapshots; check each one once
+    problems: Dict[str, Optional[str]] = {}
+    for e in entries:
+        report.checked += 1
+        if e.sha256 not in problems:
+            problems[e.sha256] = _check_object(object_path(backup_dir, e.sha256), e)
+        problem = problems[e.sha256]
+        if problem:
+            report.problems.append(f"{e.path}: object {e.sha256[:12]} {problem}")
+    return report
+
+
+def _check_object(obj: Path, entry: ManifestEntry) -> Optional[str]:
+    try:
+        if obj.stat().st_size != entry.size or file_sha256(obj) != entry.sha256:
+            return "corrupt"
+    except FileNotFoundError:
+        return "missing"
+    return None
+
+
+__all__ = [
+    "ARCHIVE_FORMATS",
+    "ManifestEntry",
+    "VerifyReport",
+    "create_archive",
+    "create_snapshot",
+    "file_sha256",
+    "is_archive",
+    "iter_snapshot_files",
+    "list_snapshots",
+    "load_manifest",
+    "object_path",
+    "verify_archive",
+    "verify_snapshot",
+]
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import random
+import shlex
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import paramiko
+
+from . import fingerprint
+
+# Result statuses
+ADDED = "added"  # key appended to authorized_keys
+PRESENT = "present"  # key was already there
+FAILED = "failed"
+
+
+class HostKeyError(paramiko.SSHException):
+    """Raised for hosts missing from known_hosts when new keys are not accepted."""
+
+
+class RemoteCommandError(RuntimeError):
+    """Raised when the host ran the authorized_keys update and it failed."""
+
+
+# Connection problems worth another attempt; authentication, host key and
+# remote command failures are not retried
+_TRANSIENT = (socket.error, EOFError, paramiko.SSHException)
+_FINAL = (
+    paramiko.AuthenticationException,
+    paramiko.BadHostKeyException,
+    HostKeyError,
+    RemoteCommandError,
+)
+
+
+@dataclass(frozen=True)
+class Target:
+    alias: str
+    hostname: str
+    user: str
+    port: int = 22
+    public_key: str = ""  # authorized_keys line to install
+
+
+@dataclass
+class DeployResult:
+    alias: str
+    status: str
+    attempts: int
+    elapsed: float
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "host": self.alias,
+            "status": self.status,
+            "attempts": self.attempts,
+            "elapsed": round(self.elapsed, 3),
+            "error": self.error,
+        }
+
+
+@dataclass
+class DeployReport:
+    results: List[DeployResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def count(self, status: str) -> int:
+        return sum(1 for r in self.results if r.status == status)
+
+    @property
+    def ok(self) -> bool:
+        return self.count(FAILED) == 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "added": self.count(ADDED),
+            "present": self.count(PRESENT),
+            "failed": self.count(FAILED),
+            "elapsed": round(self.elapsed, 3),
+            "results": [r.to_dict() for r in self.results],
+        }
+
+
+def authorized_keys_command(public_key: str) -> str:
+    """Remote shell command that appends ``public_key`` to
+    ``~/.ssh/authorized_keys`` unless the key (type and base64, ignoring the
+    comment) is already there. Prints ``added`` or ``present``."""
+    key = fingerprint.parse_public_key(public_key)  # validates the line
+    match = shlex.quote(f"{key.key_type} {public_key.split()[1]}")
+    line = shlex.quote(public_key.strip())
+    return (
+        "umask 077; mkdir -p .ssh && touch .ssh/authorized_keys && "
+        f"if grep -qF -- {match} .ssh/authorized_keys; then echo {PRESENT}; else "
+        # keep the last entry intact when the file lacks a final newline
+        "if [ -n \"$(tail -c1 .ssh/authorized_keys)\" ]; then echo >> .ssh/authorized_keys; fi; "
+        f"printf '%s\\n' {line} >> .ssh/authorized_keys && echo {ADDED}; fi"
+    )
+
+
+class _KnownHostsPolicy(paramiko.MissingHostKeyPolicy):
+    """Checks every server key against one shared known_hosts table.
+
+    Clients are created without host keys of their own, so paramiko defers
+    every decision here. With ``accept_new`` unknown hosts are trusted on
+    first use (like ``StrictHostKeyChecking=accept-new``); a changed key is
+    always rejected.
+    """
+
+    def __init__(self, known: paramiko.HostKeys, accept_new: bool):
+        self.known = known
+        self.accept_new = accept_new
+        self.added: List[Tuple[str, paramiko.PKey]] = []
+        self._lock = threading.Lock()
+
+    def missing_host_key(self, client: paramiko.SSHClient, hostname: str,
+                         key: paramiko.PKey) -> None:
+        with self._lock:
+            if self.known.check(hostname, key):
+                return
+            entry = self.known.lookup(hostname)
+            if entry is not None and key.get_name() in entry:
+                raise paramiko.BadHostKeyException(hostname, key, entry[key.get_name()])
+            if not self.accept_new:
+                raise HostKeyError(f"{hostname}: host key not in known_hosts")
+            self.known.add(hostname, key.get_name(), key)
+            self.added.append((hostname, key))
+
+
+class Deployer:
+    """Push public keys to many hosts over SSH at once (paramiko).
+
+    Each host is tried up to ``retries + 1`` times; connection errors and
+    timeouts back off exponentially (with jitter) between attempts, while
+    authentication and host key failures fail at once. ``timeout`` bounds
+    the TCP connect, the SSH handshake, authentication and the remote
+    command of each attempt.
+
+    Login uses ``password`` and/or ``key_filename`` plus, unless disabled,
+    the SSH agent and the default ``~/.ssh/id_*`` keys.
+    """
+
+    def __init__(
+        self,
+        known_hosts: Optional[Path] = None,
+        accept_new: bool = False,
+        password: Optional[str] = None,
+        key_filename: Optional[str] = None,
+        allow_agent: bool = True,
+        look_for_keys: bool = True,
+        timeout: float = 10.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+    ):
+        self.known_hosts = known_hosts
+        known = paramiko.HostKeys()
+        if known_hosts is not None and known_hosts.exists():
+            known.load(str(known_hosts))
+        self.policy = _KnownHostsPolicy(known, accept_new)
+        self.password = password
+        self.key_filename = key_filename
+        self.allow_agent = allow_agent
+        self.look_for_keys = look_for_keys
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    def deploy(self, targets: Sequence[Target], workers: int = 16) -> DeployReport:
+        """Deploy to every target with at most ``workers`` connections open;
+        results come back in target order."""
+        t0 = time.monotonic()
+        if not targets:
+            return DeployReport()
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(targets)))) as pool:
+            results = list(pool.map(self.deploy_one, targets))
+        return DeployReport(results, time.monotonic() - t0)
+
+    def deploy_one(self, target: Target) -> DeployResult:
+        t0 = time.monotonic()
+        try:
+            command = authorized_keys_command(target.public_key)
+        except fingerprint.KeyFormatError as exc:
+            return DeployResult(target.alias, FAILED, 0, 0.0, f"invalid public key: {exc}")
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                status = self._install(target, command)
+                return DeployResult(target.alias, status, attempt, time.monotonic() - t0)
+            except _FINAL as exc:
+                error = _describe(exc)
+            except _TRANSIENT as exc:
+                error = _describe(exc)
+                if attempt <= self.retries:
+                    time.sleep(self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+                    continue
+            return DeployResult(target.alias, FAILED, attempt, time.monotonic() - t0, error)
+
+    def _install(self, target: Target, command: str) -> str:
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(self.policy)
+        try:
+            client.connect(
+                target.hostname, port=target.port, username=target.user,
+                password=self.password, key_filename=self.key_filename,
+                allow_agent=self.allow_agent, look_for_keys=self.look_for_keys,
+                timeout=self.timeout, banner_timeout=self.timeout, auth_timeout=self.timeout,
+            )
+            _, stdout, stderr = client.exec_command(command, timeout=self.timeout)
+            out = stdout.read().decode("utf-8", "replace").strip()
+            status = stdout.channel.recv_exit_status()
+            if status != 0 or out not in (ADDED, PRESENT):
+                err = stderr.read().decode("utf-8", "replace").strip()
+                detail = err or out or "no output"
+                raise RemoteCommandError(f"remote command failed (status {status}): {detail}")
+            return out
+        finally:
+            client.close()
+
+    def save_known_hosts(self) -> int:
+        """Append host keys accepted during this run to ``known_hosts``;
+        returns how many were written."""
+        if self.known_hosts is None or not self.policy.added:
+            return 0
+        self.known_hosts.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        with open(self.known_hosts, "a", encoding="utf-8") as fh:
+            for hostname, key in self.policy.added:
+                fh.write(f"{hostname} {key.get_name()} {key.get_base64()}\n")
+        written = len(self.policy.added)
+        self.policy.added = []
+        return written
+
+
+def _describe(exc: BaseException) -> str:
+    if isinstance(exc, socket.timeout):
+        return "timed out"
+    return str(exc) or type(exc).__name__
+
+
+__all__ = [
+    "ADDED",
+    "FAILED",
+    "PRESENT",
+    "DeployReport",
+    "DeployResult",
+    "Deployer",
+    "HostKeyError",
+    "RemoteCommandError",
+    "Target",
+    "authorized_keys_command",
+]
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import parser, timing
+from .model import HostConfig
+from .names import PATTERN_FILES
+
+INDEX_VERSION = 3
+INDEX_NAME = "index.json"
+FRAGMENTS_NAME = "fragments"
+# Single-file fragment cache written by earlier versions
+_OLD_FRAGMENTS_NAME = "fragments.json"
+
+
+@dataclass
+class IndexedFile:
+    """A config.d host file together with its parsed HostConfig (or error)."""
+    directory: Path
+    name: str
+    host: Optional[HostConfig]
+    error: Optional[str] = None
+
+    @property
+    def path(self) -> Path:
+        return self.directory / self.name
+
+
+class AliasTable:
+    """Every alias named by a set of host files, mapped to the file that
+    defines it first. Built in one pass, so any alias of a multi-alias
+    block is found with a dict lookup; aliases defined by several files are
+    collected in ``duplicates`` (every defining file, in the order added).
+    Adding a file again under the same name replaces it."""
+
+    def __init__(self, files: Iterable[IndexedFile] = ()):
+        self.files: Dict[str, IndexedFile] = {}
+        self.duplicates: Dict[str, List[IndexedFile]] = {}
+        for f in files:
+            self.add(f)
+
+    def add(self, f: IndexedFile) -> None:
+        if f.host is None:
+            return
+        for alias in f.host.aliases:
+            first = self.files.setdefault(alias, f)
+            if first.name == f.name:
+                self.files[alias] = f  # the same file, re-read
+            else:
+                self.duplicates.setdefault(alias, [first]).append(f)
+
+    def get(self, alias: str) -> Optional[IndexedFile]:
+        return self.files.get(alias)
+
+    def __contains__(self, alias: object) -> bool:
+        return alias in self.files
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+
+class ParseIndex:
+    """On-disk cache of parsed ``config.d/*.conf`` files.
+
+    Entries are keyed by file name and validated against ``st_mtime_ns`` and
+    ``st_size`` from a single ``os.scandir`` pass; only files whose stat
+    signature changed are read and reparsed. With ``verify_hash`` the content
+    SHA-256 is also compared, which costs a read but still skips the parse.
+    """
+
+    def __init__(self, cache_dir: Path, verify_hash: bool = False):
+        self.path = cache_dir / INDEX_NAME
+        self.verify_hash = verify_hash
+        self.root: Optional[str] = None
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+
+    def load(self) -> None:
+        try:
+            with timing.span("index load"):
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return
+        self.root = data.get("root")
+        self.entries = data.get("entries", {})
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        payload = {"version": INDEX_VERSION, "root": self.root, "entries": self.entries}
+        tmp = self.path.with_suffix(".tmp")
+        with timing.span("index save"):
+            data = json.dumps(payload, separators=(",", ":"))
+            timing.add(1, tmp.write_text(data, encoding="utf-8"))
+            tmp.replace(self.path)
+        self._dirty = False
+
+    def clear(self) -> None:
+        self.entries = {}
+        self._dirty = True
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def scan(self, config_d_dir: Path) -> List[IndexedFile]:
+        """Return every host file in ``config_d_dir`` (sorted by name), reparsing
+        only files that changed since the last scan."""
+        return list(self.iter_scan(config_d_dir))
+
+    def iter_scan(self, config_d_dir: Path) -> Iterator[IndexedFile]:
+        """Like :meth:`scan`, but yields files in name order as they are
+        validated or parsed. Stale entries are dropped once exhausted."""
+        root = str(config_d_dir)
+        if self.root != root:
+            self.root = root
+            self.entries = {}
+            self._dirty = True
+        seen = set()
+        for entry in sorted(_scan_hosts(config_d_dir), key=lambda e: e.name):
+            seen.add(entry.name)
+            st = entry.stat()
+            old = self.entries.get(entry.name)
+            data: Optional[bytes] = None
+            digest: Optional[str] = None
+            if old is not None and old["mtime_ns"] == st.st_mtime_ns and old["size"] == st.st_size:
+                fresh = True
+                if self.verify_hash:
+                    data = _read(entry.path)
+                    digest = hashlib.sha256(data).hexdigest()
+                    fresh = old.get("sha256") == digest
+                if fresh:
+                    self.hits += 1
+                    yield _from_entry(config_d_dir, entry.name, old)
+                    continue
+            if data is None:
+                data = _read(entry.path)
+                if self.verify_hash:
+                    digest = hashlib.sha256(data).hexdigest()
+            host, error = _parse_bytes(data)
+            cached: Dict[str, Any] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+            if digest:
+                cached["sha256"] = digest
+            if host is not None:
+                cached["host"] = host.to_dict()
+            else:
+                cached["error"] = error
+            self.misses += 1
+            self.entries[entry.name] = cached
+            self._dirty = True
+            yield IndexedFile(config_d_dir, entry.name, host, error)
+        stale = [name for name in self.entries if name not in seen]
+        for name in stale:
+            del self.entries[name]
+            self._dirty = True
+
+    def stats(self, config_d_dir: Path) -> Dict[str, Any]:
+        """Summarize the index without parsing anything."""
+        fresh = stale = untracked = 0
+        seen = set()
+        for entry in _scan_hosts(config_d_dir):
+            seen.add(entry.name)
+            cached = self.entries.get(entry.name)
+            if cached is None:
+                untracked += 1
+                continue
+            st = entry.stat()
+            if cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+                fresh += 1
+            else:
+                stale += 1
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        return {
+            "index_path": str(self.path),
+            "index_bytes": size,
+            "entries": len(self.entries),
+            "fresh": fresh,
+            "stale": stale,
+            "untracked": untracked,
+            "removed": sum(1 for name in self.entries if name not in seen),
+        }
+
+
+class FragmentCache:
+    """Raw ``config.d/*.conf`` contents for the flattened ``build --single``
+    output, so only changed files are re-read.
+
+    Each file's text is its own blob in ``manager_cache/fragments/``, named
+    ``<mtime_ns>-<size>-<file name>``. One listing of that directory tells
+    which files are fresh, and an edit rewrites only the blob of the file
+    that changed.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.path = cache_dir / FRAGMENTS_NAME
+        # config.d file name -> "<mtime_ns>-<size>" of its blob
+        self.entries: Dict[str, str] = {}
+        self.reads = 0
+        self.writes = 0
+
+    def load(self) -> None:
+        try:
+            with os.scandir(self.path) as it:
+                names = [e.name for e in it if not e.name.startswith(".")]
+        except OSError:
+            return
+        for blob in names:
+            mtime, _, rest = blob.partition("-")
+            size, _, name = rest.partition("-")
+            if name and mtime.isdigit() and size.isdigit():
+                self.entries[name] = f"{mtime}-{size}"
+
+    def clear(self) -> None:
+        self.entries = {}
+        shutil.rmtree(self.path, ignore_errors=True)
+        (self.path.parent / _OLD_FRAGMENTS_NAME).unlink(missing_ok=True)
+
+    def read_all(self, config_d_dir: Path) -> List[str]:
+        """Contents of every config.d file, sorted by file name."""
+        texts: List[str] = []
+        seen = set()
+        for entry in sorted(_scan_conf(config_d_dir), key=lambda e: e.name):
+            seen.add(entry.name)
+            st = entry.stat()
+            key = f"{st.st_mtime_ns}-{st.st_size}"
+            if self.entries.get(entry.name) == key:
+                try:
+                    texts.append(_read(str(self.path / f"{key}-{entry.name}")).decode("utf-8"))
+                    continue
+                except (OSError, UnicodeDecodeError):
+                    pass  # blob gone or damaged: fall back to the file
+            data = _read(entry.path)
+            self.reads += 1
+            texts.append(data.decode("utf-8"))
+            self._put(entry.name, key, data)
+        for name in [n for n in self.entries if n not in seen]:
+            self._drop(name)
+        return texts
+
+    def _put(self, name: str, key: str, data: bytes) -> None:
+        try:
+            self.path.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp = self.path / f".{name}.tmp"
+            tmp.write_bytes(data)
+            tmp.replace(self.path / f"{key}-{name}")
+        except OSError:  # pragma: no cover - cache is best effort
+            return
+        self.writes += 1
+        if self.entries.get(name, key) != key:
+            self._drop(name)
+        self.entries[name] = key
+
+    def _drop(self, name: str) -> None:
+        key = self.entries.pop(name, None)
+        if key is not None:
+            try:
+                (self.path / f"{key}-{name}").unlink()
+            except OSError:
+                pass
+
+
+def _scan_conf(config_d_dir: Path) -> List[os.DirEntry]:
+    try:
+        with os.scandir(config_d_dir) as it:
+            return [e for e in it if e.name.endswith(".conf") and e.is_file()]
+    except FileNotFoundError:
+        return []
+
+
+def _scan_hosts(config_d_dir: Path) -> List[os.DirEntry]:
+    """Like :func:`_scan_conf` without the shared wildcard-block files,
+    which hold no host of their own."""
+    return [e for e in _scan_conf(config_d_dir) if e.name not in PATTERN_FILES]
+
+
+def _read(path: str) -> bytes:
+    with timing.span("read"), open(path, "rb") as fh:
+        data = fh.read()
+        timing.add(1, len(data))
+        return data
+
+
+def _parse_bytes(data: bytes) -> Tuple[Optional[HostConfig], Optional[str]]:
+    try:
+        with timing.span("parse"):
+            return parser.parse_host_file(data.decode("utf-8")), None
+    except (ValueError, UnicodeDecodeError) as exc:
+        return None, str(exc)
+
+
+def _from_entry(directory: Path, name: str, entry: Dict[str, Any]) -> IndexedFile:
+    host = entry.get("host")
+    return IndexedFile(directory, name, HostConfig.from_dict(host) if host else None,
+                       entry.get("error"))
+
+
+def load_host_files(config_d_dir: Path, cache_dir: Optional[Path] = None) -> List[IndexedFile]:
+    """Parse every host file in ``config_d_dir``, through the index when
+    ``cache_dir`` is given, or directly from disk otherwise."""
+    if cache_dir is None:
+        return [
+            IndexedFile(config_d_dir, e.name, *_parse_bytes(_read(e.path)))
+            for e in sorted(_scan_hosts(config_d_dir), key=lambda e: e.name)
+        ]
+    index = ParseIndex(cache_dir)
+    index.load()
+    results = index.scan(config_d_dir)
+    try:
+        index.save()
+    except OSError:  # pragma: no cover - cache is best effort
+        pass
+    return results
+
+
+def iter_host_files(config_d_dir: Path, cache_dir: Optional[Path] = None) -> Iterator[IndexedFile]:
+    """Streaming :func:`load_host_files`: yields host files in name order as
+    they are read, saving the index (when used) after the last one."""
+    if cache_dir is None:
+        for e in sorted(_scan_hosts(config_d_dir), key=lambda e: e.name):
+            yield IndexedFile(config_d_dir, e.name, *_parse_bytes(_read(e.path)))
+        return
+    index = ParseIndex(cache_dir)
+    index.load()
+    yield from index.iter_scan(config_d_dir)
+    try:
+        index.save()
+    except OSError:  # pragma: no cover - cache is best effort
+        pass
+
+
+def forget_files(cache_dir: Path, names: Iterable[str]) -> None:
+    """Drop the cached parses and fragments of the named config.d files.
+
+    For files rewritten with an older mtime (restore puts the snapshot's
+    back), which the stat signature alone might take for unchanged.
+    """
+    names = set(names)
+    index = ParseIndex(cache_dir)
+    index.load()
+    dropped = [index.entries.pop(name) for name in names if name in index.entries]
+    if dropped:
+        try:
+            index.save()
+        except OSError:  # pragma: no cover - cache is best effort
+            pass
+    fragments = FragmentCache(cache_dir)
+    fragments.load()
+    for name in names:
+        fragments._drop(name)
+
+
+def read_fragments(config_d_dir: Path, cache_dir: Optional[Path] = None) -> List[str]:
+    """Contents of every config.d file (sorted by name), through FragmentCache
+    when ``cache_dir`` is given."""
+    if cache_dir is None:
+        return [
+            _read(e.path).decode("utf-8")
+            for e in sorted(_scan_conf(config_d_dir), key=lambda e: e.name)
+        ]
+    cache = FragmentCache(cache_dir)
+    cache.load()
+    return cache.read_all(config_d_dir)
+
+
+__all__ = [
+    "AliasTable",
+    "FragmentCache",
+    "IndexedFile",
+    "ParseIndex",
+    "forget_files",
+    "iter_host_files",
+    "load_host_files",
+    "read_fragments",
+]
@@ -0,0 +1,400 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set
+
+import yaml
+
+from . import index, parser, store
+from .model import HostConfig
+from .names import LEADING_PATTERNS_FILE, PATTERNS_FILE, NameRegistry
+
+FORMATS = ("json", "ndjson", "yaml")
+# File suffixes recognised when no format is given
+SUFFIXES = {
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+}
+
+FIELDS = ("host", "hostname", "user", "port", "identity_file", "options", "patterns", "placement")
+
+# ``placement`` of a wildcard block -> the pattern file that holds it
+PLACEMENTS = {"leading": LEADING_PATTERNS_FILE, "trailing": PATTERNS_FILE}
+
+# JSON is decoded from a sliding buffer refilled in chunks of this size
+_CHUNK = 1 << 16
+
+
+class InventoryError(ValueError):
+    """Raised for unreadable input; ``problems`` lists every bad record."""
+
+    def __init__(self, problems: List[str]):
+        super().__init__("\n".join(problems))
+        self.problems = problems
+
+
+def format_for(path: Path) -> Optional[str]:
+    return SUFFIXES.get(path.suffix.lower())
+
+
+# Export
+
+
+def export_hosts(
+    hosts: Iterable[HostConfig],
+    out: IO[str],
+    fmt: str,
+    patterns: Optional[Mapping[str, Sequence[HostConfig]]] = None,
+) -> int:
+    """Write ``hosts`` to ``out`` one record at a time; returns the count.
+
+    JSON and YAML are a single list, NDJSON one object per line. Records
+    are ``HostConfig.to_dict()``, so options keep their order. ``patterns``
+    (see :func:`read_pattern_blocks`) adds the wildcard blocks, each with
+    its ``placement``, in the order ssh reads them: leading blocks before
+    the hosts, trailing ones after.
+    """
+    count = 0
+    records = _export_records(hosts, patterns or {})
+    if fmt == "json":
+        out.write("[")
+        for record in records:
+            out.write(",\n  " if count else "\n  ")
+            out.write(json.dumps(record, separators=(",", ":")))
+            count += 1
+        out.write("\n]\n" if count else "]\n")
+    elif fmt == "ndjson":
+        for record in records:
+            out.write(json.dumps(record, separators=(",", ":")) + "\n")
+            count += 1
+    elif fmt == "yaml":
+        for record in records:
+            out.write(yaml.safe_dump([record], sort_keys=False, default_flow_style=None))
+            count += 1
+        if not count:
+            out.write("[]\n")
+    else:
+        raise ValueError(f"unknown format {fmt!r}")
+    return count
+
+
+def _export_records(hosts: Iterable[HostConfig],
+                    patterns: Mapping[str, Sequence[HostConfig]]) -> Iterator[Dict[str, Any]]:
+    for block in patterns.get("leading", ()):
+        yield {**block.to_dict(), "placement": "leading"}
+    for h in hosts:
+        yield h.to_dict()
+    for block in patterns.get("trailing", ()):
+        yield {**block.to_dict(), "placement": "trailing"}
+
+
+def read_pattern_blocks(config_d_dir: Path) -> Dict[str, List[HostConfig]]:
+    """The wildcard blocks of config.d's pattern files, by ``placement``."""
+    blocks: Dict[str, List[HostConfig]] = {}
+    for placement, name in PLACEMENTS.items():
+        try:
+            with open(config_d_dir / name, encoding="utf-8") as fh:
+                blocks[placement] = list(parser.iter_host_blocks(fh, source=name))
+        except FileNotFoundError:
+            blocks[placement] = []
+    return blocks
+
+
+# Import
+
+
+def iter_records(fh: IO[str], fmt: str) -> Iterator[Any]:
+    """Stream the records of an export without loading the whole input.
+
+    JSON and YAML must hold one top-level list; NDJSON skips blank lines.
+    Malformed input raises :class:`InventoryError`.
+    """
+    if fmt == "ndjson":
+        for n, line in enumerate(fh, 1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as exc:
+                    raise InventoryError([f"line {n}: {exc}"]) from None
+    elif fmt == "json":
+        yield from _iter_json_list(fh)
+    elif fmt == "yaml":
+        yield from _iter_yaml_list(fh)
+    else:
+        raise ValueError(f"unknown format {fmt!r}")
+
+
+def _iter_json_list(fh: IO[str]) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    buf, pos = "", 0
+
+    def fill() -> bool:
+        nonlocal buf, pos
+        chunk = fh.read(_CHUNK)
+        buf, pos = buf[pos:] + chunk, 0
+        return bool(chunk)
+
+    def peek() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                return ""
+
+    if peek() != "[":
+        raise InventoryError(["JSON input must be a list of hosts"])
+    pos += 1
+    n = 0
+    if peek() == "]":
+        pos += 1
+    else:
+        while True:
+            peek()  # raw_decode does not skip leading whitespace
+            while True:
+                try:
+                    value, pos = decoder.raw_decode(buf, pos)
+                    break
+                except ValueError as exc:
+                    # Most likely the record runs past the buffer
+                    if not fill():
+                        raise InventoryError([f"record {n + 1}: {exc}"]) from None
+            n += 1
+            yield value
+            c = peek()
+            pos += 1
+            if c == "]":
+                break
+            if c != ",":
+                raise InventoryError([f"record {n}: expected , or ] after it" if c
+                                      else "JSON input ended before the closing ]"])
+    if peek():
+        raise InventoryError(["unexpected data after the JSON list"])
+
+
+def _iter_yaml_list(fh: IO[str]) -> Iterator[Any]:
+    loader = yaml.SafeLoader(fh)
+    try:
+        loader.get_event()  # stream start
+        if loader.check_event(yaml.StreamEndEvent):
+            return
+        loader.get_event()  # document start
+        event = loader.peek_event()
+        if isinstance(event, yaml.ScalarEvent) and event.tag is None and loader.resolve(
+                yaml.ScalarNode, event.value, event.implicit) == "tag:yaml.org,2002:null":
+            return  # "---" alone or "--- ~": an empty document
+        if not isinstance(event, yaml.SequenceStartEvent):
+            raise InventoryError(["YAML input must be a list of hosts"])
+        loader.get_event()
+        index = 0
+        while not loader.check_event(yaml.SequenceEndEvent):
+            # One item at a time; construct_document forgets it afterwards
+            yield loader.construct_document(loader.compose_node(None, index))
+            index += 1
+    except yaml.YAMLError as exc:
+        raise InventoryError([str(exc)]) from None
+    finally:
+        loader.dispose()
+
+
+def host_from_record(record: Any) -> HostConfig:
+    """Validate an exported record (``host`` required; ``hostname`` defaults
+    to it) and build its HostConfig. Raises ValueError.
+
+    A record with a ``placement`` is a wildcard block: it must name no host,
+    and has no HostName or User unless the record gives them.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("expected a mapping")
+    unknown = sorted(set(record) - set(FIELDS))
+    if unknown:
+        raise ValueError(f"unknown field(s) {', '.join(map(str, unknown))}")
+    host = record.get("host")
+    if not isinstance(host, str) or not host.strip():
+        raise ValueError("host is required")
+    port = record.get("port", 22)
+    if isinstance(port, bool) or not isinstance(port, int) or not 0 < port < 65536:
+        raise ValueError(f"invalid port {port!r}")
+    options = record.get("options") or []
+    if isinstance(options, dict):
+        options = [[k, v] for k, values in options.items()
+                   for v in (values if isinstance(values, list) else [values])]
+    if not isinstance(options, list) or not all(
+            isinstance(o, (list, tuple)) and len(o) == 2 and all(isinstance(x, str) for x in o)
+            for o in options):
+        raise ValueError("options must be [keyword, value] pairs")
+    patterns = record.get("patterns") or None
+    if patterns is not None and (
+            not isinstance(patterns, list)
+            or not all(isinstance(p, str) and p.split() == [p] for p in patterns)):
+        raise ValueError("patterns must be a list of Host patterns")
+    placement = record.get("placement")
+    if placement is not None and placement not in PLACEMENTS:
+        raise ValueError(f"placement must be one of {', '.join(PLACEMENTS)}")
+    hc = HostConfig(
+        host=host.strip(),
+        hostname=str(record.get("hostname") or ("" if placement else host)).strip(),
+        user=str(record.get("user") or ("" if placement else "root")),
+        port=port,
+        identity_file=record.get("identity_file") or None,
+        options=options,
+        patterns=patterns,
+    )
+    if placement is not None and not hc.is_pattern:
+        raise ValueError("placement is only for blocks of wildcard patterns")
+    return hc
+
+
+def content_hash(host: HostConfig) -> str:
+    return hashlib.sha256(host.serialize().encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ImportResult:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    removed: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "added": self.added,
+            "changed": self.changed,
+            "unchanged": self.unchanged,
+            "removed": self.removed,
+        }
+
+
+def import_hosts(
+    records: Iterable[Any],
+    config_d_dir: Path,
+    cache_dir: Optional[Path] = None,
+    prune: bool = False,
+    dry_run: bool = False,
+) -> ImportResult:
+    """Apply exported records to config.d in one transaction.
+
+    Records are matched to host files by alias, the first name on the
+    ``Host`` line. Existing hosts are hashed from the parse index (no file
+    reads for unchanged files) and only records whose serialized content
+    hash differs are written, back to the file they came from; new hosts
+    get a file name that is free in config.d (``<stem>-2`` and so on when
+    aliases sanitize alike, as on parse). With ``prune`` host files absent
+    from the input are removed. Every record is checked before anything is
+    committed; problems are collected into one :class:`InventoryError`.
+    ``dry_run`` reports what would change without writing.
+
+    Wildcard blocks (records with a ``placement``) replace the pattern file
+    of their placement as a whole, and are reported by that file's name.
+    A pattern file with no blocks in the input is kept, or removed with
+    ``prune``.
+    """
+    hashes: Dict[str, Optional[str]] = {}  # file name -> content hash
+    existing: Dict[str, str] = {}  # alias -> file name
+    for f in index.iter_host_files(config_d_dir, cache_dir):
+        hashes[f.name] = content_hash(f.host) if f.host is not None else None
+        if f.host is not None:
+            existing.setdefault(f.host.host, f.name)
+    names = NameRegistry.from_dir(config_d_dir)
+    result = ImportResult()
+    problems: List[str] = []
+    seen: Dict[str, int] = {}
+    kept: Set[str] = set()
+    blocks: Dict[str, List[HostConfig]] = {}
+    tx = store.ConfigDWriter(config_d_dir) if not dry_run else None
+    try:
+        for n, record in enumerate(records, 1):
+            try:
+                h = host_from_record(record)
+            except ValueError as exc:
+                name = record.get("host") if isinstance(record, dict) else None
+                problems.append(f"record {n}" + (f" ({name})" if name else "") + f": {exc}")
+                continue
+            if record.get("placement") is not None:
+                blocks.setdefault(record["placement"], []).append(h)
+                continue
+            if h.host in seen:
+                problems.append(f"record {n} ({h.host}): same host as record {seen[h.host]}")
+                continue
+            seen[h.host] = n
+            if problems:
+                continue  # keep validating, stop staging
+            name = existing.get(h.host)
+            if name is None:
+                name = names.assign(h.host) + ".conf"
+                result.added.append(h.host)
+            elif hashes[name] == content_hash(h):
+                kept.add(name)
+                result.unchanged += 1
+                continue
+            else:
+                result.changed.append(h.host)
+            kept.add(name)
+            if tx is not None:
+                tx.write(h, name=name)
+        if problems:
+            raise InventoryError(problems)
+        if prune:
+            for name in hashes:
+                if name not in kept:
+                    result.removed.append(name[: -len(".conf")])
+                    if tx is not None:
+                        tx.remove(name)
+        _import_patterns(blocks, config_d_dir, result, tx, prune)
+        if tx is not None:
+            tx.commit()
+    except BaseException:
+        if tx is not None:
+            tx.rollback()
+        raise
+    return result
+
+
+def _import_patterns(
+    blocks: Mapping[str, Sequence[HostConfig]],
+    config_d_dir: Path,
+    result: ImportResult,
+    tx: Optional[store.ConfigDWriter],
+    prune: bool,
+) -> None:
+    for placement, name in PLACEMENTS.items():
+        path = config_d_dir / name
+        if placement in blocks:
+            text = store.patterns_text(blocks[placement])
+            try:
+                old: Optional[str] = path.read_text(encoding="utf-8")
+            except FileNotFoundError:
+                old = None
+            if old == text:
+                result.unchanged += 1
+                continue
+            (result.added if old is None else result.changed).append(name)
+            if tx is not None:
+                tx.write_text(name, text)
+        elif prune and path.is_file():
+            result.removed.append(name)
+            if tx is not None:
+                tx.remove(name)
+
+
+__all__ = [
+    "FORMATS",
+    "PLACEMENTS",
+    "InventoryError",
+    "ImportResult",
+    "content_hash",
+    "export_hosts",
+    "format_for",
+    "host_from_record",
+    "import_hosts",
+    "iter_records",
+    "read_pattern_blocks",
+]
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from . import store
+from .model import HostConfig
+from .names import NameRegistry
+from .util import sanitize_filename
+
+
+KEY_TYPES = ("ed25519", "rsa")
+
+
+class KeyGenError(RuntimeError):
+    """Raised when a key or host cannot be created, or a key cannot be copied."""
+
+
+def key_paths(keys_dir: Path, alias: str, key_type: str) -> Tuple[Path, Path]:
+    """Private and public key path for ``alias`` (``<alias>_<type>[.pub]``)."""
+    name = f"{alias}_{key_type}"
+    return keys_dir / name, keys_dir / (name + ".pub")
+
+
+def keygen_command(priv: Path, key_type: str, comment: str) -> List[str]:
+    return ["ssh-keygen", "-t", key_type, "-f", str(priv), "-N", "", "-C", comment]
+
+
+def copy_id_command(user: str, hostname: str, pub: Optional[Path] = None,
+                    port: int = 22) -> List[str]:
+    cmd = ["ssh-copy-id"]
+    if pub is not None:
+        cmd += ["-i", str(pub)]
+    if port != 22:
+        cmd += ["-p", str(port)]
+    return cmd + [f"{user}@{hostname}"]
+
+
+def _prepare(keys_dir: Path, alias: str, key_type: str) -> Tuple[Path, Path]:
+    keys_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    priv, pub = key_paths(keys_dir, alias, key_type)
+    if priv.exists():
+        raise KeyGenError(f"Key {priv} already exists")
+    return priv, pub
+
+
+def _finish(priv: Path, pub: Path) -> None:
+    # Restrict permissions explicitly
+    priv.chmod(0o600)
+    if pub.exists():
+        pub.chmod(0o644)
+
+
+def _discard(priv: Path, pub: Path) -> None:
+    """Remove what a failed or cancelled ssh-keygen left behind."""
+    for p in (priv, pub):
+        p.unlink(missing_ok=True)
+
+
+def generate_key(keys_dir: Path, alias: str, key_type: str = "ed25519", comment: str = "",
+                 quiet: bool = False) -> Path:
+    """Run ssh-keygen for ``alias`` and return the private key path.
+
+    With ``quiet`` ssh-keygen's output is captured rather than shown.
+    """
+    priv, pub = _prepare(keys_dir, alias, key_type)
+    try:
+        subprocess.run(keygen_command(priv, key_type, comment), check=True,
+                       stdin=subprocess.DEVNULL, capture_output=quiet)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        _discard(priv, pub)
+        raise KeyGenError(f"ssh-keygen failed: {exc}") from exc
+    _finish(priv, pub)
+    return priv
+
+
+async def run_command(cmd: Sequence[str]) -> str:
+    """Run ``cmd`` without blocking the event loop and return its output.
+
+    The process gets no terminal (a new session, stdin from /dev/null) so it
+    can never prompt over a TUI. Cancelling the awaiting task kills it and
+    anything it started.
+    """
+    # Shielded so a cancel that lands while spawning still finds the process
+    spawn = asyncio.ensure_future(asyncio.create_subprocess_exec(
+        *cmd, stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT, start_new_session=True))
+    try:
+        proc = await asyncio.shield(spawn)
+        out, _ = await proc.communicate()
+    except OSError as exc:
+        raise KeyGenError(f"{cmd[0]}: {exc}") from exc
+    except asyncio.CancelledError:
+        try:
+            proc = await spawn
+        except OSError:
+            raise asyncio.CancelledError from None
+        if proc.returncode is None:
+            # The whole session: ssh-copy-id runs ssh as a child
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        await proc.communicate()  # reap it and close its pipes
+        raise
+    text = out.decode("utf-8", "replace").strip()
+    if proc.returncode != 0:
+        detail = text.splitlines()[-1] if text else "no output"
+        raise KeyGenError(f"{cmd[0]} exited with status {proc.returncode}: {detail}")
+    return text
+
+
+async def generate_key_async(keys_dir: Path, alias: str, key_type: str = "ed25519",
+                             comment: str = "") -> Path:
+    """:func:`generate_key` for an event loop; partial files are removed on
+    failure or cancellation."""
+    priv, pub = _prepare(keys_dir, alias, key_type)
+    try:
+        await run_command(keygen_command(priv, key_type, comment))
+    except BaseException:
+        _discard(priv, pub)
+        raise
+    _finish(priv, pub)
+    return priv
+
+
+def copy_id(user: str, hostname: str, pub: Optional[Path] = None, port: int = 22) -> None:
+    try:
+        subprocess.run(copy_id_command(user, hostname, pub, port), check=True)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        raise KeyGenError(f"ssh-copy-id failed: {exc}") from exc
+
+
+async def copy_id_async(user: str, hostname: str, pub: Optional[Path] = None,
+                        port: int = 22) -> None:
+    """ssh-copy-id in batch mode: it succeeds only where an existing key or
+    agent already grants access, since there is no terminal to prompt on."""
+    cmd = copy_id_command(user, hostname, pub, port)
+    await run_command(cmd[:1] + ["-o", "BatchMode=yes"] + cmd[1:])
+
+
+def plan_host(config_d_dir: Path, keys_dir: Path, host: str, hostname: Optional[str] = None,
+              user: str = "root", port: int = 22, key_type: str = "ed25519",
+              names: Optional[NameRegistry] = None) -> HostConfig:
+    """Host entry for a new host with its own key, checked against what exists.
+
+    The alias is sanitized the same way as the config.d file name. When
+    planning several hosts, pass one ``names`` registry of config.d (see
+    :meth:`NameRegistry.from_dir`): the alias is checked against it instead
+    of the filesystem and claimed once the host is planned. A taken alias
+    is reported with a free one to use instead.
+    """
+    alias = sanitize_filename(host)
+    priv, _ = key_paths(keys_dir, alias, key_type)
+    hc = HostConfig(host=alias, hostname=hostname or alias, user=user, port=port,
+                    identity_file=str(priv))
+    if names is not None:
+        exists = alias in names
+    else:
+        exists = (config_d_dir / store.host_filename(hc)).exists()
+    if exists:
+        registry = names if names is not None else NameRegistry.from_dir(config_d_dir)
+        owner = registry.owner(alias)
+        taken = f"is already planned for {owner}" if owner else "already exists"
+        raise KeyGenError(f"Host {alias} {taken}; {registry.suggest(alias)} is free")
+    if priv.exists():
+        raise KeyGenError(f"Key {priv} already exists")
+    if names is not None:
+        names.claim(alias, host)
+    return hc
+
+
+def create_host(config_d_dir: Path, keys_dir: Path, hc: HostConfig, key_type: str = "ed25519",
+                quiet: bool = False) -> Path:
+    """Generate the key planned by :func:`plan_host` and write the host file.
+
+    The main config is left for the caller to regenerate.
+    """
+    generate_key(keys_dir, hc.host, key_type, f"{hc.user}@{hc.hostname}", quiet=quiet)
+    return store.write_host_config(config_d_dir, hc)
+
+
+def create_hosts(
+    config_d_dir: Path,
+    keys_dir: Path,
+    planned: Sequence[Tuple[HostConfig, str]],
+    workers: Optional[int] = None,
+) -> List[Path]:
+    """Create many planned ``(host, key_type)`` pairs at once.
+
+    Keys are generated in parallel, ``workers`` ssh-keygen processes at a
+    time (default: one per CPU; the threads here only wait on them). The
+    host files are then written in a single config.d transaction. If any key
+    or the transaction fails, the keys made so far are removed and config.d
+    is left as it was. The main config is left for the caller to regenerate.
+    """
+    def make(item: Tuple[HostConfig, str]) -> Path:
+        hc, key_type = item
+        return generate_key(keys_dir, hc.host, key_type, f"{hc.user}@{hc.hostname}", quiet=True)
+
+    made: List[Path] = []
+    error: Optional[BaseException] = None
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = [pool.submit(make, item) for item in planned]
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            exc = future.exception()
+            if exc is None:
+                made.append(future.result())
+            elif error is None:
+                error = exc
+                for pending in futures:
+                    pending.cancel()
+    try:
+        if error is not None:
+            raise error
+        with store.ConfigDWriter(config_d_dir) as tx:
+            return [tx.write(hc) for hc, _ in planned]
+    except BaseException:
+        for priv in made:
+            _discard(priv, priv.with_name(priv.name + ".pub"))
+        raise
+
+
+async def create_host_async(config_d_dir: Path, keys_dir: Path, hc: HostConfig,
+                            key_type: str = "ed25519") -> Path:
+    await generate_key_async(keys_dir, hc.host, key_type, f"{hc.user}@{hc.hostname}")
+    return store.write_host_config(config_d_dir, hc)
+
+
+__all__ = [
+    "KEY_TYPES",
+    "KeyGenError",
+    "copy_id",
+    "copy_id_async",
+    "copy_id_command",
+    "create_host",
+    "create_host_async",
+    "create_hosts",
+    "generate_key",
+    "generate_key_async",
+    "key_paths",
+    "keygen_command",
+    "plan_host",
+    "run_command",
+]
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from . import index, settings, store, timing
+
+DEFAULTS_BLOCK = (
+    "##########\n# defaults\n##########\n"
+    "Host *\n"
+    "  ForwardX11 no\n"
+    "  Protocol 2\n"
+    "  TCPKeepAlive yes\n"
+    "  ServerAliveInterval 10\n"
+    "  Compression yes\n"
+)
+
+
+def render_main_config(single: bool = False, use_cache: bool = True) -> str:
+    """Compute the main ~/.ssh/config text without writing it."""
+    if single:
+        # Only the flattened form needs the host file contents
+        cache_dir = settings.cache_dir() if use_cache else None
+        fragments = index.read_fragments(settings.config_d_dir(), cache_dir)
+        hosts = [t.rstrip() + "\n" for t in fragments]
+        return "".join(hosts) + "\n" + DEFAULTS_BLOCK
+    include_lines = ["Include config.d/*.conf", "", DEFAULTS_BLOCK]
+    return "\n".join(include_lines)
+
+
+def regenerate_main_config(single: bool = False, use_cache: bool = True) -> str:
+    """Rebuild ~/.ssh/config; the file is only rewritten (atomically) when
+    its bytes change."""
+    with timing.span("rebuild"):
+        content = render_main_config(single, use_cache)
+        store.write_if_changed(settings.config_file(), content)
+    return content
+
+
+__all__ = [
+    "DEFAULTS_BLOCK",
+    "regenerate_main_config",
+    "render_main_config",
+]
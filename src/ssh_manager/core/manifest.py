@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import csv
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from . import keygen
+from .model import HostConfig
+from .names import NameRegistry
+from .util import sanitize_filename
+
+FIELDS = ("host", "hostname", "user", "port", "key_type")
+
+
+class ManifestError(ValueError):
+    """Raised for unreadable manifests; ``problems`` lists every bad entry."""
+
+    def __init__(self, problems: List[str]):
+        super().__init__("\n".join(problems))
+        self.problems = problems
+
+
+def read_manifest(path: Path) -> List[Dict[str, Any]]:
+    """Entries of a ``.csv`` (header row), ``.json`` or ``.yaml``/``.yml`` manifest.
+
+    JSON and YAML hold a list of mappings, or a mapping with a ``hosts`` list.
+    """
+    suffix = path.suffix.lower()
+    if suffix not in (".csv", ".json", ".yaml", ".yml"):
+        raise ManifestError([f"{path.name}: unsupported manifest type (use .csv, .json or .yaml)"])
+    try:
+        with open(path, encoding="utf-8", newline="") as fh:
+            if suffix == ".csv":
+                rows: Any = [
+                    {k.strip().lower(): v for k, v in row.items() if k is not None}
+                    for row in csv.DictReader(fh)
+                ]
+            elif suffix == ".json":
+                rows = json.load(fh)
+            else:
+                rows = yaml.safe_load(fh)
+    except (OSError, ValueError, yaml.YAMLError) as exc:
+        raise ManifestError([f"{path.name}: {exc}"]) from None
+    if isinstance(rows, dict):
+        rows = rows.get("hosts")
+    if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+        raise ManifestError([f"{path.name}: expected a list of host entries"])
+    return rows
+
+
+def plan_hosts(
+    entries: List[Dict[str, Any]],
+    config_d_dir: Path,
+    keys_dir: Path,
+    user: str = "root",
+    port: int = 22,
+    key_type: str = "ed25519",
+) -> List[Tuple[HostConfig, str]]:
+    """Validate every entry before anything is created and return
+    ``(host, key_type)`` pairs for :func:`keygen.create_hosts`.
+
+    ``user``, ``port`` and ``key_type`` fill in blank fields. Unknown fields,
+    bad values, aliases repeated in the manifest and hosts or keys that
+    already exist are all collected into one :class:`ManifestError`.
+    """
+    problems: List[str] = []
+    planned: List[Tuple[HostConfig, str]] = []
+    seen: Dict[str, int] = {}
+    # Existing hosts are listed once rather than checked per entry
+    names = NameRegistry.from_dir(config_d_dir)
+    for n, entry in enumerate(entries, 1):
+        values = {k: ("" if v is None else str(v).strip()) for k, v in entry.items()}
+        label = f"entry {n}" + (f" ({values['host']})" if values.get("host") else "")
+        unknown = sorted(set(values) - set(FIELDS))
+        if unknown:
+            problems.append(f"{label}: unknown field(s) {', '.join(unknown)}")
+            continue
+        if not values.get("host"):
+            problems.append(f"{label}: host is required")
+            continue
+        entry_port: Optional[int] = port
+        if values.get("port"):
+            try:
+                entry_port = int(values["port"])
+            except ValueError:
+                entry_port = None
+        if entry_port is None or not 0 < entry_port < 65536:
+            problems.append(f"{label}: invalid port {values['port']!r}")
+            continue
+        entry_key_type = values.get("key_type") or key_type
+        if entry_key_type not in keygen.KEY_TYPES:
+            problems.append(f"{label}: unsupported key_type {entry_key_type!r}")
+            continue
+        alias = sanitize_filename(values["host"])
+        if alias in seen:
+            problems.append(f"{label}: host {alias} already listed in entry {seen[alias]}")
+            continue
+        seen[alias] = n
+        try:
+            hc = keygen.plan_host(config_d_dir, keys_dir, values["host"],
+                                  values.get("hostname") or None, values.get("user") or user,
+                                  entry_port, entry_key_type, names)
+        except keygen.KeyGenError as exc:
+            problems.append(f"{label}: {exc}")
+            continue
+        planned.append((hc, entry_key_type))
+    if problems:
+        raise ManifestError(problems)
+    return planned
+
+
+__all__ = ["FIELDS", "ManifestError", "plan_hosts", "read_manifest"]
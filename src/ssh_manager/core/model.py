@@ -1,21 +1,138 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import List, Optional
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+
+# Either a ``keyword -> [values]`` mapping or ordered ``(keyword, value)`` pairs
+OptionsInput = Union[Mapping[str, Sequence[str]], Iterable[Sequence[str]]]
+
+# Option tuples are shared between hosts: most inventories repeat a handful of
+# option sets, so each distinct set is stored once. The table is bounded (the
+# oldest set is dropped when full) so unique option sets are not kept alive
+# after their hosts are gone.
+_OPTION_SETS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+_OPTION_SETS_MAX = 1024
+
+_WILDCARDS = frozenset("*?")
+
+
+def _intern_options(flat: Tuple[str, ...]) -> Tuple[str, ...]:
+    if not flat:
+        return ()
+    shared = _OPTION_SETS.get(flat)
+    if shared is not None:
+        return shared
+    if len(_OPTION_SETS) >= _OPTION_SETS_MAX:
+        del _OPTION_SETS[next(iter(_OPTION_SETS))]
+    _OPTION_SETS[flat] = flat
+    return flat
 
 
-@dataclass
 class HostConfig:
-    host: str
-    hostname: str
-    user: str = "root"
-    port: int = 22
-    identity_file: Optional[str] = None
-    extra_options: List[str] = field(default_factory=list)
+    """One ``Host`` block.
+
+    The well-known fields are attributes; every other option is exposed via
+    ``options``, an insertion-ordered ``keyword -> [values]`` mapping, so
+    repeated keywords (several ``IdentityFile`` or ``LocalForward`` lines)
+    are kept. Internally options are one flat ``(keyword, value, keyword,
+    value, ...)`` tuple in source order, keywords interned and identical
+    sets assigned through ``options`` shared, and the class uses
+    ``__slots__``, which keeps large inventories compact.
+
+    ``patterns`` holds everything on the ``Host`` line (aliases, wildcards
+    and ``!`` negations) and is what :meth:`serialize` writes there; ``host``
+    is the name the block is filed under, by default the first pattern.
+    """
+
+    __slots__ = ("host", "hostname", "user", "port", "identity_file", "_options", "lineno",
+                 "source", "patterns")
+
+    def __init__(
+        self,
+        host: str,
+        hostname: str,
+        user: str = "root",
+        port: int = 22,
+        identity_file: Optional[str] = None,
+        options: Optional[OptionsInput] = None,
+        lineno: Optional[int] = None,
+        source: Optional[str] = None,
+        patterns: Optional[Sequence[str]] = None,
+    ):
+        self.host = host
+        self.patterns: Tuple[str, ...] = (
+            tuple(patterns) if patterns else tuple(host.split()) or (host,)
+        )
+        self.hostname = hostname
+        self.user = user
+        self.port = port
+        self.identity_file = identity_file
+        self._options: Tuple[str, ...] = ()
+        # 1-based line of the ``Host`` keyword in the source file, when parsed
+        self.lineno = lineno
+        # File the block was read from, when parsed from a file
+        self.source = source
+        if options:
+            self.options = options
+
+    @property
+    def options(self) -> Dict[str, List[str]]:
+        """Ordered ``keyword -> [values]`` view; assign to replace all options."""
+        grouped: Dict[str, List[str]] = {}
+        for key, value in self._pairs():
+            grouped.setdefault(key, []).append(value)
+        return grouped
+
+    @options.setter
+    def options(self, options: OptionsInput) -> None:
+        if isinstance(options, Mapping):
+            pairs: Iterable[Sequence[str]] = (
+                (key, value) for key, values in options.items() for value in values
+            )
+        else:
+            pairs = options
+        flat: List[str] = []
+        for key, value in pairs:
+            flat += (sys.intern(key), value)
+        self._options = _intern_options(tuple(flat))
+
+    def _pairs(self) -> Iterator[Tuple[str, str]]:
+        it = iter(self._options)
+        return zip(it, it)
+
+    def add_option(self, key: str, value: str) -> None:
+        """Append ``value`` under ``key`` (keyword spelling is preserved).
+
+        The result is not shared with other hosts; to build many options,
+        collect them and assign ``options`` once.
+        """
+        self._options = self._options + (sys.intern(key), value)
+
+    def get_option(self, key: str) -> List[str]:
+        """All values for ``key`` (case-insensitive), in source order."""
+        lkey = key.lower()
+        return [value for k, value in self._pairs() if k.lower() == lkey]
+
+    @property
+    def aliases(self) -> List[str]:
+        """The literal names on the ``Host`` line: no wildcards or negations."""
+        return [p for p in self.patterns if not p.startswith("!") and not _WILDCARDS & set(p)]
+
+    @property
+    def is_pattern(self) -> bool:
+        """True for blocks such as ``Host *.corp`` that name no host of their own."""
+        return not self.aliases
+
+    @property
+    def extra_options(self) -> List[str]:
+        """Serialized ``  Keyword value`` lines, in source order."""
+        return [f"  {key} {value}" for key, value in self._pairs()]
 
     def serialize(self) -> str:
-        lines = [f"Host {self.host}"]
-        lines.append(f"  HostName {self.hostname}")
+        lines = [f"Host {' '.join(self.patterns)}"]
+        if self.hostname:
+            lines.append(f"  HostName {self.hostname}")
         if self.user:
             lines.append(f"  User {self.user}")
         if self.port and self.port != 22:
@@ -24,3 +141,49 @@ class HostConfig:
             lines.append(f"  IdentityFile {self.identity_file}")
         lines.extend(self.extra_options)
         return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-data form; ``options`` is a list of ``[keyword, value]`` pairs
+        so interleaved repeated keywords keep their order. ``patterns`` is
+        only included when the ``Host`` line is more than ``host`` itself."""
+        data: Dict[str, Any] = {
+            "host": self.host,
+            "hostname": self.hostname,
+            "user": self.user,
+            "port": self.port,
+            "identity_file": self.identity_file,
+            "options": [list(pair) for pair in self._pairs()],
+        }
+        if self.patterns != (self.host,):
+            data["patterns"] = list(self.patterns)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "HostConfig":
+        return cls(
+            host=data["host"],
+            hostname=data["hostname"],
+            user=data.get("user", "root"),
+            port=data.get("port", 22),
+            identity_file=data.get("identity_file"),
+            options=data.get("options"),
+            patterns=data.get("patterns"),
+        )
+
+    def _key(self) -> tuple:
+        return (self.host, self.patterns, self.hostname, self.user, self.port,
+                self.identity_file, self._options)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, HostConfig):
+            return NotImplemented
+        return self._key() == other._key()
+
+    __hash__ = None  # type: ignore[assignment]  # mutable, like the former dataclass
+
+    def __repr__(self) -> str:
+        return (
+            f"HostConfig(host={self.host!r}, patterns={self.patterns!r}, "
+            f"hostname={self.hostname!r}, user={self.user!r}, "
+            f"port={self.port!r}, identity_file={self.identity_file!r}, options={self.options!r})"
+        )
@@ -0,0 +1,106 @@
+"""Collision-free config.d file names.
+
+Host files are named after the sanitized alias, and different aliases can
+sanitize to the same stem (``web!1`` and ``web-1`` both give ``web-1``).
+A :class:`NameRegistry` remembers every stem handed out in a run, so a
+clash is found with a dict lookup instead of a scan of config.d.
+:meth:`NameRegistry.assign` gives the later host ``<stem>-2``, ``-3``, ...
+in input order, so the same input always yields the same names.
+
+Stems are compared case-insensitively: ssh matches ``Host`` patterns
+without regard to case, and so do some filesystems.
+
+Blocks that name no host (``Host *.corp``) are kept in their original
+order in two shared files. ssh reads config.d in name order, so a pattern
+block can only come before every host file or after all of them: those
+that preceded the hosts they match go in :data:`LEADING_PATTERNS_FILE`
+(``+`` sorts before any sanitized alias), the rest in
+:data:`PATTERNS_FILE` (``~`` sorts after every alias). Neither character
+survives sanitizing, so no host can take these names.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .util import sanitize_filename
+
+LEADING_PATTERNS_FILE = "+patterns.conf"
+PATTERNS_FILE = "~patterns.conf"
+PATTERN_FILES = frozenset({LEADING_PATTERNS_FILE, PATTERNS_FILE})
+
+
+class NameRegistry:
+    def __init__(self, taken: Iterable[str] = ()):
+        # casefolded stem -> who holds it (None for files already on disk)
+        self._owners: Dict[str, Optional[str]] = {}
+        # casefolded stem -> next suffix to try, so repeated clashes stay O(1)
+        self._next: Dict[str, int] = {}
+        # (label, stem) for every assign(), in order
+        self.assigned: List[Tuple[str, str]] = []
+        # the subset of ``assigned`` that did not get its own stem
+        self.renamed: List[Tuple[str, str]] = []
+        for stem in taken:
+            self._owners.setdefault(stem.lower(), None)
+
+    @classmethod
+    def from_files(cls, names: Iterable[str]) -> "NameRegistry":
+        """Registry holding the stems of the given ``*.conf`` file names."""
+        return cls(n[: -len(".conf")] for n in names if n.endswith(".conf"))
+
+    @classmethod
+    def from_dir(cls, config_d_dir: Path) -> "NameRegistry":
+        """Registry holding every host file in ``config_d_dir`` (one scandir)."""
+        try:
+            with os.scandir(config_d_dir) as it:
+                return cls.from_files([e.name for e in it])
+        except FileNotFoundError:
+            return cls()
+
+    def __contains__(self, alias: str) -> bool:
+        return sanitize_filename(alias).lower() in self._owners
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def owner(self, alias: str) -> Optional[str]:
+        """Label of whoever took ``alias``'s stem in this run (None if free
+        or taken by a file already on disk)."""
+        return self._owners.get(sanitize_filename(alias).lower())
+
+    def claim(self, stem: str, label: Optional[str] = None) -> None:
+        """Mark ``stem`` as taken, e.g. once a new host has been planned."""
+        self._owners.setdefault(stem.lower(), label or stem)
+
+    def suggest(self, alias: str) -> str:
+        """The stem :meth:`assign` would give ``alias``, without taking it."""
+        stem = sanitize_filename(alias)
+        key = stem.lower()
+        if key not in self._owners:
+            return stem
+        n = self._next.get(key, 2)
+        while f"{key}-{n}" in self._owners:
+            n += 1
+        return f"{stem}-{n}"
+
+    def assign(self, alias: str, label: Optional[str] = None) -> str:
+        """Take a free stem for ``alias``: its sanitized form, or the first
+        free ``<stem>-N`` when that is taken. ``label`` (default ``alias``)
+        is what :attr:`assigned` and :attr:`renamed` report it as."""
+        label = label or alias
+        stem = sanitize_filename(alias)
+        key = stem.lower()
+        if key in self._owners:
+            n = self._next.get(key, 2)
+            while f"{key}-{n}" in self._owners:
+                n += 1
+            self._next[key] = n + 1
+            stem = f"{stem}-{n}"
+            self.renamed.append((label, stem))
+        self._owners[stem.lower()] = label
+        self.assigned.append((label, stem))
+        return stem
+
+
+__all__ = ["LEADING_PATTERNS_FILE", "PATTERNS_FILE", "PATTERN_FILES", "NameRegistry"]
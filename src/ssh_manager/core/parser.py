@@ -1,53 +1,257 @@
 from __future__ import annotations
 
-import re
-from typing import List
+import glob
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
+from . import timing
 from .model import HostConfig
 
-HOST_RE = re.compile(r"^Host\s+(?P<host>.+)$", re.IGNORECASE)
-INDENTED_RE = re.compile(r"^\s+(?P<key>[A-Za-z][A-Za-z0-9]*)\s+(?P<value>.+)$")
+# Keywords that open a new block. ``Match`` blocks are not modelled yet; their
+# options are consumed so they do not leak into the preceding Host block.
+_BLOCK_KEYWORDS = frozenset({"host", "match"})
 
+# OpenSSH refuses Includes nested deeper than this
+MAX_INCLUDE_DEPTH = 16
 
-def parse_ssh_config(text: str) -> List[HostConfig]:
-    hosts: List[HostConfig] = []
-    current: HostConfig | None = None
-    for line in text.splitlines():
-        if not line.strip() or line.strip().startswith('#'):
-            continue
-        m = HOST_RE.match(line)
-        if m:
+# ``(source file, line number, keyword, value)``; source is "" for text
+# that did not come from a file
+Token = Tuple[str, int, str, str]
+
+
+def tokenize_line(line: str) -> Optional[Tuple[str, str]]:
+    """Split a config line into ``(keyword, value)``.
+
+    Returns None for blank lines and comments. Both ``Keyword value`` and
+    ``Keyword=value`` forms are accepted; the keyword is returned as written.
+    """
+    stripped = line.strip()
+    if not stripped or stripped[0] == '#':
+        return None
+    parts = stripped.split(None, 1)
+    key = parts[0]
+    value = parts[1] if len(parts) > 1 else ""
+    if '=' in key:
+        key, _, rest = key.partition('=')
+        value = (rest + " " + value).strip() if value else rest.strip()
+    elif value.startswith('='):
+        value = value[1:].lstrip()
+    return key, value
+
+
+class IncludeError(ValueError):
+    """Raised for Include cycles, Includes nested too deeply and included
+    files that cannot be read."""
+
+
+def _tokenize(lines: Iterable[str]) -> Iterator[Tuple[int, str, str]]:
+    for lineno, line in enumerate(lines, 1):
+        token = tokenize_line(line)
+        if token is not None:
+            yield lineno, token[0], token[1]
+
+
+class IncludeExpander:
+    """Expands ``Include`` directives as a config is tokenized.
+
+    Relative patterns are taken from ``base_dir`` (``~/.ssh`` for a user
+    config) and globbed the way ssh does: matches in sorted order, none at
+    all is not an error. Included files are read and tokenized once and
+    each glob is evaluated once per expander, however many places include
+    them, so keep one expander for a whole run. The top-level file is
+    streamed, not kept. An Include inside a ``Host`` block splices the
+    file in at that point, as ssh does.
+    """
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = base_dir
+        self.reads = 0
+        self.globs = 0
+        self._files: Dict[str, List[Tuple[int, str, str]]] = {}
+        self._matches: Dict[str, List[str]] = {}
+
+    def tokens(self, lines: Iterable[str], source: str = "") -> Iterator[Token]:
+        """Tokens of ``lines`` (read from ``source``, if any) with every
+        Include replaced by the tokens of the files it names."""
+        stack = (os.path.abspath(source),) if source else ()
+        return self._expand(_tokenize(lines), source, stack)
+
+    def _expand(self, tokens: Iterable[Tuple[int, str, str]], source: str,
+                stack: Tuple[str, ...]) -> Iterator[Token]:
+        for lineno, key, val in tokens:
+            if key.lower() != "include":
+                yield source, lineno, key, val
+                continue
+            if len(stack) >= MAX_INCLUDE_DEPTH:
+                raise IncludeError(
+                    f"{source}:{lineno}: Includes nested more than {MAX_INCLUDE_DEPTH} deep"
+                )
+            for pattern in val.split():
+                for path in self._glob(pattern):
+                    if path in stack:
+                        chain = " -> ".join(stack[stack.index(path):] + (path,))
+                        raise IncludeError(f"{source}:{lineno}: Include cycle: {chain}")
+                    yield from self._expand(self._file(path), path, stack + (path,))
+
+    def _glob(self, pattern: str) -> List[str]:
+        full = os.path.join(self.base_dir, os.path.expanduser(pattern))
+        matches = self._matches.get(full)
+        if matches is None:
+            self.globs += 1
+            matches = sorted(os.path.abspath(m) for m in glob.glob(full) if os.path.isfile(m))
+            self._matches[full] = matches
+        return matches
+
+    def _file(self, path: str) -> List[Tuple[int, str, str]]:
+        tokens = self._files.get(path)
+        if tokens is None:
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    tokens = list(_tokenize(fh))
+            except (OSError, UnicodeDecodeError) as exc:
+                raise IncludeError(f"{path}: {exc}") from None
+            self.reads += 1
+            timing.add(1)
+            self._files[path] = tokens
+        return tokens
+
+
+def _token_stream(fileobj: Iterable[str], includes: Optional[IncludeExpander],
+                  source: str) -> Iterator[Token]:
+    if includes is not None:
+        return includes.tokens(fileobj, source)
+    return ((source, lineno, key, val) for lineno, key, val in _tokenize(fileobj))
+
+
+def iter_host_blocks(fileobj: Iterable[str], includes: Optional[IncludeExpander] = None,
+                     source: str = "") -> Iterator[HostConfig]:
+    """Yield HostConfig objects one at a time from an iterable of lines.
+
+    ``fileobj`` may be an open text file, so arbitrarily large configs are
+    parsed in constant memory. Each HostConfig records the 1-based line
+    number of its ``Host`` line in ``lineno`` and the file it is in (for
+    hosts from included files, or ``source`` itself) in ``source``, and
+    every pattern of the ``Host`` line in ``patterns``. ``Include`` lines
+    are expanded only when ``includes`` is given; otherwise they are kept
+    as ordinary options.
+    """
+    current: Optional[HostConfig] = None
+    # Options of ``current``, assigned once the block ends so only the
+    # finished set is interned
+    extra: List[Tuple[str, str]] = []
+    in_match = False
+    options_only = False
+    for path, lineno, key, val in _token_stream(fileobj, includes, source):
+        lkey = key.lower()
+        if lkey in _BLOCK_KEYWORDS:
             if current:
-                hosts.append(current)
-            # Pick only the first alias if multiple are specified
-            raw_host_field = m.group('host').strip()
-            first_alias = raw_host_field.split()[0]
-            current = HostConfig(host=first_alias, hostname=first_alias)
+                current.options = extra
+                yield current
+                current = None
+                extra = []
+            in_match = lkey == "match"
+            if in_match or not val:
+                continue
+            patterns = tuple(val.split())
+            current = HostConfig(host=patterns[0], hostname=patterns[0], lineno=lineno,
+                                 source=path or None, patterns=patterns)
+            # A block mixing patterns and names is named after its first name
+            current.host = next(iter(current.aliases), patterns[0])
+            # Pattern blocks (``Host *.corp``) keep every line as an option so
+            # they are written back unchanged. A HostName is only assumed for
+            # a block that names a single host.
+            options_only = current.is_pattern
+            if options_only:
+                current.user = ""
+            if len(patterns) > 1 or options_only:
+                current.hostname = ""
             continue
-        m2 = INDENTED_RE.match(line)
-        if m2 and current:
-            key = m2.group('key').lower()
-            val = m2.group('value').strip()
-            if key == 'hostname':
-                current.hostname = val
-            elif key == 'user':
-                current.user = val
-            elif key == 'port':
-                try:
-                    current.port = int(val)
-                except ValueError:
-                    pass
-            elif key == 'identityfile':
-                current.identity_file = val
-            else:
-                current.extra_options.append(line)
+        if current is None or in_match:
+            continue
+        if options_only:
+            extra.append((key, val))
+        elif lkey == 'hostname':
+            current.hostname = val
+        elif lkey == 'user':
+            current.user = sys.intern(val)
+        elif lkey == 'port':
+            try:
+                current.port = int(val)
+            except ValueError:
+                pass
+        elif lkey == 'identityfile' and current.identity_file is None:
+            current.identity_file = val
+        else:
+            # Additional IdentityFile lines are kept as repeated options
+            extra.append((key, val))
     if current:
-        hosts.append(current)
-    return hosts
+        current.options = extra
+        yield current
+
+
+@dataclass(frozen=True)
+class Block:
+    """A ``Host`` block as ssh sees it: every pattern on the ``Host`` line
+    and its options in source order, keywords as written."""
+
+    patterns: Tuple[str, ...]  # empty for options before the first Host line
+    options: Tuple[Tuple[str, str], ...]
+    lineno: int
+    source: str = ""  # file of the Host line
+    # ``(file, line)`` of each option, parallel to ``options``
+    origins: Tuple[Tuple[str, int], ...] = ()
+
+
+def iter_blocks(fileobj: Iterable[str], includes: Optional[IncludeExpander] = None,
+                source: str = "") -> Iterator[Block]:
+    """Yield every block of a config without modelling it as a HostConfig.
+
+    Unlike :func:`iter_host_blocks` all aliases and wildcard patterns are
+    kept, and options that precede the first ``Host`` line come out as a
+    block with no patterns (they apply to every host). ``Match`` blocks and
+    empty ``Host`` lines are skipped with their options. Includes are
+    expanded as in :func:`iter_host_blocks`.
+    """
+    patterns: Optional[Tuple[str, ...]] = ()
+    options: List[Tuple[str, str]] = []
+    origins: List[Tuple[str, int]] = []
+    start, start_source = 0, source
+    for path, lineno, key, val in _token_stream(fileobj, includes, source):
+        lkey = key.lower()
+        if lkey in _BLOCK_KEYWORDS:
+            if patterns is not None and (patterns or options):
+                yield Block(patterns, tuple(options), start, start_source, tuple(origins))
+            patterns = tuple(val.split()) if lkey == "host" and val else None
+            options, origins = [], []
+            start, start_source = lineno, path
+            continue
+        if patterns is not None:
+            options.append((key, val))
+            origins.append((path, lineno))
+    if patterns is not None and (patterns or options):
+        yield Block(patterns, tuple(options), start, start_source, tuple(origins))
+
+
+def _iter_lines(text: str) -> Iterator[str]:
+    """The lines of ``text`` one at a time, without building a list of them
+    (a trailing ``\r`` is left for the tokenizer to strip)."""
+    start, end = 0, len(text)
+    while start < end:
+        stop = text.find("\n", start)
+        if stop < 0:
+            stop = end
+        yield text[start:stop]
+        start = stop + 1
+
+
+def parse_ssh_config(text: str, includes: Optional[IncludeExpander] = None) -> List[HostConfig]:
+    return list(iter_host_blocks(_iter_lines(text), includes))
 
 
 def parse_host_file(text: str) -> HostConfig:
-    hosts = parse_ssh_config(text)
-    if not hosts:
-        raise ValueError("No host block found")
-    return hosts[0]
+    for host in iter_host_blocks(text.splitlines()):
+        return host
+    raise ValueError("No host block found")
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .model import HostConfig
+
+PROBES_NAME = "probes.json"
+PROBES_VERSION = 1
+
+# Result statuses
+REACHABLE = "reachable"
+UNREACHABLE = "unreachable"
+SKIPPED = "skipped"  # only reachable through a proxy; not probed
+
+PERCENTILES = (50, 90, 99)
+
+# Hosts with these options are not reached by a direct TCP connect
+_PROXY_OPTIONS = ("ProxyJump", "ProxyCommand")
+
+
+@dataclass(frozen=True)
+class Target:
+    alias: str
+    hostname: str
+    port: int = 22
+
+    @classmethod
+    def from_host(cls, h: HostConfig) -> "Target":
+        return cls(h.host, h.hostname or h.host, h.port)
+
+
+@dataclass
+class ProbeResult:
+    alias: str
+    hostname: str
+    port: int
+    status: str
+    samples: List[float] = field(default_factory=list)  # connect times in seconds
+    banner: Optional[str] = None
+    error: Optional[str] = None
+    checked_at: float = 0.0  # time.time() when the probe finished
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Median connect time, or None when no connect succeeded."""
+        return percentile(sorted(self.samples), 50) if self.samples else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+        return {
+            "host": self.alias,
+            "hostname": self.hostname,
+            "port": self.port,
+            "status": self.status,
+            "samples_ms": [_ms(s) for s in self.samples],
+            "latency_ms": (
+                {f"p{p}": _ms(percentile(ordered, p)) for p in PERCENTILES} if ordered else None
+            ),
+            "banner": self.banner,
+            "error": self.error,
+            "checked_at": round(self.checked_at, 3),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProbeResult":
+        return cls(
+            data["host"], data["hostname"], int(data["port"]), data["status"],
+            [s / 1000.0 for s in data.get("samples_ms") or []],
+            data.get("banner"), data.get("error"), float(data.get("checked_at") or 0.0),
+        )
+
+
+@dataclass
+class ProbeReport:
+    results: List[ProbeResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def count(self, status: str) -> int:
+        return sum(1 for r in self.results if r.status == status)
+
+    @property
+    def ok(self) -> bool:
+        return self.count(UNREACHABLE) == 0
+
+    def latency_percentiles(self) -> Optional[Dict[str, float]]:
+        """Percentiles (in ms) over every successful connect of every host."""
+        samples = sorted(s for r in self.results for s in r.samples)
+        if not samples:
+            return None
+        return {f"p{p}": _ms(percentile(samples, p)) for p in PERCENTILES}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "reachable": self.count(REACHABLE),
+            "unreachable": self.count(UNREACHABLE),
+            "skipped": self.count(SKIPPED),
+            "latency_ms": self.latency_percentiles(),
+            "elapsed": round(self.elapsed, 3),
+            "results": [r.to_dict() for r in self.results],
+        }
+
+
+def percentile(ordered: Sequence[float], p: float) -> float:
+    """``p``-th percentile of already sorted values, interpolating linearly
+    between the closest ranks."""
+    if not ordered:
+        raise ValueError("percentile of no values")
+    k = (len(ordered) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000.0, 2)
+
+
+def proxied(h: HostConfig) -> Optional[str]:
+    """The proxy option that makes ``h`` unreachable by a direct connect, if any."""
+    for key in _PROXY_OPTIONS:
+        values = h.get_option(key)
+        if values and values[0].lower() != "none":
+            return key
+    return None
+
+
+async def _connect_once(target: Target, timeout: float,
+                        banner: bool) -> "tuple[float, Optional[str]]":
+    t0 = time.perf_counter()
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(target.hostname, target.port), timeout)
+    elapsed = time.perf_counter() - t0
+    try:
+        line: Optional[str] = None
+        if banner:
+            # The server speaks first; the identification line ends the wait
+            try:
+                raw = await asyncio.wait_for(reader.readline(), max(timeout - elapsed, 0.001))
+            except (asyncio.TimeoutError, OSError):
+                raw = b""
+            line = raw.decode("utf-8", "replace").strip() or None
+        return elapsed, line
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+
+async def probe_host(target: Target, timeout: float = 3.0, count: int = 1,
+                     banner: bool = False) -> ProbeResult:
+    """Connect to ``target`` up to ``count`` times, one after another.
+
+    The first failed connect ends the probe; a host counts as reachable when
+    its first connect succeeds. With ``banner`` the SSH identification line
+    is read on the first connect; a server that stays silent is reported in
+    ``error`` but still counts as reachable.
+    """
+    result = ProbeResult(target.alias, target.hostname, target.port, UNREACHABLE)
+    for n in range(max(1, count)):
+        try:
+            elapsed, line = await _connect_once(target, timeout, banner and n == 0)
+        except asyncio.TimeoutError:
+            result.error = "timed out"
+            break
+        except OSError as exc:
+            result.error = exc.strerror or str(exc) or type(exc).__name__
+            break
+        result.status = REACHABLE
+        result.samples.append(elapsed)
+        if banner and n == 0:
+            result.banner = line
+            if line is None or not line.startswith("SSH-"):
+                result.error = ("no SSH banner" if line is None
+                                else f"unexpected banner {line[:60]!r}")
+    result.checked_at = time.time()
+    return result
+
+
+async def probe_all(
+    targets: Sequence[Target],
+    concurrency: int = 200,
+    timeout: float = 3.0,
+    count: int = 1,
+    banner: bool = False,
+) -> List[ProbeResult]:
+    """Probe every target with at most ``concurrency`` connections open;
+    results come back in target order."""
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(target: Target) -> ProbeResult:
+        async with slots:
+            return await probe_host(target, timeout, count, banner)
+
+    return list(await asyncio.gather(*(one(t) for t in targets)))
+
+
+def probe_hosts(
+    hosts: Iterable[HostConfig],
+    concurrency: int = 200,
+    timeout: float = 3.0,
+    count: int = 1,
+    banner: bool = False,
+) -> ProbeReport:
+    """Probe configured hosts from synchronous code; hosts behind a
+    ProxyJump or ProxyCommand are reported as skipped."""
+    t0 = time.monotonic()
+    targets: List[Target] = []
+    results: Dict[int, ProbeResult] = {}
+    for n, h in enumerate(hosts):
+        via = proxied(h)
+        if via is None:
+            targets.append(Target.from_host(h))
+        else:
+            results[n] = ProbeResult(h.host, h.hostname or h.host, h.port, SKIPPED,
+                                     error=f"reached through {via}", checked_at=time.time())
+    probed = iter(asyncio.run(probe_all(targets, concurrency, timeout, count, banner))
+                  if targets else [])
+    total = len(targets) + len(results)
+    ordered = [results[n] if n in results else next(probed) for n in range(total)]
+    return ProbeReport(ordered, time.monotonic() - t0)
+
+
+def describe(result: ProbeResult, now: Optional[float] = None) -> str:
+    """One-line summary such as ``reachable, 12.3 ms (5m ago)``."""
+    text = result.status
+    if result.latency is not None:
+        text += f", {result.latency * 1000:.1f} ms"
+    elif result.error:
+        text += f": {result.error}"
+    age = max(0.0, (time.time() if now is None else now) - result.checked_at)
+    if age < 60:
+        when = "just now"
+    elif age < 3600:
+        when = f"{int(age // 60)}m ago"
+    elif age < 86400:
+        when = f"{int(age // 3600)}h ago"
+    else:
+        when = f"{int(age // 86400)}d ago"
+    return f"{text} ({when})"
+
+
+class ProbeCache:
+    """Last probe result per host alias, kept in the cache directory so the
+    TUI can show reachability without probing.
+
+    An entry only answers for the HostName and Port it was taken with.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.path = cache_dir / PROBES_NAME
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+
+    def load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == PROBES_VERSION:
+            self.entries = data.get("entries", {})
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        payload = {"version": PROBES_VERSION, "entries": self.entries}
+        tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(self.path)
+        self._dirty = False
+
+    def get(self, h: HostConfig) -> Optional[ProbeResult]:
+        data = self.entries.get(h.host)
+        if not data or data.get("hostname") != (h.hostname or h.host) or data.get("port") != h.port:
+            return None
+        try:
+            return ProbeResult.from_dict(data)
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def put(self, results: Iterable[ProbeResult]) -> None:
+        for r in results:
+            self.entries[r.alias] = r.to_dict()
+            self._dirty = True
+
+
+__all__ = [
+    "PERCENTILES",
+    "PROBES_NAME",
+    "REACHABLE",
+    "SKIPPED",
+    "UNREACHABLE",
+    "ProbeCache",
+    "ProbeReport",
+    "ProbeResult",
+    "Target",
+    "describe",
+    "percentile",
+    "probe_all",
+    "probe_host",
+    "probe_hosts",
+    "proxied",
+]
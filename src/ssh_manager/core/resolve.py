@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from . import index
+from .parser import Block, iter_blocks
+
+# Keywords ssh accumulates across blocks instead of keeping the first value
+MULTI_VALUED = frozenset({
+    "certificatefile",
+    "dynamicforward",
+    "identityfile",
+    "localforward",
+    "remoteforward",
+    "sendenv",
+})
+
+_WILDCARDS = frozenset("*?")
+
+
+def compile_pattern(pattern: str) -> Callable[[str], bool]:
+    """Matcher for one lowercased ``Host`` pattern (``*`` and ``?`` only,
+    as in ssh; every other character is literal)."""
+    if not _WILDCARDS & set(pattern):
+        return pattern.__eq__
+    regex = "".join(".*" if c == "*" else "." if c == "?" else re.escape(c) for c in pattern)
+    return re.compile(regex, re.DOTALL).fullmatch  # type: ignore[return-value]
+
+
+class Resolver:
+    """Answers "which options does ssh apply to this host" with OpenSSH
+    semantics: blocks are tried in order, a block applies when one of its
+    patterns matches and none of its ``!`` patterns does, the first value
+    found for a keyword wins (``MULTI_VALUED`` keywords accumulate), and
+    matching is case-insensitive.
+
+    Patterns are indexed once: literal aliases go in a hash table, ``*``
+    blocks are always candidates, and the other wildcard patterns are
+    compiled and bucketed by their last literal character, so resolving a
+    host only runs the few matchers that could apply to it.
+    """
+
+    def __init__(self, blocks: Iterable[Block]):
+        self.blocks: List[Block] = list(blocks)
+        self._literal: Dict[str, List[int]] = {}
+        self._always: List[int] = []
+        # Last character -> (matcher, block); "" for patterns ending in a wildcard
+        self._wild: Dict[str, List[Tuple[Callable[[str], bool], int]]] = {}
+        self._negated: Dict[int, List[Callable[[str], bool]]] = {}
+        for n, block in enumerate(self.blocks):
+            if not block.patterns:
+                self._always.append(n)
+            for raw in block.patterns:
+                pattern = raw.lower()
+                if pattern.startswith("!"):
+                    self._negated.setdefault(n, []).append(compile_pattern(pattern[1:]))
+                elif pattern == "*":
+                    self._always.append(n)
+                elif not _WILDCARDS & set(pattern):
+                    self._literal.setdefault(pattern, []).append(n)
+                else:
+                    tail = "" if pattern[-1] in _WILDCARDS else pattern[-1]
+                    self._wild.setdefault(tail, []).append((compile_pattern(pattern), n))
+
+    def aliases(self) -> List[str]:
+        """Every literal alias on a ``Host`` line, in config order."""
+        seen: Dict[str, None] = {}
+        for block in self.blocks:
+            for pattern in block.patterns:
+                if not pattern.startswith("!") and not _WILDCARDS & set(pattern):
+                    seen.setdefault(pattern, None)
+        return list(seen)
+
+    def matching_blocks(self, alias: str) -> List[int]:
+        """Indexes of the blocks that apply to ``alias``, in config order."""
+        name = alias.lower()
+        found: Set[int] = set(self._always)
+        found.update(self._literal.get(name, ()))
+        for bucket in (name[-1:], ""):
+            for match, n in self._wild.get(bucket, ()):
+                if match(name):
+                    found.add(n)
+        return sorted(n for n in found if not any(m(name) for m in self._negated.get(n, ())))
+
+    def resolve(self, alias: str) -> Dict[str, List[str]]:
+        """Effective options for ``alias`` as ``keyword -> [values]`` with
+        lowercased keywords, in the order ssh would first set them.
+
+        ``host`` is the alias itself; ``hostname`` (with ``%h`` expanded)
+        and ``port`` get ssh's defaults when no block sets them.
+        """
+        options: Dict[str, List[str]] = {"host": [alias]}
+        for n in self.matching_blocks(alias):
+            for key, value in self.blocks[n].options:
+                lkey = key.lower()
+                if lkey in MULTI_VALUED:
+                    options.setdefault(lkey, []).append(value)
+                elif lkey not in options:
+                    options[lkey] = [value]
+        hostname = options.get("hostname", [alias])[0]
+        if "%" in hostname:
+            hostname = hostname.replace("%h", alias).replace("%%", "%")
+        options["hostname"] = [hostname]
+        options.setdefault("port", ["22"])
+        return options
+
+    def resolve_all(self) -> Iterator[Tuple[str, Dict[str, List[str]]]]:
+        for alias in self.aliases():
+            yield alias, self.resolve(alias)
+
+
+def managed_blocks(config_d_dir: Path, cache_dir: Optional[Path], defaults: str) -> Iterator[Block]:
+    """Blocks of the generated ``~/.ssh/config`` in the order ssh reads them:
+    every ``config.d/*.conf`` file by name, then the ``defaults`` text."""
+    for text in index.read_fragments(config_d_dir, cache_dir):
+        yield from iter_blocks(text.splitlines())
+    yield from iter_blocks(defaults.splitlines())
+
+
+def to_json(options: Dict[str, List[str]]) -> Dict[str, object]:
+    """Plain-data form: single values as strings, ``MULTI_VALUED`` keywords as lists."""
+    return {k: (v if k in MULTI_VALUED else v[0]) for k, v in options.items()}
+
+
+__all__ = [
+    "MULTI_VALUED",
+    "Resolver",
+    "compile_pattern",
+    "managed_blocks",
+    "to_json",
+]
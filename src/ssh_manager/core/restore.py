@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import tarfile
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import ContextManager, Dict, Iterable, List, Optional, Set
+
+from . import backup, parser, store
+from .backup import ManifestEntry
+from .util import sanitize_filename
+
+# Change kinds reported by diff_snapshot
+ADDED = "added"  # in the snapshot, missing live
+MODIFIED = "modified"  # content differs
+MODE = "mode"  # same content, different permissions
+
+
+@dataclass
+class Change:
+    entry: ManifestEntry
+    kind: str
+
+
+class SnapshotSource:
+    """Read access to any snapshot layout.
+
+    Handles deduplicated snapshots (manifest + object store), archive
+    snapshots (embedded manifest) and plain full-copy directories written by
+    older versions, for which hashes are computed only when needed.
+    """
+
+    def __init__(self, snapshot: Path, backup_dir: Optional[Path] = None):
+        self.snapshot = snapshot
+        self.backup_dir = backup_dir or snapshot.parent
+        self.kind = "archive" if backup.is_archive(snapshot) else "dir"
+        self._entries: Optional[List[ManifestEntry]] = None
+        if self.kind == "dir":
+            manifest = backup.load_manifest(snapshot)
+            if manifest is not None:
+                self.kind = "manifest"
+                self._entries = manifest
+
+    def entries(self) -> List[ManifestEntry]:
+        if self._entries is None:
+            if self.kind == "archive":
+                self._entries = self._archive_manifest()
+            else:
+                # Legacy copy: sha256 left empty and computed on demand
+                self._entries = [
+                    ManifestEntry(rel, "", st.st_size, st.st_mtime_ns, st.st_mode & 0o7777)
+                    for rel, st in backup.iter_snapshot_files(self.snapshot)
+                ]
+        return self._entries
+
+    def read_many(self, paths: Iterable[str]) -> Dict[str, bytes]:
+        wanted = set(paths)
+        if not wanted:
+            return {}
+        if self.kind == "archive":
+            out: Dict[str, bytes] = {}
+            with tarfile.open(self.snapshot, "r:*") as tar:
+                for member in tar:
+                    if member.name in wanted:
+                        fh = tar.extractfile(member)
+                        if fh is not None:
+                            out[member.name] = fh.read()
+            return out
+        by_path = {e.path: e for e in self.entries()}
+        return {rel: self._path_for(by_path[rel]).read_bytes() for rel in wanted if rel in by_path}
+
+    def digest(self, entry: ManifestEntry) -> str:
+        if not entry.sha256:
+            entry.sha256 = backup.file_sha256(self._path_for(entry))
+        return entry.sha256
+
+    def _path_for(self, entry: ManifestEntry) -> Path:
+        if self.kind == "manifest":
+            return backup.object_path(self.backup_dir, entry.sha256)
+        return self.snapshot / entry.path
+
+    def _archive_manifest(self) -> List[ManifestEntry]:
+        with tarfile.open(self.snapshot, "r:*") as tar:
+            for member in tar:
+                if member.name == backup.ARCHIVE_MANIFEST:
+                    fh = tar.extractfile(member)
+                    if fh is not None:
+                        data = json.loads(fh.read().decode("utf-8"))
+                        return [ManifestEntry(**item) for item in data.get("files", [])]
+        raise ValueError(f"{self.snapshot.name}: archive has no {backup.ARCHIVE_MANIFEST}")
+
+
+def host_paths(source: SnapshotSource, alias: str) -> Set[str]:
+    """Snapshot paths belonging to ``alias``: its config.d file plus the
+    private/public keys under keys/ that the file references."""
+    confs = {e.path for e in source.entries() if e.path.startswith("config.d/")}
+    guess = f"config.d/{sanitize_filename(alias)}.conf"
+    candidates = [guess] if guess in confs else sorted(confs)
+    contents = source.read_many(candidates)
+    keys = {e.path for e in source.entries() if e.path.startswith("keys/")}
+    for rel in candidates:
+        try:
+            host = parser.parse_host_file(contents[rel].decode("utf-8"))
+        except (KeyError, ValueError, UnicodeDecodeError):
+            continue
+        if alias not in host.patterns and rel != guess:
+            continue
+        selected = {rel}
+        for ident in [host.identity_file, *host.get_option("IdentityFile")]:
+            if not ident:
+                continue
+            name = Path(ident).name
+            selected.update(p for p in (f"keys/{name}", f"keys/{name}.pub") if p in keys)
+        return selected
+    return set()
+
+
+def _entry_dest(ssh_dir: Path, rel: str) -> Path:
+    """Live path of a snapshot entry. A crafted manifest must not reach
+    outside ``ssh_dir``, so absolute paths and ``..`` are rejected."""
+    parts = PurePosixPath(rel).parts
+    if not parts or PurePosixPath(rel).is_absolute() or ".." in parts or "\x00" in rel:
+        raise ValueError(f"Snapshot entry {rel!r} is not a path inside the ssh directory")
+    return ssh_dir.joinpath(*parts)
+
+
+def diff_snapshot(
+    source: SnapshotSource, ssh_dir: Path, only: Optional[Set[str]] = None
+) -> List[Change]:
+    """Compare snapshot entries with the live tree.
+
+    Size and mtime are checked first; a file is hashed only when they differ.
+    Files present live but absent from the snapshot are left alone. Raises
+    ValueError for an entry whose path leaves ``ssh_dir``.
+    """
+    changes: List[Change] = []
+    for entry in source.entries():
+        if only is not None and entry.path not in only:
+            continue
+        live = _entry_dest(ssh_dir, entry.path)
+        try:
+            st = live.stat()
+        except FileNotFoundError:
+            changes.append(Change(entry, ADDED))
+            continue
+        same = st.st_size == entry.size and st.st_mtime_ns == entry.mtime_ns
+        if not same and st.st_size == entry.size:
+            same = backup.file_sha256(live) == source.digest(entry)
+        if not same:
+            changes.append(Change(entry, MODIFIED))
+        elif st.st_mode & 0o7777 != entry.mode:
+            changes.append(Change(entry, MODE))
+    return changes
+
+
+def apply_changes(source: SnapshotSource, ssh_dir: Path, changes: List[Change]) -> int:
+    """Write the given changes into ``ssh_dir``; returns the number of files touched.
+
+    Every path is checked before anything is written (see :func:`diff_snapshot`).
+    config.d files are written under the config.d lock, so a concurrent
+    ``parse`` or ``import`` swap cannot drop them.
+    """
+    dests = [_entry_dest(ssh_dir, c.entry.path) for c in changes]
+    contents = source.read_many(c.entry.path for c in changes if c.kind != MODE)
+    lock: ContextManager[None] = contextlib.nullcontext()
+    if any(c.entry.path.startswith("config.d/") for c in changes):
+        lock = store.config_d_lock(ssh_dir / "config.d")
+    with lock:
+        _apply(changes, dests, contents)
+    return len(changes)
+
+
+def _apply(changes: List[Change], dests: List[Path], contents: Dict[str, bytes]) -> None:
+    for change, dest in zip(changes, dests):
+        e = change.entry
+        if change.kind != MODE:
+            dest.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp = dest.with_name(f".{dest.name}.restore")
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(contents[e.path])
+            os.chmod(tmp, e.mode)
+            os.utime(tmp, ns=(e.mtime_ns, e.mtime_ns))
+            os.replace(tmp, dest)
+        else:
+            os.chmod(dest, e.mode)
+
+
+__all__ = [
+    "ADDED",
+    "MODE",
+    "MODIFIED",
+    "Change",
+    "SnapshotSource",
+    "apply_changes",
+    "diff_snapshot",
+    "host_paths",
+]
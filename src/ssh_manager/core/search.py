@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import heapq
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .model import HostConfig
+
+# Field weights: a hit on the alias outranks one on HostName, and so on
+ALIAS, HOSTNAME, USER, OPTION = 0, 1, 2, 3
+FIELD_NAMES = ("alias", "hostname", "user", "option")
+_WEIGHTS = (8, 4, 2, 1)
+# Match kinds, best first
+_EXACT, _PREFIX, _SUBSTRING = 4, 3, 2
+# Share of a term's trigrams a field must contain to count as a typo match
+_FUZZY_OVERLAP = 0.5
+
+
+@dataclass(frozen=True)
+class Match:
+    doc_id: str
+    score: float
+    field: str  # best matching field of the first term
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"id": self.doc_id, "score": round(self.score, 3), "field": self.field}
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _is_subsequence(term: str, text: str) -> bool:
+    it = iter(text)
+    return all(ch in it for ch in term)
+
+
+def host_fields(host: HostConfig) -> Tuple[str, ...]:
+    """Lower-cased searchable text per field: every ``Host`` pattern,
+    HostName, User and every option value (IdentityFile included), joined
+    by spaces."""
+    options = [host.identity_file or ""]
+    for values in host.options.values():
+        options.extend(values)
+    return (
+        " ".join(host.patterns).lower(),
+        (host.hostname or "").lower(),
+        (host.user or "").lower(),
+        " ".join(o for o in options if o).lower(),
+    )
+
+
+class SearchIndex:
+    """Trigram index over hosts, keyed by an id of the caller's choosing
+    (the config.d file name in the CLI and TUI).
+
+    Terms of three or more characters are answered from the posting lists:
+    the smallest lists are intersected first, so a selective query touches
+    few documents whatever the inventory size. Shorter terms, and queries
+    with no substring hit, fall back to scanning the stored field text
+    (typo tolerance via trigram overlap, then in-order subsequences such as
+    ``wbprd`` for ``web-prod``; both only on the alias and HostName).
+    Documents are added, replaced or removed one at a time.
+
+    Typing narrows a query, so when a query extends the previous one only
+    the previous matches are re-checked. Posting lists are built on first
+    use (or by :meth:`ensure_postings`); a one-off query over a fresh index
+    scans the stored text instead of paying for them.
+    """
+
+    def __init__(self) -> None:
+        self.docs: Dict[str, Tuple[str, ...]] = {}
+        self._text: Dict[str, str] = {}  # doc id -> fields joined by NUL
+        self._order: Dict[str, Tuple[int, str, str]] = {}  # tie-break sort key
+        self._grams: Dict[str, Set[str]] = {}  # doc id -> its trigrams
+        self._postings: Optional[Dict[str, Set[str]]] = None  # trigram -> doc ids
+        # (query, matching ids) of the last substring search
+        self._last: Optional[Tuple[str, Set[str]]] = None
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self.docs
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[str, HostConfig]]) -> "SearchIndex":
+        idx = cls()
+        for doc_id, host in items:
+            idx.add(doc_id, host)
+        return idx
+
+    def add(self, doc_id: str, host: HostConfig) -> None:
+        """Index ``host`` under ``doc_id``, replacing any previous version."""
+        if doc_id in self.docs:
+            self.remove(doc_id)
+        self._last = None
+        fields = host_fields(host)
+        self.docs[doc_id] = fields
+        self._text[doc_id] = "\0".join(fields)
+        self._order[doc_id] = (len(fields[ALIAS]), fields[ALIAS], doc_id)
+        if self._postings is not None:
+            self._index_grams(doc_id)
+
+    def ensure_postings(self) -> None:
+        """Build the trigram posting lists if they do not exist yet."""
+        if self._postings is None:
+            self._postings = {}
+            for doc_id in self.docs:
+                self._index_grams(doc_id)
+
+    def _index_grams(self, doc_id: str) -> None:
+        assert self._postings is not None
+        grams: Set[str] = set()
+        for text in self.docs[doc_id]:
+            grams |= trigrams(text)
+        self._grams[doc_id] = grams
+        for g in grams:
+            self._postings.setdefault(g, set()).add(doc_id)
+
+    def remove(self, doc_id: str) -> None:
+        self._last = None
+        self.docs.pop(doc_id, None)
+        self._text.pop(doc_id, None)
+        self._order.pop(doc_id, None)
+        for g in self._grams.pop(doc_id, ()):
+            assert self._postings is not None
+            posting = self._postings.get(g)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self._postings[g]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Match]:
+        """Documents matching every whitespace-separated term, best first.
+
+        Ties are broken by shorter alias, then alias order.
+        """
+        query = query.lower()
+        terms = query.split()
+        if not terms:
+            return []
+        candidates: Optional[Set[str]] = None
+        if self._last is not None and query.startswith(self._last[0]):
+            candidates = self._last[1]
+        for term in sorted(terms, key=len, reverse=True):
+            candidates = self._substring_candidates(term, candidates)
+            if not candidates:
+                break
+        fuzzy = not candidates
+        if candidates:
+            self._last = (query, candidates)
+        else:
+            self._last = None
+            candidates = self._fuzzy_candidates(terms)
+        scored: List[Tuple[float, str, str]] = []
+        docs, texts = self.docs, self._text
+        for doc_id in candidates or ():
+            fields = docs[doc_id]
+            text = texts[doc_id]
+            total = 0.0
+            best_field = ""
+            for i, term in enumerate(terms):
+                score, field = _score(term, fields, text, fuzzy)
+                if not score:
+                    break
+                total += score
+                if i == 0:
+                    best_field = field
+            else:
+                scored.append((total, doc_id, best_field))
+        order = self._order
+        key = lambda m: (-m[0], order[m[1]])
+        if limit is not None and limit < len(scored):
+            scored = heapq.nsmallest(limit, scored, key=key)
+        else:
+            scored.sort(key=key)
+        return [Match(doc_id, score, field) for score, doc_id, field in scored]
+
+    def _substring_candidates(self, term: str, within: Optional[Set[str]]) -> Set[str]:
+        """Documents that contain ``term`` somewhere (posting lists narrow the
+        set; the stored text confirms it)."""
+        if len(term) < 3 or self._postings is None:
+            pool: Iterable[str] = within if within is not None else self.docs
+        else:
+            postings = sorted((self._postings.get(g, set()) for g in trigrams(term)), key=len)
+            if not postings[0]:
+                return set()
+            if within is not None and len(within) < len(postings[0]):
+                pool = within  # the text check below is cheaper than the postings
+            else:
+                pool = [d for d in postings[0] if all(d in p for p in postings[1:])]
+                if within is not None:
+                    pool = [d for d in pool if d in within]
+        text = self._text
+        return {d for d in pool if term in text[d]}
+
+    def _fuzzy_candidates(self, terms: List[str]) -> Set[str]:
+        """Documents sharing enough trigrams with every long term; when that
+        finds nothing, every document (scored by subsequence match)."""
+        self.ensure_postings()
+        assert self._postings is not None
+        candidates: Optional[Set[str]] = None
+        for term in terms:
+            grams = trigrams(term)
+            if not grams:
+                continue
+            counts: Dict[str, int] = {}
+            for g in grams:
+                for d in self._postings.get(g, ()):
+                    counts[d] = counts.get(d, 0) + 1
+            need = _FUZZY_OVERLAP * len(grams)
+            found = {d for d, n in counts.items() if n >= need}
+            candidates = found if candidates is None else candidates & found
+        if candidates:
+            return candidates
+        # Last resort: the characters of every term, in order, in the alias or HostName
+        patterns = [re.compile(".*?".join(map(re.escape, term))) for term in terms]
+        return {
+            d for d, fields in self.docs.items()
+            if all(p.search(fields[ALIAS]) or p.search(fields[HOSTNAME]) for p in patterns)
+        }
+
+
+def _score(term: str, fields: Tuple[str, ...], text: str, fuzzy: bool) -> Tuple[float, str]:
+    """Best ``(score, field name)`` for ``term``; ``text`` is ``fields`` joined by NUL."""
+    pos = text.find(term)
+    kind: float  # a match class, or a fuzzy overlap below _SUBSTRING
+    if pos >= 0 and not fuzzy:
+        # With these weights a substring hit in a field scores at least as
+        # high as any hit in a later field, so the first occurrence decides.
+        i = text.count("\0", 0, pos)
+        value = fields[i]
+        if value == term:
+            kind = _EXACT
+        elif value.startswith(term) or (i != ALIAS and f" {term}" in value):
+            kind = _PREFIX
+        else:
+            kind = _SUBSTRING
+        return kind * _WEIGHTS[i], FIELD_NAMES[i]
+    if pos < 0 and not fuzzy:
+        return 0.0, ""
+    best, best_field = 0.0, ""
+    grams = trigrams(term) if fuzzy and len(term) >= 3 else set()
+    for i, value in enumerate(fields):
+        if not value:
+            continue
+        if value == term:
+            kind = _EXACT
+        elif value.startswith(term) or f" {term}" in value:
+            kind = _PREFIX
+        elif term in value:
+            kind = _SUBSTRING
+        elif not fuzzy or i > HOSTNAME:
+            continue  # typo matching only looks at the alias and HostName
+        else:
+            overlap = len(grams & trigrams(value)) / len(grams) if grams else 0.0
+            if overlap >= _FUZZY_OVERLAP:
+                kind = overlap  # < _SUBSTRING
+            elif _is_subsequence(term, value):
+                kind = 0.5
+            else:
+                continue
+        score = kind * _WEIGHTS[i]
+        if score > best:
+            best, best_field = score, FIELD_NAMES[i]
+    return best, best_field
+
+
+__all__ = ["Match", "SearchIndex", "host_fields", "trigrams"]
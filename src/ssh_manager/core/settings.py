@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+# Paths are resolved on every call (not at import time) so that HOME changes,
+# e.g. in tests, are honoured by the CLI and the TUI alike.
+
+
+def ssh_dir() -> Path:
+    return Path.home() / ".ssh"
+
+
+def config_file() -> Path:
+    return ssh_dir() / "config"
+
+
+def known_hosts_file() -> Path:
+    return ssh_dir() / "known_hosts"
+
+
+def config_d_dir() -> Path:
+    return ssh_dir() / "config.d"
+
+
+def keys_dir() -> Path:
+    return ssh_dir() / "keys"
+
+
+def backup_dir() -> Path:
+    return ssh_dir() / "manager_backups"
+
+
+def cache_dir() -> Path:
+    return ssh_dir() / "manager_cache"
+
+
+__all__ = [
+    "ssh_dir",
+    "config_file",
+    "known_hosts_file",
+    "config_d_dir",
+    "keys_dir",
+    "backup_dir",
+    "cache_dir",
+]
@@ -1,34 +1,388 @@
 from __future__ import annotations
 
+import contextlib
+import ctypes
+import errno
+import fcntl
+import os
 import shutil
-import time
+import tempfile
 from pathlib import Path
+from typing import Iterator, Optional, Sequence, Set
 
+from . import backup, timing
 from .model import HostConfig
+from .names import LEADING_PATTERNS_FILE, PATTERNS_FILE
 from .util import sanitize_filename
 
 
-def write_host_config(config_d_dir: Path, host: HostConfig) -> Path:
+def host_filename(host: HostConfig) -> str:
+    """Name of the config.d file that stores ``host``."""
+    return f"{sanitize_filename(host.host or host.hostname or 'host')}.conf"
+
+
+def write_host_config(config_d_dir: Path, host: HostConfig, name: Optional[str] = None) -> Path:
+    """Write ``host`` to config.d, as ``name`` when it already has a file
+    (it may not match :func:`host_filename` after a rename on parse).
+
+    The write holds the config.d lock, so it cannot land in the middle of a
+    :class:`ConfigDWriter` commit and be lost by its swap.
+    """
     config_d_dir.mkdir(parents=True, exist_ok=True)
-    safe_stem = sanitize_filename(host.host or host.hostname or "host")
-    path = config_d_dir / f"{safe_stem}.conf"
-    tmp = path.with_suffix('.tmp')
-    tmp.write_text(host.serialize(), encoding='utf-8')
-    tmp.replace(path)
+    path = config_d_dir / (name or host_filename(host))
+    with config_d_lock(config_d_dir), timing.span("write"):
+        write_if_changed(path, host.serialize())
     return path
 
 
+@contextlib.contextmanager
+def config_d_lock(config_d_dir: Path) -> Iterator[None]:
+    """Hold the exclusive ``.config.d.lock`` that :class:`ConfigDWriter`
+    takes, for a change to config.d made outside a transaction."""
+    fd = _acquire_lock(config_d_dir)
+    try:
+        yield
+    finally:
+        os.close(fd)  # closing releases the flock
+
+
+def patterns_text(blocks: Sequence[HostConfig]) -> str:
+    """Content of a pattern file holding ``blocks`` in order."""
+    return "\n".join(h.serialize() for h in blocks)
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    """Atomically replace ``path`` with ``text`` unless it already matches.
+
+    The new content is written to a temp file, fsynced and renamed over the
+    target (keeping the existing file's mode). Returns True if a write
+    happened.
+    """
+    data = text.encode("utf-8")
+    if _same_content(path, data):
+        return False
+    try:
+        mode = path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None
+    tmp = path.with_name(f".{path.name}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666 if mode is None else 0o600)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_path(path.parent)
+    timing.add(1, len(data))
+    return True
+
+
+class ConfigDError(RuntimeError):
+    """Raised when config.d holds something a transaction cannot carry over."""
+
+
 def backup_snapshot(ssh_dir: Path, backup_dir: Path) -> Path:
-    backup_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
-    stamp = time.strftime("%Y-%m-%d_%H%M%S")
-    dest = backup_dir / stamp
-    dest.mkdir(mode=0o700)
-    # Copy selected items
-    for name in ["config", "config.d", "keys"]:
-        p = ssh_dir / name
-        if p.exists():
-            if p.is_dir():
-                shutil.copytree(p, dest / name)
+    """Snapshot config, config.d and keys into ``backup_dir`` (deduplicated)."""
+    return backup.create_snapshot(ssh_dir, backup_dir)
+
+
+class ConfigDWriter:
+    """Write many host files into config.d as one transaction.
+
+    Changed files are staged in a hidden sibling directory; files whose
+    content is identical to what is already on disk are not rewritten. On
+    commit untouched existing files are hard-linked into the staging
+    directory (symlinks are recreated and subdirectories copied as links),
+    the batch is flushed with a single sync barrier, and the staging
+    directory is swapped with config.d. If anything fails before the swap,
+    config.d is left exactly as it was.
+
+    A writer holds an exclusive lock on ``.config.d.lock`` next to config.d
+    from the moment it is created until it commits or rolls back, so
+    concurrent writers run one after the other and crash recovery never
+    sees another writer's staging directory::
+
+        with ConfigDWriter(config_d_dir) as tx:
+            for host in hosts:
+                tx.write(host)
+    """
+
+    def __init__(self, config_d_dir: Path):
+        self.config_d_dir = config_d_dir
+        self.written = 0
+        self.unchanged = 0
+        self.removed = 0
+        self._staging: Optional[Path] = None
+        self._staged: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._lock_fd: Optional[int] = None
+        if config_d_dir.parent.is_dir():
+            self._lock()
+            recover_config_d(config_d_dir)
+
+    def __enter__(self) -> "ConfigDWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def write(self, host: HostConfig, name: Optional[str] = None) -> Path:
+        """Stage ``host``, as ``name`` when it already has a file (see
+        :func:`write_host_config`)."""
+        return self.write_text(name or host_filename(host), host.serialize())
+
+    def write_patterns(self, leading: Sequence[HostConfig], trailing: Sequence[HostConfig]) -> None:
+        """Stage wildcard blocks such as ``Host *.corp``, in order: ``leading``
+        as :data:`~ssh_manager.core.names.LEADING_PATTERNS_FILE`, read before
+        the host files, and ``trailing`` as
+        :data:`~ssh_manager.core.names.PATTERNS_FILE`, read after them. A file
+        left with no blocks is removed."""
+        for name, hosts in ((LEADING_PATTERNS_FILE, leading), (PATTERNS_FILE, trailing)):
+            if hosts:
+                self.write_text(name, patterns_text(hosts))
             else:
-                shutil.copy2(p, dest / name)
-    return dest
+                self.remove(name)
+
+    def write_text(self, name: str, text: str) -> Path:
+        """Stage ``text`` as config.d/``name``."""
+        with timing.span("write"):
+            if name in self._removed:
+                self._removed.discard(name)
+                self.removed -= 1
+            data = text.encode("utf-8")
+            final = self.config_d_dir / name
+            if name not in self._staged and _same_content(final, data):
+                self.unchanged += 1
+                return final
+            staging = self._ensure_staging()
+            with open(staging / name, "wb") as fh:
+                fh.write(data)
+            timing.add(1, len(data))
+            if name not in self._staged:
+                self._staged.add(name)
+                self.written += 1
+            return final
+
+    def remove(self, name: str) -> None:
+        """Drop the host file ``name`` from config.d when the transaction commits."""
+        if name in self._staged:
+            (self._ensure_staging() / name).unlink()
+            self._staged.discard(name)
+            self.written -= 1
+        if name not in self._removed and (self.config_d_dir / name).is_file():
+            self._removed.add(name)
+            self.removed += 1
+            self._ensure_staging()
+
+    def commit(self) -> None:
+        staging = self._staging
+        if staging is None:  # nothing changed; config.d untouched
+            self._unlock()
+            return
+        with timing.span("commit"):
+            try:
+                if self.config_d_dir.is_dir():
+                    with os.scandir(self.config_d_dir) as it:
+                        for entry in it:
+                            if entry.name in self._staged or entry.name in self._removed:
+                                continue
+                            _carry_entry(entry, staging / entry.name)
+                _sync_batch(staging, self._staged)
+                previous = _swap_dirs(staging, self.config_d_dir)
+                _fsync_path(self.config_d_dir.parent)
+            except BaseException:
+                self.rollback()
+                raise
+            if previous is not None:
+                shutil.rmtree(previous, ignore_errors=True)
+            self._staging = None
+            self._staged.clear()
+            self._removed.clear()
+        self._unlock()
+
+    def rollback(self) -> None:
+        if self._staging is not None:
+            shutil.rmtree(self._staging, ignore_errors=True)
+            self._staging = None
+        self._staged.clear()
+        self._removed.clear()
+        self._unlock()
+
+    def _ensure_staging(self) -> Path:
+        if self._staging is None:
+            parent = self.config_d_dir.parent
+            parent.mkdir(parents=True, exist_ok=True)
+            self._lock()
+            self._staging = Path(tempfile.mkdtemp(prefix=_staging_prefix(self.config_d_dir),
+                                                  dir=parent))
+        return self._staging
+
+    def _lock(self) -> None:
+        """Take the config.d lock (blocking) unless this writer holds it."""
+        if self._lock_fd is None:
+            self._lock_fd = _acquire_lock(self.config_d_dir)
+
+    def _unlock(self) -> None:
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # closing releases the flock
+            self._lock_fd = None
+
+
+def recover_config_d(config_d_dir: Path) -> None:
+    """Clean up after a writer that crashed mid-transaction.
+
+    Leftover staging directories are discarded; if config.d itself is missing
+    because the crash hit between the two renames of the fallback swap, the
+    previous directory is moved back. Only call this while holding the
+    config.d lock, as :class:`ConfigDWriter` does: a live writer's staging
+    directory looks the same as a crashed one's.
+    """
+    parent = config_d_dir.parent
+    if not parent.is_dir():
+        return
+    prefix = _staging_prefix(config_d_dir)
+    old_prefix = _old_prefix(config_d_dir)
+    for entry in os.scandir(parent):
+        if entry.name.startswith(old_prefix) and not config_d_dir.exists():
+            os.replace(entry.path, config_d_dir)
+        elif entry.name.startswith(prefix) or entry.name.startswith(old_prefix):
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def _staging_prefix(config_d_dir: Path) -> str:
+    return f".{config_d_dir.name}.staging-"
+
+
+def _old_prefix(config_d_dir: Path) -> str:
+    return f".{config_d_dir.name}.old-"
+
+
+def _lock_name(config_d_dir: Path) -> str:
+    return f".{config_d_dir.name}.lock"
+
+
+def _acquire_lock(config_d_dir: Path) -> int:
+    """Open and exclusively flock config.d's lock file (blocking)."""
+    path = config_d_dir.parent / _lock_name(config_d_dir)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
+
+
+def _same_content(path: Path, data: bytes) -> bool:
+    try:
+        if path.stat().st_size != len(data):
+            return False
+        return path.read_bytes() == data
+    except OSError:
+        return False
+
+
+def _link_or_copy(src: Path, dest: Path) -> None:
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+def _carry_entry(entry: "os.DirEntry[str]", dest: Path) -> None:
+    """Reproduce an untouched config.d entry in the staging directory."""
+    if entry.is_symlink():
+        os.symlink(os.readlink(entry.path), dest)
+    elif entry.is_dir(follow_symlinks=False):
+        shutil.copytree(entry.path, dest, symlinks=True,
+                        copy_function=lambda src, dst: _link_or_copy(Path(src), Path(dst)))
+    elif entry.is_file(follow_symlinks=False):
+        _link_or_copy(Path(entry.path), dest)
+    else:
+        raise ConfigDError(f"{entry.path} is not a file, directory or symlink; "
+                           "config.d left as it was")
+
+
+def _fsync_path(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+_RENAME_EXCHANGE = 2
+_AT_FDCWD = -100
+
+
+def _libc_func(name: str):
+    try:
+        return getattr(ctypes.CDLL(None, use_errno=True), name, None)
+    except OSError:  # pragma: no cover - no dynamic libc
+        return None
+
+
+def _sync_batch(staging: Path, names: Set[str]) -> None:
+    """Flush the staged files and the staging directory with one barrier.
+
+    Linux ``syncfs`` flushes the whole filesystem in a single call; elsewhere
+    each staged file is fsynced.
+    """
+    syncfs = _libc_func("syncfs")
+    if syncfs is not None:
+        fd = os.open(staging, os.O_RDONLY)
+        try:
+            if syncfs(fd) == 0:
+                return
+        finally:
+            os.close(fd)
+    for name in names:
+        _fsync_path(staging / name)
+    _fsync_path(staging)
+
+
+def _renameat2_exchange(a: Path, b: Path) -> bool:
+    """Atomically exchange two paths with Linux renameat2(RENAME_EXCHANGE).
+
+    Returns False when the call is unavailable so callers can fall back.
+    """
+    renameat2 = _libc_func("renameat2")
+    if renameat2 is None:
+        return False
+    rc = renameat2(_AT_FDCWD, os.fsencode(a), _AT_FDCWD, os.fsencode(b), _RENAME_EXCHANGE)
+    if rc == 0:
+        return True
+    err = ctypes.get_errno()
+    if err in (errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):  # not supported here
+        return False
+    raise OSError(err, os.strerror(err), str(a))
+
+
+def _swap_dirs(staging: Path, target: Path) -> Optional[Path]:
+    """Make ``staging`` the new ``target``.
+
+    Returns the directory now holding the previous contents (to be removed),
+    or None when ``target`` did not exist.
+    """
+    if not target.exists():
+        os.replace(staging, target)
+        return None
+    if _renameat2_exchange(staging, target):
+        return staging
+    # Fallback: two renames. recover_config_d() repairs a crash in between.
+    old = target.parent / (_old_prefix(target) + staging.name[len(_staging_prefix(target)):])
+    os.replace(target, old)
+    os.replace(staging, target)
+    return old
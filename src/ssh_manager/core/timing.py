@@ -0,0 +1,229 @@
+"""Named timing spans for `--profile` and the TUI.
+
+Code marks phases with ``with timing.span("write"):`` and counts the files
+it touches with ``timing.add(files, nbytes)``. Nothing is recorded until
+:func:`start` installs a :class:`Recorder`. Until then ``span`` returns a
+shared no-op object, so the calls can stay in hot paths.
+
+A span's time includes any spans nested in it. Counts go to the innermost
+span open on the calling thread, so each file is counted once.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+ENV_VAR = "SSH_MANAGER_PROFILE"
+
+T = TypeVar("T")
+
+
+def mode_from_env(value: Optional[str]) -> Optional[str]:
+    """``SSH_MANAGER_PROFILE`` value -> "table", "json" or None (off)."""
+    value = (value or "").strip().lower()
+    if value in ("", "0", "no", "off", "false"):
+        return None
+    return "json" if value == "json" else "table"
+
+
+class SpanStats:
+    __slots__ = ("name", "calls", "seconds", "files", "bytes")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.files = 0
+        self.bytes = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "calls": self.calls, "seconds": round(self.seconds, 6),
+                "files": self.files, "bytes": self.bytes}
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "files", "bytes", "_t0")
+
+    def __init__(self, recorder: "Recorder", name: str):
+        self.recorder = recorder
+        self.name = name
+        self.files = 0
+        self.bytes = 0
+
+    def __enter__(self) -> "_Span":
+        self.recorder._stack().append(self)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        seconds = time.perf_counter() - self._t0
+        stack = self.recorder._stack()
+        stack.pop()
+        self.recorder._record(self.name, seconds, self.files, self.bytes, top=not stack)
+
+    def add(self, files: int = 1, nbytes: int = 0) -> None:
+        self.files += files
+        self.bytes += nbytes
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        pass
+
+    def add(self, files: int = 1, nbytes: int = 0) -> None:
+        pass
+
+
+_NULL = _NullSpan()
+
+
+class Recorder:
+    """Span totals by name, in the order each name was first closed."""
+
+    def __init__(self) -> None:
+        self.spans: Dict[str, SpanStats] = {}
+        self.started = time.perf_counter()
+        # Time inside outermost spans; the rest of the run is "other"
+        self.top_seconds = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> List[_Span]:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _record(self, name: str, seconds: float, files: int, nbytes: int, top: bool) -> None:
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats(name)
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.files += files
+            stats.bytes += nbytes
+            if top:
+                self.top_seconds += seconds
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans = {}
+            self.started = time.perf_counter()
+            self.top_seconds = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = self.elapsed
+        return {
+            "elapsed": round(elapsed, 6),
+            "other": round(max(0.0, elapsed - self.top_seconds), 6),
+            "spans": [s.to_dict() for s in self.spans.values()],
+        }
+
+    def format_table(self) -> str:
+        elapsed = self.elapsed
+        rows = [f"{'span':<20} {'calls':>7} {'seconds':>9} {'%':>5} {'files':>8} {'bytes':>10}"]
+        for s in self.spans.values():
+            share = 100 * s.seconds / elapsed if elapsed else 0.0
+            rows.append(f"{s.name:<20} {s.calls:>7} {s.seconds:>9.3f} {share:>5.1f} "
+                        f"{s.files or '':>8} {_size(s.bytes) if s.bytes else '':>10}".rstrip())
+        rows.append(f"{'other':<20} {'':>7} {max(0.0, elapsed - self.top_seconds):>9.3f}")
+        rows.append(f"{'total':<20} {'':>7} {elapsed:>9.3f}")
+        return "\n".join(rows)
+
+    def summary(self, limit: int = 4) -> str:
+        """One line for a status bar: the slowest spans first."""
+        spans = sorted(self.spans.values(), key=lambda s: -s.seconds)[:limit]
+        parts = [f"{s.name} {_ms(s.seconds)}" + (f" ({s.files} files)" if s.files else "")
+                 for s in spans]
+        return ", ".join(parts) or "no spans recorded"
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f} ms" if seconds < 10 else f"{seconds:.1f} s"
+
+
+def _size(n: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if n < 1024:
+            return f"{n} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GiB"
+
+
+_active: Optional[Recorder] = None
+
+
+def start() -> Recorder:
+    """Install a fresh recorder; spans are recorded until :func:`stop`."""
+    global _active
+    _active = Recorder()
+    return _active
+
+
+def stop() -> Optional[Recorder]:
+    global _active
+    recorder, _active = _active, None
+    return recorder
+
+
+def active() -> Optional[Recorder]:
+    return _active
+
+
+def span(name: str):
+    """Context manager timing ``name``; a no-op unless a recorder is active."""
+    recorder = _active
+    return _NULL if recorder is None else _Span(recorder, name)
+
+
+def add(files: int = 1, nbytes: int = 0) -> None:
+    """Count files touched and bytes moved against the innermost open span."""
+    recorder = _active
+    if recorder is not None:
+        stack = recorder._stack()
+        if stack:
+            stack[-1].add(files, nbytes)
+
+
+def timed(iterable: Iterable[T], name: str) -> Iterable[T]:
+    """Time each step of ``iterable`` (e.g. a parsing generator) as ``name``,
+    leaving out the time the consumer spends between steps."""
+    if _active is None:
+        return iterable
+    return _timed(iter(iterable), name)
+
+
+def _timed(it: Iterator[T], name: str) -> Iterator[T]:
+    while True:
+        with span(name):
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+        yield item
+
+
+__all__ = [
+    "ENV_VAR",
+    "Recorder",
+    "SpanStats",
+    "active",
+    "add",
+    "mode_from_env",
+    "span",
+    "start",
+    "stop",
+    "timed",
+]
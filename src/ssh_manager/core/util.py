@@ -29,10 +29,9 @@ def sanitize_filename(base: str) -> str:
                 cleaned_chars.append('-')
                 last_was_sep = True
     cleaned = ''.join(cleaned_chars)
-    # Remove leading dots produced by patterns like *.corp -> .corp
-    cleaned = cleaned.lstrip('.')
-    # Remove leading separators
-    cleaned = cleaned.lstrip('-_')
+    # Remove leading dots and separators together: *.corp becomes -.corp,
+    # and a leftover leading dot would make a hidden file the Include skips
+    cleaned = cleaned.lstrip('.-_')
     cleaned = re.sub(r'[-_]{2,}', '-', cleaned)  # collapse repeats
     if not cleaned:
         cleaned = 'host'
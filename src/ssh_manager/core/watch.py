@@ -0,0 +1,526 @@
+from __future__ import annotations
+
+import ctypes
+import errno
+import os
+import select
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import audit, fingerprint, index, parser
+from .audit import AuditResult, Finding
+from .names import PATTERN_FILES
+
+# inotify(7) event bits
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+# Contents of config.d and keys: written, renamed in/out, deleted, chmod'ed
+DIR_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+            | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+# ~/.ssh itself: only to notice config.d/keys being replaced (ConfigDWriter swaps directories)
+SSH_MASK = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+
+_EVENT = struct.Struct("iIII")
+
+ADDED = "added"
+RESOLVED = "resolved"
+
+
+@dataclass(frozen=True)
+class InotifyEvent:
+    wd: int
+    mask: int
+    cookie: int
+    name: str
+
+
+class Inotify:
+    """Minimal ctypes binding for Linux inotify."""
+
+    def __init__(self) -> None:
+        libc = _libc()
+        if libc is None or not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        self._libc = libc
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+
+    def add_watch(self, path: Path, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(path))
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._libc.inotify_rm_watch(self.fd, wd)  # EINVAL for already-gone watches is fine
+
+    def read(self, timeout: Optional[float]) -> List[InotifyEvent]:
+        """Events available within ``timeout`` seconds (``None`` waits forever)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        events: List[InotifyEvent] = []
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(buf):
+                wd, mask, cookie, length = _EVENT.unpack_from(buf, offset)
+                offset += _EVENT.size
+                name = buf[offset:offset + length].rstrip(b"\0")
+                offset += length
+                events.append(InotifyEvent(wd, mask, cookie, os.fsdecode(name)))
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def _libc():
+    try:
+        return ctypes.CDLL(None, use_errno=True)
+    except OSError:  # pragma: no cover - no dynamic libc
+        return None
+
+
+@dataclass(frozen=True)
+class Change:
+    kind: str  # ADDED or RESOLVED
+    finding: Finding
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "event": self.kind,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            **self.finding.to_dict(),
+        }
+
+
+class IncrementalAudit:
+    """Audit state that is updated one file at a time.
+
+    Produces the same findings as :func:`audit.run_audit`, but keeps the
+    per-file inputs (parsed host, identity paths, key stat and fingerprint)
+    together with reverse indexes, so a changed host file or key only
+    re-evaluates the findings that depend on it. IdentityFile paths outside
+    the keys directory are re-checked when their host file changes.
+    """
+
+    def __init__(
+        self,
+        config_d_dir: Path,
+        keys_dir: Path,
+        home: Optional[Path] = None,
+        cache_dir: Optional[Path] = None,
+    ):
+        self.config_d_dir = config_d_dir
+        self.keys_dir = keys_dir
+        self.home = home or Path.home()
+        self.cache_dir = cache_dir
+        self._keys_root = os.path.normpath(keys_dir)
+        self.hosts: Dict[str, index.IndexedFile] = {}
+        self._host_sig: Dict[str, Tuple[int, int]] = {}
+        self._host_refs: Dict[str, Tuple[List[str], List[str]]] = {}  # file -> (aliases, paths)
+        self._alias_files: Dict[str, Set[str]] = {}
+        self._refs: Dict[str, Dict[str, List[str]]] = {}  # key path -> file -> aliases
+        # key or .pub name -> (stat, [fingerprint, error])
+        self.keys: Dict[str, Tuple[os.stat_result, List[Optional[str]]]] = {}
+        self._identity: Dict[str, str] = {}  # private key name -> fingerprint
+        self._fp_keys: Dict[str, Set[str]] = {}
+        self._findings: Dict[Tuple[str, str], List[Finding]] = {}
+
+    # -- results ---------------------------------------------------------
+
+    @property
+    def host_count(self) -> int:
+        return sum(1 for f in self.hosts.values() if f.host is not None)
+
+    def result(self) -> AuditResult:
+        findings = [f for _, group in sorted(self._findings.items()) for f in group]
+        return AuditResult(self.host_count, findings)
+
+    # -- loading ---------------------------------------------------------
+
+    def load(self) -> List[Change]:
+        """Full scan (through the parse index and fingerprint cache when
+        ``cache_dir`` is set); returns every finding as ``added``."""
+        for f in index.load_host_files(self.config_d_dir, self.cache_dir):
+            self._set_host(f.name, f, _sig(f.path))
+        private, public = audit.scan_key_dir(self.keys_dir)
+        entries = private + list(public.values())
+        stats = [_stat(e.path) for e in entries]
+        fps = audit.key_fingerprints(entries, stats, self.cache_dir, workers=4)
+        for entry, st in zip(entries, stats):
+            if st is not None:
+                self.keys[entry.name] = (st, fps.get(entry.path, [None, None]))
+        for entry in private:
+            self._update_identity(entry.name, set())
+        subjects: Set[Tuple[str, str]] = set()
+        for name, f in self.hosts.items():
+            subjects.add(("file", name))
+            if f.host is not None:
+                subjects.update(("alias", alias) for alias in f.host.aliases)
+        subjects.update(("ref", p) for p in self._refs)
+        for name in self._private_names():
+            subjects.update({("key", name), ("pair", name)})
+        subjects.update(("fp", fp) for fp in self._fp_keys)
+        return self._reevaluate(subjects)
+
+    def rescan(self) -> List[Change]:
+        """Compare both directories with the stored stats and update what differs."""
+        return self.rescan_config_d() + self.rescan_keys()
+
+    def rescan_config_d(self) -> List[Change]:
+        names = {e.name for e in index._scan_hosts(self.config_d_dir)}
+        changes: List[Change] = []
+        for name in sorted(names | set(self.hosts)):
+            changes.extend(self.update_host_file(name))
+        return changes
+
+    def rescan_keys(self) -> List[Change]:
+        try:
+            names = {e.name for e in os.scandir(self.keys_dir) if not e.name.startswith(".")}
+        except FileNotFoundError:
+            names = set()
+        changes: List[Change] = []
+        for name in sorted(names | set(self.keys)):
+            changes.extend(self.update_key_file(name))
+        return changes
+
+    # -- per-file updates ------------------------------------------------
+
+    def update_host_file(self, name: str) -> List[Change]:
+        """Re-read ``config.d/<name>`` (or drop it when gone) and re-evaluate."""
+        if not name.endswith(".conf") or name.startswith(".") or name in PATTERN_FILES:
+            return []
+        path = self.config_d_dir / name
+        sig = _sig(path)
+        if sig == self._host_sig.get(name) and (sig is not None or name not in self.hosts):
+            return []
+        affected = self._host_subjects(name)
+        if sig is None:
+            self._drop_host(name)
+        else:
+            try:
+                with open(path, "rb") as fh:
+                    data = fh.read()
+                host, error = parser.parse_host_file(data.decode("utf-8")), None
+            except FileNotFoundError:
+                self._drop_host(name)
+                return self._reevaluate(affected)
+            except (ValueError, UnicodeDecodeError) as exc:
+                host, error = None, str(exc)
+            self._drop_host(name)
+            self._set_host(name, index.IndexedFile(self.config_d_dir, name, host, error), sig)
+        return self._reevaluate(affected | self._host_subjects(name))
+
+    def update_key_file(self, name: str) -> List[Change]:
+        """Re-stat (and if needed re-fingerprint) ``keys/<name>``."""
+        if name.startswith("."):
+            return []
+        path = self.keys_dir / name
+        st = _stat(str(path))
+        if st is not None and not _is_regular(st):
+            st = None
+        old = self.keys.get(name)
+        if st is None and old is None:
+            return []
+        if st is not None and old is not None and _same_file(st, old[0]):
+            return []
+        if st is None:
+            del self.keys[name]
+        elif old is not None and _sig_of(st) == _sig_of(old[0]):
+            self.keys[name] = (st, old[1])  # mode/owner change only
+        else:
+            self.keys[name] = (st, fingerprint.safe_fingerprint(str(path)))
+        base = name[:-4] if name.endswith(".pub") else name
+        affected = {("pair", base), ("key", base), ("ref", f"{self._keys_root}/{base}")}
+        self._update_identity(base, affected)
+        return self._reevaluate(affected)
+
+    # -- internals -------------------------------------------------------
+
+    def _private_names(self) -> List[str]:
+        return [n for n in self.keys if not n.endswith(".pub")]
+
+    def _set_host(self, name: str, f: index.IndexedFile, sig: Optional[Tuple[int, int]]) -> None:
+        self.hosts[name] = f
+        if sig is not None:
+            self._host_sig[name] = sig
+        if f.host is None:
+            self._host_refs[name] = ([], [])
+            return
+        aliases = f.host.aliases
+        paths = audit.identity_paths(f.host, self.home)
+        self._host_refs[name] = (aliases, paths)
+        for alias in aliases:
+            self._alias_files.setdefault(alias, set()).add(name)
+        for p in paths:
+            self._refs.setdefault(p, {}).setdefault(name, []).append(f.host.host)
+
+    def _drop_host(self, name: str) -> None:
+        self.hosts.pop(name, None)
+        self._host_sig.pop(name, None)
+        aliases, paths = self._host_refs.pop(name, ([], []))
+        for alias in aliases:
+            files = self._alias_files.get(alias)
+            if files is not None:
+                files.discard(name)
+                if not files:
+                    del self._alias_files[alias]
+        for p in paths:
+            owners = self._refs.get(p)
+            if owners is not None:
+                owners.pop(name, None)
+                if not owners:
+                    del self._refs[p]
+
+    def _host_subjects(self, name: str) -> Set[Tuple[str, str]]:
+        """Findings that depend on host file ``name`` in its current state."""
+        subjects = {("file", name)}
+        aliases, paths = self._host_refs.get(name, ([], []))
+        subjects.update(("alias", alias) for alias in aliases)
+        prefix = self._keys_root + "/"
+        for p in paths:
+            subjects.add(("ref", p))
+            if p.startswith(prefix):
+                key = p[len(prefix):]
+                subjects.add(("key", key))
+                if key in self._identity:
+                    subjects.add(("fp", self._identity[key]))
+        return subjects
+
+    def _update_identity(self, base: str, affected: Set[Tuple[str, str]]) -> None:
+        """Recompute which fingerprint private key ``base`` counts as."""
+        old = self._identity.pop(base, None)
+        if old is not None:
+            affected.add(("fp", old))
+            members = self._fp_keys.get(old)
+            if members is not None:
+                members.discard(base)
+                if not members:
+                    del self._fp_keys[old]
+        if base not in self.keys:
+            return
+        fp = self.keys[base][1][0]
+        pub = self.keys.get(base + ".pub")
+        # PEM private keys carry no public half; fall back to the .pub
+        identity = fp or (pub[1][0] if pub is not None else None)
+        if identity:
+            self._identity[base] = identity
+            self._fp_keys.setdefault(identity, set()).add(base)
+            affected.add(("fp", identity))
+
+    def _aliases(self, path: str) -> List[str]:
+        owners = self._refs.get(path, {})
+        return [alias for name in sorted(owners) for alias in owners[name]]
+
+    def _evaluate(self, scope: str, subject: str) -> List[Finding]:
+        if scope == "file":
+            f = self.hosts.get(subject)
+            return [audit.unparseable_finding(f)] if f is not None and f.host is None else []
+        if scope == "alias":
+            files = sorted(self._alias_files.get(subject, ()))
+            return audit.duplicate_host_findings(subject, [self.hosts[n] for n in files])
+        if scope == "ref":
+            aliases = self._aliases(subject)
+            if not aliases:
+                return []
+            prefix = self._keys_root + "/"
+            name = subject[len(prefix):] if subject.startswith(prefix) else ""
+            exists = (name in self.keys and not name.endswith(".pub")) or os.path.exists(subject)
+            return [] if exists else [audit.missing_key_finding(subject, aliases)]
+        if scope in ("key", "pair") and (subject not in self.keys or subject.endswith(".pub")):
+            return []
+        path = str(self.keys_dir / subject)
+        if scope == "key":
+            referenced = f"{self._keys_root}/{subject}" in self._refs
+            return audit.key_file_findings(subject, path, referenced, self.keys[subject][0])
+        if scope == "pair":
+            pub = self.keys.get(subject + ".pub")
+            return audit.key_pair_findings(
+                subject, path, self.keys[subject][1],
+                str(self.keys_dir / (subject + ".pub")) if pub is not None else None,
+                pub[1] if pub is not None else [None, None],
+            )
+        # scope == "fp"
+        names = sorted(self._fp_keys.get(subject, ()))
+        if len(names) < 2:
+            return []
+        return [audit.duplicate_key_finding(subject, [
+            (n, str(self.keys_dir / n), self._aliases(f"{self._keys_root}/{n}")) for n in names
+        ])]
+
+    def _reevaluate(self, subjects: Iterable[Tuple[str, str]]) -> List[Change]:
+        changes: List[Change] = []
+        for subject in sorted(subjects):
+            old = self._findings.get(subject, [])
+            new = self._evaluate(*subject)
+            if new:
+                self._findings[subject] = new
+            else:
+                self._findings.pop(subject, None)
+            changes.extend(Change(RESOLVED, f) for f in old if f not in new)
+            changes.extend(Change(ADDED, f) for f in new if f not in old)
+        return changes
+
+
+class AuditWatcher:
+    """Keep an :class:`IncrementalAudit` current from inotify events.
+
+    ``~/.ssh`` is watched only for ``config.d``/``keys`` being created,
+    removed or swapped; each of those directories is watched for its files.
+    Events are collected until ``debounce`` seconds pass without new ones,
+    then only the named files are re-evaluated.
+    """
+
+    def __init__(
+        self,
+        ssh_dir: Path,
+        config_d_dir: Path,
+        keys_dir: Path,
+        home: Optional[Path] = None,
+        cache_dir: Optional[Path] = None,
+        debounce: float = 0.2,
+    ):
+        self.ssh_dir = ssh_dir
+        self.dirs = {"config.d": config_d_dir, "keys": keys_dir}
+        self.state = IncrementalAudit(config_d_dir, keys_dir, home, cache_dir)
+        self.debounce = debounce
+        self._inotify: Optional[Inotify] = None
+        self._roles: Dict[int, str] = {}  # watch descriptor -> "ssh" / "config.d" / "keys"
+
+    def start(self) -> List[Change]:
+        """Set up watches and load the initial state (every finding as ``added``).
+
+        Watches are added first so nothing written during the load is missed.
+        """
+        self._inotify = Inotify()
+        self._roles[self._inotify.add_watch(self.ssh_dir, SSH_MASK)] = "ssh"
+        for role in self.dirs:
+            self._watch(role)
+        return self.state.load()
+
+    def poll(self, timeout: Optional[float] = None) -> List[Change]:
+        """Wait up to ``timeout`` for changes and return the resulting finding changes."""
+        assert self._inotify is not None, "call start() first"
+        events = self._inotify.read(timeout)
+        if not events:
+            return []
+        while True:
+            more = self._inotify.read(self.debounce)
+            if not more:
+                break
+            events.extend(more)
+        return self._apply(events)
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._roles.clear()
+
+    def __enter__(self) -> "AuditWatcher":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _watch(self, role: str) -> bool:
+        assert self._inotify is not None
+        for wd in [wd for wd, r in self._roles.items() if r == role]:
+            del self._roles[wd]
+            self._inotify.rm_watch(wd)
+        try:
+            self._roles[self._inotify.add_watch(self.dirs[role], DIR_MASK)] = role
+        except (FileNotFoundError, NotADirectoryError):
+            return False
+        return True
+
+    def _apply(self, events: List[InotifyEvent]) -> List[Change]:
+        rescan: Set[str] = set()
+        touched: Dict[str, Set[str]] = {"config.d": set(), "keys": set()}
+        for ev in events:
+            if ev.mask & IN_Q_OVERFLOW:
+                rescan.update(self.dirs)
+                continue
+            role = self._roles.get(ev.wd)
+            if role is None:
+                continue
+            if role == "ssh":
+                if ev.name in self.dirs:
+                    rescan.add(ev.name)
+            elif ev.mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                rescan.add(role)
+            elif ev.name:
+                touched[role].add(ev.name)
+        changes: List[Change] = []
+        for role in sorted(rescan):
+            self._watch(role)
+            if role == "config.d":
+                changes.extend(self.state.rescan_config_d())
+            else:
+                changes.extend(self.state.rescan_keys())
+        for name in sorted(touched["config.d"]) if "config.d" not in rescan else ():
+            changes.extend(self.state.update_host_file(name))
+        for name in sorted(touched["keys"]) if "keys" not in rescan else ():
+            changes.extend(self.state.update_key_file(name))
+        return changes
+
+
+def _stat(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def _sig(path: Path) -> Optional[Tuple[int, int]]:
+    st = _stat(str(path))
+    return _sig_of(st) if st is not None else None
+
+
+def _sig_of(st: os.stat_result) -> Tuple[int, int]:
+    return st.st_mtime_ns, st.st_size
+
+
+def _is_regular(st: os.stat_result) -> bool:
+    return (st.st_mode & 0o170000) == 0o100000
+
+
+def _same_file(a: os.stat_result, b: os.stat_result) -> bool:
+    return _sig_of(a) == _sig_of(b) and (a.st_mode, a.st_ino) == (b.st_mode, b.st_ino)
+
+
+__all__ = [
+    "ADDED",
+    "RESOLVED",
+    "AuditWatcher",
+    "Change",
+    "IncrementalAudit",
+    "Inotify",
+    "InotifyEvent",
+]
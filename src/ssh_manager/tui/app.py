@@ -1,21 +1,31 @@
 from __future__ import annotations
 
 from textual.app import App, ComposeResult
-from textual.widgets import Header, Footer, Static, ListView, ListItem, Input, Button
+from textual.widgets import Header, Footer, Static, Input, Button, Checkbox
 from textual.screen import ModalScreen
 from textual.reactive import reactive
 from textual.containers import Horizontal, Vertical
-from textual import events
+from textual.geometry import Region, Size
+from textual.message import Message
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.timer import Timer
+from textual.worker import get_current_worker
+from textual import events, work
+from rich.markup import escape
+from rich.segment import Segment
 from pathlib import Path
-import subprocess
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar, cast
+import asyncio
+import bisect
+import os
 
-from ..core import parser, store
-from ..core.util import sanitize_filename
-from ..cli import regenerate_main_config  # reuse existing logic
+from ..core import audit, index, keygen, probe, search, settings, store, timing
+from ..core.mainconfig import regenerate_main_config
+from ..core.names import NameRegistry
 
-SSH_DIR = Path.home() / ".ssh"
-CONFIG_D_DIR = SSH_DIR / "config.d"
-KEYS_DIR = SSH_DIR / "keys"
+
+T = TypeVar("T")
 
 
 class HostRecord:
@@ -25,8 +35,187 @@ class HostRecord:
         self.host_cfg = host_cfg
 
 
-class HostList(ListView):  # pragma: no cover - thin widget wrapper
-    pass
+class HostList(ScrollView, can_focus=True):
+    """Virtualized host list.
+
+    Rows are kept as ``IndexedFile`` objects and drawn line by line in
+    ``render_line``, so only the visible rows are ever formatted no matter
+    how many hosts are loaded. Rows can be appended while loading.
+    """
+
+    BINDINGS = [
+        ("up", "cursor_up", "Up"),
+        ("down", "cursor_down", "Down"),
+        ("pageup", "page_up", "Page Up"),
+        ("pagedown", "page_down", "Page Down"),
+        ("home", "first", "First"),
+        ("end", "last", "Last"),
+    ]
+    COMPONENT_CLASSES = {"host-list--cursor", "host-list--error"}
+    DEFAULT_CSS = """
+    HostList { height: 1fr; }
+    HostList > .host-list--cursor { background: $accent; color: $text; text-style: bold; }
+    HostList > .host-list--error { color: $error; }
+    """
+
+    cursor: reactive[int] = reactive(-1, always_update=True)
+
+    class Highlighted(Message):
+        def __init__(self, row: Optional[index.IndexedFile]):
+            super().__init__()
+            self.row = row
+
+    def __init__(self, *, id: Optional[str] = None):
+        super().__init__(id=id)
+        self.rows: List[index.IndexedFile] = []
+        self._width = 0
+
+    @staticmethod
+    def label(row: index.IndexedFile) -> str:
+        h = row.host
+        if h is None:
+            return f"{row.name}: {row.error}"
+        return f"{' '.join(h.patterns)} ({h.user}@{h.hostname or h.host})"
+
+    def clear(self) -> None:
+        self.rows = []
+        self._width = 0
+        self.virtual_size = Size(0, 0)
+        self.cursor = -1
+        self.refresh()
+
+    def set_rows(self, rows: List[index.IndexedFile], cursor: int = 0, notify: bool = True) -> None:
+        """Show ``rows`` instead (e.g. a filtered view) with the cursor on
+        ``cursor``. With ``notify=False`` no Highlighted message is sent."""
+        self.rows = list(rows)
+        self.virtual_size = Size(self._width, len(self.rows))
+        self.scroll_to(0, 0, animate=False, immediate=True)
+        cursor = min(cursor, len(self.rows) - 1)
+        if notify:
+            self.cursor = cursor
+        else:
+            self.set_reactive(HostList.cursor, cursor)
+            if cursor >= 0:
+                self.scroll_to_region(
+                    Region(0, cursor, 1, 1), animate=False, immediate=True, x_axis=False
+                )
+        self.refresh()
+
+    def replace_row(self, old: index.IndexedFile, new: index.IndexedFile) -> None:
+        try:
+            i = self.rows.index(old)
+        except ValueError:
+            return
+        self.rows[i] = new
+        self.refresh()
+
+    def append_rows(self, rows: List[index.IndexedFile]) -> None:
+        if not rows:
+            return
+        self.rows.extend(rows)
+        self._width = max(self._width, *(len(self.label(r)) for r in rows))
+        self.virtual_size = Size(self._width, len(self.rows))
+        if self.cursor < 0:
+            self.cursor = 0
+        self.refresh()
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        i = scroll_y + y
+        width = self.scrollable_content_region.width
+        if i >= len(self.rows):
+            return Strip.blank(width, self.rich_style)
+        row = self.rows[i]
+        style = self.rich_style
+        if row.host is None:
+            style += self.get_component_rich_style("host-list--error")
+        if i == self.cursor:
+            style += self.get_component_rich_style("host-list--cursor")
+        text = self.label(row)
+        strip = Strip([Segment(text.ljust(max(width + scroll_x, len(text))), style)])
+        return strip.crop(scroll_x, scroll_x + width)
+
+    def validate_cursor(self, cursor: int) -> int:
+        return min(max(cursor, 0 if self.rows else -1), len(self.rows) - 1)
+
+    def watch_cursor(self, old: int, new: int) -> None:
+        for i in (old, new):
+            if i >= 0:
+                self.refresh(Region(0, i - self.scroll_offset.y, self.size.width, 1))
+        if new >= 0:
+            self.scroll_to_region(Region(0, new, 1, 1), animate=False, immediate=True, x_axis=False)
+        self.post_message(self.Highlighted(self.rows[new] if new >= 0 else None))
+
+    def action_cursor_up(self) -> None:
+        self.cursor -= 1
+
+    def action_cursor_down(self) -> None:
+        self.cursor += 1
+
+    def action_page_up(self) -> None:
+        self.cursor -= max(self.scrollable_content_region.height - 1, 1)
+
+    def action_page_down(self) -> None:
+        self.cursor += max(self.scrollable_content_region.height - 1, 1)
+
+    def action_first(self) -> None:
+        self.cursor = 0
+
+    def action_last(self) -> None:
+        self.cursor = len(self.rows) - 1
+
+    def on_click(self, event: events.Click) -> None:  # pragma: no cover - mouse glue
+        i = event.y + self.scroll_offset.y
+        if 0 <= i < len(self.rows):
+            self.cursor = i
+
+
+class JobStatus(Static):
+    """One line for background key jobs: a spinner with the running and
+    queued jobs, or the outcome of the last one when idle."""
+
+    FRAMES = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+    DEFAULT_CSS = """
+    JobStatus { height: 1; padding: 0 1; color: $text-muted; }
+    """
+
+    def __init__(self, *, id: Optional[str] = None):
+        super().__init__("", id=id)
+        self.jobs: Dict[str, str] = {}  # label -> "queued" | "running"
+        self.message = ""
+        self._frame = 0
+        self._timer: Optional[Timer] = None
+
+    def set_job(self, label: str, state: Optional[str]) -> None:
+        if state is None:
+            self.jobs.pop(label, None)
+        else:
+            self.jobs[label] = state
+        if self.jobs and self._timer is None:
+            self._timer = self.set_interval(0.1, self._tick)
+        elif not self.jobs and self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+        self._redraw()
+
+    def show(self, message: str) -> None:
+        self.message = message
+        self._redraw()
+
+    def _tick(self) -> None:
+        self._frame += 1
+        self._redraw()
+
+    def _redraw(self) -> None:
+        if not self.jobs:
+            self.update(escape(self.message))
+            return
+        running = [label for label, state in self.jobs.items() if state == "running"]
+        queued = len(self.jobs) - len(running)
+        text = f"{self.FRAMES[self._frame % len(self.FRAMES)]} {', '.join(running) or 'waiting'}"
+        if queued:
+            text += f" (+{queued} queued)"
+        self.update(escape(text + "  x: cancel"))
 
 
 class HostDetail(Vertical):
@@ -34,11 +223,18 @@ class HostDetail(Vertical):
     current: reactive[HostRecord | None] = reactive(None)
     status: reactive[str] = reactive("")
 
+    @property
+    def _app(self) -> SSHManagerApp:
+        """``self.app``, typed as the app this pane is built for."""
+        return cast(SSHManagerApp, self.app)
+
     def compose(self) -> ComposeResult:  # type: ignore[override]
         yield Static("Host Details", id="title")
         # Summary view (compact)
         self.summary = Static(id="host-summary")
         yield self.summary
+        self.badge = Static(id="reachability")
+        yield self.badge
         # Edit form (initially hidden)
         self.input_hostname = Input(placeholder="HostName", id="field-hostname")
         self.input_user = Input(placeholder="User", id="field-user")
@@ -70,24 +266,21 @@ class HostDetail(Vertical):
         self.current = rec
         if not rec:
             self.summary.update("No host selected")
+            self.badge.update("")
             self.status = ""
             self.disable_edit_mode()
             return
-        h = rec.host_cfg
-        self.render_summary(h)
-        self.input_hostname.value = h.hostname
-        self.input_user.value = h.user
-        self.input_port.value = str(h.port)
+        self.render_summary(rec.host_cfg)
+        self.show_reachability(rec.host_cfg)
         self.status = ""
         self.disable_edit_mode()
 
     def render_summary(self, h) -> None:
         # Compose a compact block replicating ssh config lines + extra options
-        lines = [
-            f"Host {h.host}",
-            f"HostName {h.hostname}",
-            f"User {h.user}",
-        ]
+        lines = [f"Host {' '.join(h.patterns)}"]
+        if h.hostname:
+            lines.append(f"HostName {h.hostname}")
+        lines.append(f"User {h.user}")
         if h.port != 22:
             lines.append(f"Port {h.port}")
         if h.identity_file:
@@ -97,9 +290,24 @@ class HostDetail(Vertical):
             lines.extend(o.strip() for o in h.extra_options)
         self.summary.update("\n".join(lines))
 
+    def show_reachability(self, h) -> None:
+        """Badge from the last saved probe of ``h``; never probes by itself."""
+        cache = self._app.probe_cache
+        result = cache.get(h) if cache is not None else None
+        if result is None:
+            self.badge.update("[dim]○ not probed (p to probe)[/]")
+            return
+        color = {probe.REACHABLE: "green", probe.UNREACHABLE: "red"}.get(result.status, "yellow")
+        self.badge.update(f"[{color}]●[/] {escape(probe.describe(result))}")
+
     def enable_edit_mode(self) -> None:
         if not self.current:
             return
+        # The form is only filled when it is shown
+        h = self.current.host_cfg
+        self.input_hostname.value = h.hostname
+        self.input_user.value = h.user
+        self.input_port.value = str(h.port)
         self.editing = True
         self.form_container.display = True
         self.query_one('#save', Button).disabled = False
@@ -133,9 +341,11 @@ class HostDetail(Vertical):
             h.port = int(self.input_port.value.strip()) if self.input_port.value.strip() else h.port
         except ValueError:
             self.status = "Invalid port; keeping previous"
-        store.write_host_config(CONFIG_D_DIR, h)
+        # Written back to its own file, whose name may differ from the alias
+        path = store.write_host_config(settings.config_d_dir(), h, self.current.file.name)
         regenerate_main_config()
         self.render_summary(h)
+        self._app.host_saved(path, h)
         changed = []
         if h.hostname != original[0]:
             changed.append("HostName")
@@ -153,29 +363,75 @@ class HostDetail(Vertical):
         if not self.current:
             return
         h = self.current.host_cfg
-        alias = h.host
+        # Keys are named after the host file, which is unique and has no wildcards
+        name = self.current.file.name
+        alias = self.current.file.stem
         key_type = 'ed25519'  # future: prompt
-        KEYS_DIR.mkdir(parents=True, exist_ok=True)
-        key_name = f"{alias}_{key_type}"
-        priv = KEYS_DIR / key_name
-        pub = KEYS_DIR / (key_name + '.pub')
+        keys_dir = settings.keys_dir()
+        priv, _ = keygen.key_paths(keys_dir, alias, key_type)
         if priv.exists():
             self.status = f"Key {priv.name} exists"
-            self.input_identity.value = str(priv)
             return
-        try:
-            cmd = ["ssh-keygen", "-t", key_type, "-f", str(priv), "-N", "", "-C", f"{h.user}@{h.hostname}"]
-            subprocess.run(cmd, check=True)
-            priv.chmod(0o600)
-            if pub.exists():
-                pub.chmod(0o644)
+
+        async def job() -> Path:
+            comment = f"{h.user}@{h.hostname or h.host}"
+            return await keygen.generate_key_async(keys_dir, alias, key_type, comment)
+
+        def done(priv: Path) -> str:
             h.identity_file = str(priv)
-            store.write_host_config(CONFIG_D_DIR, h)
+            path = store.write_host_config(settings.config_d_dir(), h, name)
             regenerate_main_config()
-            self.render_summary(h)
-            self.status = f"Generated key {priv.name}"
-        except Exception as exc:  # pragma: no cover - subprocess error visual only
-            self.status = f"Key gen failed: {exc}"
+            self._app.host_saved(path, h)
+            if self.current is not None and self.current.host_cfg is h:
+                self.render_summary(h)
+            return f"Generated key {priv.name}"
+
+        if self._app.run_key_job(priv.name, job, done):
+            self.status = f"Generating {priv.name}..."
+
+    def action_copy_id(self) -> None:
+        if not self.current:
+            return
+        h = self.current.host_cfg
+        if not h.identity_file:
+            self.status = "No IdentityFile to copy"
+            return
+        pub = Path(os.path.expanduser(h.identity_file) + ".pub")
+        if not pub.exists():
+            self.status = f"{pub.name} not found"
+            return
+
+        async def job() -> None:
+            await keygen.copy_id_async(h.user, h.hostname or h.host, pub, h.port)
+
+        def done(_: None) -> str:
+            return f"Copied {pub.name} to {h.user}@{h.hostname or h.host}"
+
+        if self._app.run_key_job(f"ssh-copy-id {h.host}", job, done):
+            self.status = f"Copying {pub.name} to {h.host}..."
+
+    def action_probe(self) -> None:
+        if not self.current:
+            return
+        h = self.current.host_cfg
+        via = probe.proxied(h)
+        if via is not None:
+            self.status = f"{h.host} is reached through {via}; not probed"
+            return
+        if self._app.probe_cache is None:
+            self.status = "Hosts are still loading"
+            return
+        self.badge.update(f"[dim]○ probing {escape(h.hostname or h.host)}:{h.port}...[/]")
+
+        async def job() -> None:
+            result = await probe.probe_host(probe.Target.from_host(h), banner=True)
+            await self._app.save_probes([result])
+            if self.current is not None and self.current.host_cfg is h:
+                self.show_reachability(h)
+
+        self._app.run_worker(
+            job(), group="probes", description=f"probe {h.host}", exit_on_error=False
+        )
 
     # Button press handling
     def on_button_pressed(self, event: Button.Pressed) -> None:  # pragma: no cover - UI glue
@@ -197,55 +453,249 @@ class SSHManagerApp(App):
         ("e", "edit", "Edit"),
         ("s", "save", "Save"),
         ("g", "generate_key", "Gen Key"),
+        ("c", "copy_id", "Copy ID"),
+        ("x", "cancel_jobs", "Cancel Jobs"),
         ("escape", "cancel", "Cancel"),
         ("n", "new_host", "New Host"),
+        ("a", "audit", "Audit"),
+        ("slash", "search", "Search"),
+        ("p", "probe", "Probe"),
     ]
 
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        # Every loaded row in name order, and the same rows by file name
+        self._all_rows: List[index.IndexedFile] = []
+        self._rows_by_name: Dict[str, index.IndexedFile] = {}
+
     def compose(self) -> ComposeResult:  # type: ignore[override]
         yield Header(show_clock=True)
+        self.search_box = Input(placeholder="Search (/)", id="search")
         self.host_list = HostList(id="hosts")
         self.detail = HostDetail(id="detail")
         layout = Horizontal(
-            Vertical(Static("Hosts", id="hosts_title"), self.host_list, id="left"),
+            Vertical(Static("Hosts", id="hosts_title"), self.search_box, self.host_list, id="left"),
             self.detail,
             id="main"
         )
         yield layout
+        self.jobs_bar = JobStatus(id="jobs")
+        yield self.jobs_bar
         yield Footer()
 
+    # Rows handed to the UI per batch while loading; the first batch is small
+    # so the list paints as soon as a screenful is parsed
+    LOAD_BATCH = 2000
+    FIRST_BATCH = 100
+    # Detail rendering waits for the cursor to rest this long (seconds)
+    DETAIL_DELAY = 0.05
+    # Key generation / ssh-copy-id processes run at once; more are queued
+    KEY_JOBS = 2
+
+    hosts_loaded: reactive[bool] = reactive(False)
+    _detail_timer: Optional[Timer] = None
+    # Search index and alias table over the loaded rows (installed once
+    # loading finishes)
+    search_index: Optional[search.SearchIndex] = None
+    aliases: Optional[index.AliasTable] = None
+    _key_slots: Optional[asyncio.Semaphore] = None
+    # Last probe per host (loaded with the hosts) for the detail badge
+    probe_cache: Optional[probe.ProbeCache] = None
+    _probe_save: Optional[asyncio.Lock] = None
+
     def on_mount(self) -> None:  # pragma: no cover - simple load
+        if timing.mode_from_env(os.environ.get(timing.ENV_VAR)):
+            timing.start()  # load timings are shown in the jobs bar
         self.refresh_hosts()
+        self.host_list.focus()
 
     def refresh_hosts(self) -> None:
+        """Reload the host list in a background worker."""
+        self.hosts_loaded = False
+        self._all_rows = []
+        self._rows_by_name = {}
+        self.search_index = None
+        self.aliases = None
+        self.probe_cache = None
         self.host_list.clear()
-        records = []
-        for file in sorted(CONFIG_D_DIR.glob("*.conf")):
-            try:
-                host_cfg = parser.parse_host_file(file.read_text(encoding="utf-8"))
-                rec = HostRecord(file, host_cfg)
-                records.append(rec)
-            except Exception as exc:  # pragma: no cover
-                item = ListItem(Static(f"[red]{file.name}: {exc}"))
-                self.host_list.append(item)
-        for rec in records:
-            label = f"{rec.host_cfg.host} ({rec.host_cfg.user}@{rec.host_cfg.hostname})"
-            item = ListItem(Static(label))
-            item.data = rec  # attach
-            self.host_list.append(item)
-        if records:
-            self.detail.set_record(records[0])
-            self.host_list.index = 0
-        else:
+        recorder = timing.active()
+        if recorder is not None:
+            recorder.reset()
+        self.query_one("#hosts_title", Static).update("Hosts (loading...)")
+        self._load_hosts()
+
+    @work(thread=True, exclusive=True, group="load-hosts")
+    def _load_hosts(self) -> None:
+        worker = get_current_worker()
+        batch: List[index.IndexedFile] = []
+        limit = self.FIRST_BATCH
+        # Built here, off the UI thread, and handed over when complete
+        idx = search.SearchIndex()
+        aliases = index.AliasTable()
+        # Served from the parse index; only changed files are reparsed
+        files = index.iter_host_files(settings.config_d_dir(), settings.cache_dir())
+        for loaded in timing.timed(files, "load hosts"):
+            if worker.is_cancelled:
+                return
+            batch.append(loaded)
+            if loaded.host is not None:
+                idx.add(loaded.name, loaded.host)
+                aliases.add(loaded)
+            if len(batch) >= limit:
+                self.call_from_thread(self._add_rows, batch)
+                batch, limit = [], self.LOAD_BATCH
+        with timing.span("search index"):
+            idx.ensure_postings()
+        probes = probe.ProbeCache(settings.cache_dir())
+        probes.load()
+        if not worker.is_cancelled:
+            self.call_from_thread(self._finish_load, batch, idx, aliases, probes)
+
+    def _add_rows(self, rows: List[index.IndexedFile]) -> None:
+        self._all_rows.extend(rows)
+        self._rows_by_name.update((r.name, r) for r in rows)
+        if not self.search_box.value.strip():
+            self.host_list.append_rows(rows)
+
+    def _finish_load(self, batch: List[index.IndexedFile], idx: search.SearchIndex,
+                     aliases: index.AliasTable, probes: probe.ProbeCache) -> None:
+        self._add_rows(batch)
+        self.search_index = idx
+        self.aliases = aliases
+        self.probe_cache = probes
+        if self.search_box.value.strip():
+            self.apply_filter()  # typed while loading
+        self._update_title()
+        if not self.host_list.rows:
             self.detail.set_record(None)
+        elif self.detail.current is not None:
+            self.detail.show_reachability(self.detail.current.host_cfg)
+        recorder = timing.active()
+        if recorder is not None:
+            self.jobs_bar.show(f"Loaded {len(self._all_rows)} hosts in {recorder.elapsed:.2f}s: "
+                               f"{recorder.summary()}")
+        self.hosts_loaded = True
+
+    def _update_title(self) -> None:
+        shown, total = len(self.host_list.rows), len(self._all_rows)
+        title = f"Hosts ({total})" if shown == total else f"Hosts ({shown} of {total})"
+        self.query_one("#hosts_title", Static).update(title)
+
+    def apply_filter(self) -> None:
+        """Show the hosts matching the search box, best match first."""
+        query = self.search_box.value.strip()
+        if not query:
+            self.host_list.set_rows(self._all_rows)
+        elif self.search_index is not None:
+            matches = self.search_index.search(query)
+            self.host_list.set_rows([self._rows_by_name[m.doc_id] for m in matches])
+        else:
+            return  # still loading; applied by _finish_load
+        self._update_title()
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        if event.input is self.search_box:
+            self.apply_filter()
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        if event.input is self.search_box:
+            self.host_list.focus()
+
+    def action_search(self) -> None:
+        self.search_box.focus()
+
+    def host_saved(self, path: Path, host) -> None:
+        """Reflect a host written by the detail pane or the new-host form
+        without reloading: update its row and the search index in place."""
+        row = index.IndexedFile(path.parent, path.name, host)
+        if self.search_index is not None:
+            self.search_index.add(path.name, host)
+        if self.aliases is not None:
+            self.aliases.add(row)
+        old = self._rows_by_name.get(path.name)
+        self._rows_by_name[path.name] = row
+        if old is not None:
+            # Edited in place: keep the current view and cursor as they are
+            self._all_rows[self._all_rows.index(old)] = row
+            self.host_list.replace_row(old, row)
+            return
+        names = [r.name for r in self._all_rows]
+        self._all_rows.insert(bisect.bisect(names, path.name), row)
+        if self.search_box.value.strip():
+            self.apply_filter()
+            return
+        self.host_list.set_rows(self._all_rows, cursor=self._all_rows.index(row), notify=False)
+        self._show_detail(row)
+        self._update_title()
+
+    def host_names(self) -> Optional[NameRegistry]:
+        """Names of the loaded host files, so a new alias can be checked
+        without rescanning config.d; None until the first load finishes."""
+        return NameRegistry.from_files(self._rows_by_name) if self.hosts_loaded else None
+
+    def run_key_job(self, label: str, job: Callable[[], Awaitable[T]],
+                    done: Callable[[T], str]) -> bool:
+        """Run ``job`` in a worker once one of the ``KEY_JOBS`` slots is free.
+
+        ``done`` applies the result on the UI and returns the message shown
+        in the jobs bar. Returns False if a job with ``label`` is pending.
+        """
+        if label in self.jobs_bar.jobs:
+            self.jobs_bar.show(f"{label} is already in progress")
+            return False
+        if self._key_slots is None:
+            self._key_slots = asyncio.Semaphore(self.KEY_JOBS)
+        slots = self._key_slots
+        self.jobs_bar.set_job(label, "queued")
+
+        async def runner() -> None:
+            message = f"{label} cancelled"
+            try:
+                async with slots:
+                    self.jobs_bar.set_job(label, "running")
+                    result = await job()
+                message = done(result)
+            except (keygen.KeyGenError, OSError) as exc:
+                message = f"{label} failed: {exc}"
+            finally:
+                self.jobs_bar.set_job(label, None)
+                self.jobs_bar.show(message)
+
+        self.run_worker(runner(), group="key-jobs", description=label, exit_on_error=False)
+        return True
+
+    async def save_probes(self, results: List[probe.ProbeResult]) -> None:
+        """Record probe results and write the cache off the UI thread."""
+        if self.probe_cache is None:
+            return
+        if self._probe_save is None:
+            self._probe_save = asyncio.Lock()
+        cache = self.probe_cache
+        # Held while entries change too: the writer thread serializes them
+        async with self._probe_save:
+            cache.put(results)
+            await asyncio.to_thread(cache.save)
+
+    def action_cancel_jobs(self) -> None:
+        self.workers.cancel_group(self, "key-jobs")
 
     def action_refresh(self) -> None:
         self.refresh_hosts()
         self.detail.status = "Refreshed"
 
-    def on_list_view_highlighted(self, message: ListView.Highlighted) -> None:  # pragma: no cover - UI event
-        item = message.item
-        if hasattr(item, 'data') and item.data:
-            self.detail.set_record(item.data)
+    def on_host_list_highlighted(self, message: HostList.Highlighted) -> None:
+        # Holding a key down moves the cursor many rows per second; only the
+        # row it stops on gets its detail rendered
+        if self._detail_timer is not None:
+            self._detail_timer.stop()
+        row = message.row
+        self._detail_timer = self.set_timer(self.DETAIL_DELAY, lambda: self._show_detail(row))
+
+    def _show_detail(self, row: Optional[index.IndexedFile]) -> None:
+        if row is None or row.host is None:
+            self.detail.set_record(None)
+        else:
+            self.detail.set_record(HostRecord(row.path, row.host))
 
     # Key binding actions
     def action_edit(self) -> None:
@@ -257,12 +707,69 @@ class SSHManagerApp(App):
     def action_generate_key(self) -> None:
         self.detail.action_generate_key()
 
+    def action_copy_id(self) -> None:
+        self.detail.action_copy_id()
+
+    def action_probe(self) -> None:
+        self.detail.action_probe()
+
     def action_cancel(self) -> None:
+        if self.focused is self.search_box:
+            self.search_box.value = ""
+            self.host_list.focus()
+            return
         self.detail.action_cancel()
 
     def action_new_host(self) -> None:
         self.push_screen(NewHostModal(app=self))
 
+    def action_audit(self) -> None:
+        self._run_audit()
+
+    @work(thread=True, exclusive=True, group="audit")
+    def _run_audit(self) -> None:
+        # Off the UI thread: a large keys/ dir takes a while to stat and hash
+        result = audit.audit_layout(
+            settings.config_d_dir(), settings.keys_dir(), settings.cache_dir()
+        )
+        self.call_from_thread(self._show_audit, result)
+
+    def _show_audit(self, result: audit.AuditResult) -> None:
+        self.push_screen(AuditModal(result))
+
+
+class AuditModal(ModalScreen[None]):  # pragma: no cover - interactive UI
+    """Audit findings overlay (same engine as ``ssh-manager audit``)."""
+
+    BINDINGS = [("escape", "dismiss", "Close"), ("a", "dismiss", "Close")]
+
+    def __init__(self, result: audit.AuditResult):
+        super().__init__()
+        self._result = result
+
+    def compose(self) -> ComposeResult:  # type: ignore[override]
+        colors = {
+            audit.Severity.ERROR: "red",
+            audit.Severity.WARNING: "yellow",
+            audit.Severity.INFO: "blue",
+        }
+        count = len(self._result.findings)
+        lines = [f"Audit: {self._result.host_count} hosts, {count} finding(s)", ""]
+        for f in self._result.findings:
+            color = colors[f.severity]
+            lines.append(f"[{color}]{f.severity.value.upper():7}[/{color}] {escape(f.message)}")
+        if not self._result.findings:
+            lines.append("No issues detected")
+        yield Vertical(
+            Static("\n".join(lines), id="audit-body"),
+            Button("Close (esc)", id="audit-close"),
+            id="audit-panel",
+        )
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == 'audit-close':
+            self.dismiss(None)
+
 
 class NewHostModal(ModalScreen[None]):  # pragma: no cover - interactive UI
     def __init__(self, app: SSHManagerApp):
@@ -282,6 +789,7 @@ class NewHostModal(ModalScreen[None]):  # pragma: no cover - interactive UI
         yield Input(id="new-port", value="22")
         yield Static("KeyType (ed25519 or rsa):")
         yield Input(id="new-keytype", value="ed25519")
+        yield Checkbox("Run ssh-copy-id (needs existing key or agent access)", id="new-copy-id")
         yield Horizontal(Button("Create", id="create"), Button("Cancel", id="cancel-new"))
         yield Static("", id="new-status")
 
@@ -314,45 +822,53 @@ class NewHostModal(ModalScreen[None]):  # pragma: no cover - interactive UI
         if not alias_raw:
             self._set_status("Host alias required")
             return
-        alias = sanitize_filename(alias_raw)
-        hostname = self._get_input('new-hostname').value.strip() or alias
+        hostname = self._get_input('new-hostname').value.strip() or None
         user = self._get_input('new-user').value.strip() or 'root'
         port_str = self._get_input('new-port').value.strip() or '22'
         key_type = self._get_input('new-keytype').value.strip() or 'ed25519'
+        copy = self.query_one('#new-copy-id', Checkbox).value
         try:
             port = int(port_str)
         except ValueError:
             self._set_status("Invalid port")
             return
-        # Check duplicate
-        if (CONFIG_D_DIR / f"{alias}.conf").exists():
-            self._set_status("Host already exists")
-            return
-        # Generate key
-        key_name = f"{alias}_{key_type}"
-        KEYS_DIR.mkdir(parents=True, exist_ok=True)
-        priv = KEYS_DIR / key_name
-        pub = KEYS_DIR / (key_name + '.pub')
-        if priv.exists():
-            self._set_status("Key already exists; aborting")
-            return
+        config_d, keys_dir = settings.config_d_dir(), settings.keys_dir()
+        # Existing host or key is reported here; the key itself is generated
+        # in the background so the modal closes right away
         try:
-            cmd = ["ssh-keygen", "-t", key_type, "-f", str(priv), "-N", "", "-C", f"{user}@{hostname}"]
-            subprocess.run(cmd, check=True)
-            priv.chmod(0o600)
-            if pub.exists():
-                pub.chmod(0o644)
-        except Exception as exc:
-            self._set_status(f"Keygen failed: {exc}")
+            hc = keygen.plan_host(config_d, keys_dir, alias_raw, hostname, user, port, key_type,
+                                  self._app.host_names())
+        except keygen.KeyGenError as exc:
+            self._set_status(str(exc))
             return
-        # Write host config
-        from ..core.model import HostConfig
-        hc = HostConfig(host=alias, hostname=hostname, user=user, port=port, identity_file=str(priv))
-        store.write_host_config(CONFIG_D_DIR, hc)
-        regenerate_main_config()
-        self._app.refresh_hosts()
-        # Select newly added host
-        self._app.detail.status = f"Created host {alias}" 
+        # An alias can also be taken by another name of a multi-alias block
+        owner = self._app.aliases.get(hc.host) if self._app.aliases is not None else None
+        if owner is not None:
+            self._set_status(f"{hc.host} is already an alias in {owner.name}")
+            return
+        app = self._app
+
+        async def job() -> Tuple[Path, Optional[keygen.KeyGenError]]:
+            path = await keygen.create_host_async(config_d, keys_dir, hc, key_type)
+            copy_error = None
+            if copy:
+                try:
+                    pub = Path(f"{hc.identity_file}.pub")
+                    await keygen.copy_id_async(user, hc.hostname, pub, port)
+                except keygen.KeyGenError as exc:
+                    copy_error = exc
+            return path, copy_error
+
+        def done(result: Tuple[Path, Optional[keygen.KeyGenError]]) -> str:
+            path, copy_error = result
+            regenerate_main_config()
+            app.host_saved(path, hc)
+            if copy_error is not None:
+                return f"Created host {hc.host}; {copy_error}"
+            return f"Created host {hc.host}"
+
+        if app.run_key_job(f"new host {hc.host}", job, done):
+            app.detail.status = f"Creating host {hc.host}..."
         self.dismiss(None)
 
 
@@ -0,0 +1,131 @@
+"""Stand-in SSH server (paramiko) for deploy tests and benchmarks.
+
+Accepts password logins for any user and runs exec requests with /bin/sh
+in ``root/<user>`` as the home directory, so remote commands touch only
+the temporary tree. ``drop`` closes that many of the first connections
+before the handshake and ``delay`` stalls each handshake, to exercise
+retries and timeouts.
+"""
+from __future__ import annotations
+
+import logging
+import socket
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import paramiko
+
+# Clients hanging up right after the exit status make paramiko log resets
+logging.getLogger("paramiko").setLevel(logging.CRITICAL)
+
+_HOST_KEY: Optional[paramiko.PKey] = None
+
+
+def host_key() -> paramiko.PKey:
+    global _HOST_KEY
+    if _HOST_KEY is None:
+        _HOST_KEY = paramiko.ECDSAKey.generate()
+    return _HOST_KEY
+
+
+class _Interface(paramiko.ServerInterface):
+    def __init__(self, server: "StubSSHServer"):
+        self.server = server
+        self.command: Optional[bytes] = None
+        self.user = ""
+        self.ready = threading.Event()
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        if password == self.server.password:
+            self.user = username
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED if kind == "session" else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        self.command = command
+        self.ready.set()
+        return True
+
+
+class StubSSHServer:
+    def __init__(self, root: Path, password: str = "secret", drop: int = 0, delay: float = 0.0):
+        self.root = root
+        self.password = password
+        self.drop = drop
+        self.delay = delay
+        self.connections = 0
+        self.commands: List[str] = []
+        self._lock = threading.Lock()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(512)
+        self.port = self._sock.getsockname()[1]
+        self._closed = False
+        self._thread = threading.Thread(target=self._accept, daemon=True)
+
+    def __enter__(self) -> "StubSSHServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._closed = True
+        self._sock.close()
+
+    def home(self, user: str) -> Path:
+        return self.root / user
+
+    def known_hosts_line(self) -> str:
+        key = host_key()
+        return f"[127.0.0.1]:{self.port} {key.get_name()} {key.get_base64()}\n"
+
+    def _accept(self) -> None:
+        while not self._closed:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            with self._lock:
+                self.connections += 1
+                dropped = self.connections <= self.drop
+            if dropped:
+                conn.close()
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket) -> None:
+        if self.delay:
+            time.sleep(self.delay)
+        transport = paramiko.Transport(conn)
+        transport.add_server_key(host_key())
+        iface = _Interface(self)
+        try:
+            transport.start_server(server=iface)
+            channel = transport.accept(10)
+            if channel is None or not iface.ready.wait(10):
+                return
+            command = iface.command.decode()
+            with self._lock:
+                self.commands.append(command)
+            home = self.home(iface.user)
+            home.mkdir(parents=True, exist_ok=True)
+            proc = subprocess.run(["/bin/sh", "-c", command], cwd=home, capture_output=True,
+                                  env={"HOME": str(home), "PATH": "/usr/bin:/bin"})
+            channel.sendall(proc.stdout)
+            channel.sendall_stderr(proc.stderr)
+            channel.send_exit_status(proc.returncode)
+            channel.close()
+            transport.join(10)  # let the client hang up first
+        except (paramiko.SSHException, EOFError, OSError):
+            pass
+        finally:
+            transport.close()
@@ -0,0 +1,63 @@
+import threading
+import time
+
+from ssh_manager.core import audit, index
+
+
+def _layout(tmp_path):
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    keys = tmp_path / '.ssh' / 'keys'
+    cfgd.mkdir(parents=True)
+    keys.mkdir()
+    elsewhere = tmp_path / 'elsewhere'
+    elsewhere.mkdir()
+    (elsewhere / 'id_rsa').write_text('K', encoding='utf-8')
+    for name in ['id_rsa', 'web_ed25519']:
+        (keys / name).write_text('K', encoding='utf-8')
+        (keys / name).chmod(0o600)
+    (keys / 'web_ed25519.pub').write_text('P', encoding='utf-8')
+    (cfgd / 'web.conf').write_text(
+        'Host web\n  HostName w\n  IdentityFile ~/.ssh/keys/web_ed25519\n'
+        '  IdentityFile ~/.ssh/keys/gone\n', encoding='utf-8')
+    # Same basename as keys/id_rsa but a different file: must not count as a reference
+    (cfgd / 'db.conf').write_text(f'Host db\n  HostName d\n  IdentityFile {elsewhere}/id_rsa\n',
+                                  encoding='utf-8')
+    (cfgd / 'db2.conf').write_text('Host db\n  HostName d2\n', encoding='utf-8')
+    return cfgd, keys
+
+
+def test_findings_use_full_paths_and_severities(tmp_path):
+    cfgd, keys = _layout(tmp_path)
+    (keys / 'id_rsa').chmod(0o644)
+    result = audit.audit_layout(cfgd, keys, home=tmp_path)
+    report = result.to_report()
+    assert report['host_count'] == 3
+    assert report['duplicates'] == ['db']
+    assert report['orphaned_private_keys'] == ['id_rsa']
+    assert report['missing_referenced_keys'] == [str(tmp_path / '.ssh' / 'keys' / 'gone')]
+    assert report['bad_key_permissions'] == ['id_rsa (mode 0o644)']
+    severities = {f.code: f.severity for f in result.findings}
+    assert severities[audit.ORPHANED_KEY] is audit.Severity.WARNING
+    assert severities[audit.MISSING_KEY] is audit.Severity.ERROR
+
+
+def test_thread_pool_gives_same_result(tmp_path, monkeypatch):
+    cfgd, keys = _layout(tmp_path)
+    hosts = index.load_host_files(cfgd)
+    serial = audit.run_audit(hosts, keys, home=tmp_path, workers=1)
+    monkeypatch.setattr(audit, '_MIN_CHUNK', 1)
+    pooled = audit.run_audit(hosts, keys, home=tmp_path, workers=4)
+    assert pooled.findings == serial.findings
+
+
+def test_a_few_hundred_paths_are_spread_over_the_workers():
+    threads = set()
+
+    def stat(n):
+        threads.add(threading.get_ident())
+        time.sleep(0.001)  # a slow network-filesystem stat
+        return n * 2
+
+    paths = list(range(300))
+    assert audit._map_batched(stat, paths, workers=8) == [n * 2 for n in paths]
+    assert len(threads) > 1
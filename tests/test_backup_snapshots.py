@@ -0,0 +1,113 @@
+import json
+import os
+import tarfile
+
+from click.testing import CliRunner
+
+from ssh_manager.cli import main
+from ssh_manager.core import backup
+
+
+def _tree(ssh):
+    (ssh / 'config.d').mkdir(parents=True)
+    (ssh / 'keys').mkdir()
+    (ssh / 'config').write_text('Include config.d/*.conf\n', encoding='utf-8')
+    (ssh / 'config.d' / 'a.conf').write_text('Host a\n  HostName a\n', encoding='utf-8')
+    key = ssh / 'keys' / 'a_ed25519'
+    key.write_text('PRIVATE', encoding='utf-8')
+    key.chmod(0o600)
+
+
+def test_unchanged_snapshot_reuses_objects(tmp_path, monkeypatch):
+    ssh = tmp_path / '.ssh'
+    backups = ssh / 'manager_backups'
+    _tree(ssh)
+    first = backup.create_snapshot(ssh, backups)
+
+    def no_hashing(path):
+        raise AssertionError(f'unchanged file re-hashed: {path}')
+    monkeypatch.setattr(backup, 'file_sha256', no_hashing)
+    second = backup.create_snapshot(ssh, backups)
+    assert first != second
+    assert [p.name for p in second.iterdir()] == ['manifest.json.gz']
+    entries = {e.path: e for e in backup.load_manifest(second)}
+    assert sorted(entries) == ['config', 'config.d/a.conf', 'keys/a_ed25519']
+    assert entries['keys/a_ed25519'].mode == 0o600
+    objects = [p for p in (backups / 'objects').rglob('*') if p.is_file()]
+    assert len(objects) == 3
+
+
+def test_changed_file_gets_new_object(tmp_path):
+    ssh = tmp_path / '.ssh'
+    backups = ssh / 'manager_backups'
+    _tree(ssh)
+    first = backup.create_snapshot(ssh, backups)
+    (ssh / 'config.d' / 'a.conf').write_text('Host a\n  HostName changed\n', encoding='utf-8')
+    second = backup.create_snapshot(ssh, backups)
+    old = {e.path: e.sha256 for e in backup.load_manifest(first)}
+    new = {e.path: e.sha256 for e in backup.load_manifest(second)}
+    assert old['config'] == new['config']
+    assert old['config.d/a.conf'] != new['config.d/a.conf']
+    obj = backup.object_path(backups, new['config.d/a.conf'])
+    assert obj.read_text().endswith('changed\n')
+    assert backup.verify_snapshot(first).ok and backup.verify_snapshot(second).ok
+
+
+def test_new_files_are_hashed_while_copied(tmp_path, monkeypatch):
+    ssh = tmp_path / '.ssh'
+    backups = ssh / 'manager_backups'
+    _tree(ssh)
+    (ssh / 'keys' / 'a_copy').write_text('PRIVATE', encoding='utf-8')  # same bytes as a_ed25519
+
+    def no_hashing(path):
+        raise AssertionError(f'new file read twice: {path}')
+    monkeypatch.setattr(backup, 'file_sha256', no_hashing)
+    snap = backup.create_snapshot(ssh, backups)
+    entries = {e.path: e for e in backup.load_manifest(snap)}
+    assert entries['keys/a_copy'].sha256 == entries['keys/a_ed25519'].sha256
+    obj = backup.object_path(backups, entries['config.d/a.conf'].sha256)
+    assert obj.read_text() == 'Host a\n  HostName a\n'
+    objects = [p for p in (backups / 'objects').rglob('*') if p.is_file()]
+    assert len(objects) == 3  # the duplicate key is stored once, no temp files left
+    monkeypatch.undo()
+    assert backup.verify_snapshot(snap).ok
+
+
+def test_cli_backup_verify_detects_corruption(monkeypatch, tmp_path):
+    from pathlib import Path as _P
+    monkeypatch.setattr(_P, 'home', lambda: tmp_path)
+    _tree(tmp_path / '.ssh')
+    runner = CliRunner()
+    assert runner.invoke(main, ['backup']).exit_code == 0
+    result = runner.invoke(main, ['backup', 'verify', '--json'])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)[0]['checked'] == 3
+
+    backups = tmp_path / '.ssh' / 'manager_backups'
+    snap = backup.list_snapshots(backups)[-1]
+    entry = next(e for e in backup.load_manifest(snap) if e.path == 'config')
+    obj = backup.object_path(backups, entry.sha256)
+    obj.chmod(0o600)
+    obj.write_text('x' * entry.size, encoding='utf-8')
+    result = runner.invoke(main, ['backup', 'verify', snap.name])
+    assert result.exit_code == 1
+    assert 'config: object' in result.output and 'corrupt' in result.output
+
+
+def test_archive_snapshot_preserves_modes_and_verifies(tmp_path):
+    ssh = tmp_path / '.ssh'
+    backups = ssh / 'manager_backups'
+    _tree(ssh)
+    key = ssh / 'keys' / 'a_ed25519'
+    os.utime(key, (1_600_000_000, 1_600_000_000))
+    archive = backup.create_archive(ssh, backups, 'tar.gz')
+    assert archive.name.endswith('.tar.gz')
+    assert backup.list_snapshots(backups) == [archive]
+    with tarfile.open(archive) as tar:
+        names = tar.getnames()
+        info = tar.getmember('keys/a_ed25519')
+    assert names[-1] == 'manifest.json'
+    assert info.mode & 0o777 == 0o600
+    assert info.mtime == 1_600_000_000
+    report = backup.verify_snapshot(archive)
+    assert report.ok and report.checked == 3
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+import click
+from click.testing import CliRunner
+
+from ssh_manager.cli import COMMANDS, main
+
+
+def _loaded_after(args, tmp_path):
+    """Modules imported by a fresh interpreter running ``ssh-manager args``."""
+    code = ('import sys\n'
+            'from ssh_manager.cli import main\n'
+            f'try:\n    main({args!r})\nexcept SystemExit:\n    pass\n'
+            'print(" ".join(sorted(sys.modules)), file=sys.stderr)\n')
+    env = dict(os.environ, HOME=str(tmp_path), PYTHONPATH=os.pathsep.join(sys.path))
+    proc = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+    return proc.stdout, set(proc.stderr.split())
+
+
+def test_help_and_single_commands_import_only_what_they_use(tmp_path):
+    out, modules = _loaded_after(['--help'], tmp_path)
+    assert 'resolve' in out and 'Show the options ssh will apply' in out
+    assert not {m for m in modules if m.startswith(('ssh_manager.core', 'ssh_manager.commands'))}
+    assert not modules & {'json', 'subprocess', 'yaml', 'paramiko'}
+
+    _, modules = _loaded_after(['build'], tmp_path)
+    assert 'ssh_manager.commands.build' in modules
+    assert not modules & {'ssh_manager.commands.deploy', 'ssh_manager.core.deploy', 'paramiko', 'yaml'}
+
+
+def test_listed_summaries_match_the_commands(tmp_path):
+    ctx = click.Context(main)
+    for name, (_, summary) in COMMANDS.items():
+        cmd = main.get_command(ctx, name)
+        assert cmd is not None and cmd.name == name
+        assert cmd.get_short_help_str(limit=200) == summary, name
+
+
+def test_unknown_commands_are_still_rejected():
+    result = CliRunner().invoke(main, ['nope'])
+    assert result.exit_code == 2 and 'No such command' in result.output
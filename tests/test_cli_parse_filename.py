@@ -32,14 +32,14 @@ def test_cli_parse_uses_first_alias_and_no_spaces(monkeypatch, tmp_path):
     files = sorted(p.name for p in cfgd.glob('*.conf'))
     assert 'alpha-server.conf' in files
     assert 'beta.conf' in files
-    assert 'conf.conf' in files  # from *.conf
+    assert 'wildcard.conf' in files  # from *.conf wildcard: the first name, not the pattern
     assert 'bigbastard.conf' in files
     for name in files:
         assert ' ' not in name
 
-    # Ensure host alias inside file matches first alias
+    # File is named after the first alias and keeps every alias of the block
     alpha_text = (cfgd / 'alpha-server.conf').read_text()
-    assert alpha_text.splitlines()[0].strip() == 'Host alpha-server'
+    assert alpha_text.splitlines()[0].strip() == 'Host alpha-server alpha2 alpha3'
 
     # Ensure main config was regenerated
     assert (ssh_dir / 'config').exists()
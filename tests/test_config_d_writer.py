@@ -0,0 +1,152 @@
+import os
+import threading
+
+import pytest
+
+from ssh_manager.core import store
+from ssh_manager.core.model import HostConfig
+
+
+def _siblings(tmp_path):
+    return sorted(p.name for p in tmp_path.iterdir() if p.name != '.config.d.lock')
+
+
+def test_transaction_writes_changed_files_and_keeps_others(tmp_path):
+    cfgd = tmp_path / 'config.d'
+    cfgd.mkdir()
+    keep = cfgd / 'manual.conf'
+    keep.write_text('Host manual\n  HostName m\n', encoding='utf-8')
+    same = store.write_host_config(cfgd, HostConfig('same', 'same.example'))
+    same_inode = same.stat().st_ino
+
+    with store.ConfigDWriter(cfgd) as tx:
+        tx.write(HostConfig('same', 'same.example'))
+        tx.write(HostConfig('new', 'new.example'))
+    assert (tx.written, tx.unchanged) == (1, 1)
+    assert sorted(p.name for p in cfgd.iterdir()) == ['manual.conf', 'new.conf', 'same.conf']
+    assert (cfgd / 'same.conf').stat().st_ino == same_inode  # linked, not rewritten
+    assert 'HostName new.example' in (cfgd / 'new.conf').read_text()
+    assert _siblings(tmp_path) == ['config.d']
+
+
+def test_no_changes_leaves_directory_untouched(tmp_path):
+    cfgd = tmp_path / 'config.d'
+    store.write_host_config(cfgd, HostConfig('a', 'a.example'))
+    dir_inode = cfgd.stat().st_ino
+    with store.ConfigDWriter(cfgd) as tx:
+        tx.write(HostConfig('a', 'a.example'))
+    assert tx.written == 0
+    assert cfgd.stat().st_ino == dir_inode
+
+
+def test_failure_mid_batch_rolls_back(tmp_path):
+    cfgd = tmp_path / 'config.d'
+    store.write_host_config(cfgd, HostConfig('a', 'a.example'))
+    with pytest.raises(RuntimeError):
+        with store.ConfigDWriter(cfgd) as tx:
+            tx.write(HostConfig('a', 'changed.example'))
+            tx.write(HostConfig('b', 'b.example'))
+            raise RuntimeError('crash')
+    assert [p.name for p in cfgd.iterdir()] == ['a.conf']
+    assert 'a.example' in (cfgd / 'a.conf').read_text()
+    assert _siblings(tmp_path) == ['config.d']
+
+
+def test_fallback_swap_and_recovery(tmp_path, monkeypatch):
+    cfgd = tmp_path / 'config.d'
+    store.write_host_config(cfgd, HostConfig('a', 'a.example'))
+    monkeypatch.setattr(store, '_renameat2_exchange', lambda a, b: False)
+    with store.ConfigDWriter(cfgd) as tx:
+        tx.write(HostConfig('b', 'b.example'))
+    assert sorted(p.name for p in cfgd.iterdir()) == ['a.conf', 'b.conf']
+    assert _siblings(tmp_path) == ['config.d']
+
+    # Simulate a crash between the two renames of the fallback swap
+    old = tmp_path / '.config.d.old-x'
+    cfgd.rename(old)
+    (tmp_path / '.config.d.staging-x').mkdir()
+    store.recover_config_d(cfgd)
+    assert sorted(p.name for p in cfgd.iterdir()) == ['a.conf', 'b.conf']
+    assert _siblings(tmp_path) == ['config.d']
+
+
+def test_remove_drops_files_in_the_same_swap(tmp_path):
+    cfgd = tmp_path / 'config.d'
+    for name in ('keep', 'gone', 'redo'):
+        store.write_host_config(cfgd, HostConfig(name, f'{name}.example'))
+    with store.ConfigDWriter(cfgd) as tx:
+        tx.remove('gone.conf')
+        tx.remove('missing.conf')  # nothing to remove
+        tx.remove('redo.conf')
+        tx.write(HostConfig('redo', 'redo2.example'))
+    assert (tx.written, tx.removed) == (1, 1)
+    assert sorted(p.name for p in cfgd.iterdir()) == ['keep.conf', 'redo.conf']
+    assert 'redo2.example' in (cfgd / 'redo.conf').read_text()
+    assert _siblings(tmp_path) == ['config.d']
+
+
+def test_symlinks_and_subdirectories_survive_a_commit(tmp_path):
+    cfgd = tmp_path / 'config.d'
+    store.write_host_config(cfgd, HostConfig('a', 'a.example'))
+    (tmp_path / 'shared.conf').write_text('Host shared\n', encoding='utf-8')
+    (cfgd / 'link.conf').symlink_to('../shared.conf')
+    (cfgd / 'sub').mkdir()
+    (cfgd / 'sub' / 'x.conf').write_text('Host x\n', encoding='utf-8')
+    with store.ConfigDWriter(cfgd) as tx:
+        tx.write(HostConfig('b', 'b.example'))
+    assert sorted(p.name for p in cfgd.iterdir()) == ['a.conf', 'b.conf', 'link.conf', 'sub']
+    assert os.readlink(cfgd / 'link.conf') == '../shared.conf'
+    assert (cfgd / 'sub' / 'x.conf').read_text() == 'Host x\n'
+
+
+def test_unknown_entry_type_refuses_the_swap(tmp_path):
+    cfgd = tmp_path / 'config.d'
+    store.write_host_config(cfgd, HostConfig('a', 'a.example'))
+    os.mkfifo(cfgd / 'pipe')
+    with pytest.raises(store.ConfigDError):
+        with store.ConfigDWriter(cfgd) as tx:
+            tx.write(HostConfig('b', 'b.example'))
+    assert sorted(p.name for p in cfgd.iterdir()) == ['a.conf', 'pipe']
+    assert _siblings(tmp_path) == ['config.d']
+
+
+def test_concurrent_writer_waits_instead_of_recovering_live_staging(tmp_path):
+    cfgd = tmp_path / 'config.d'
+    store.write_host_config(cfgd, HostConfig('a', 'a.example'))
+    first = store.ConfigDWriter(cfgd)
+    first.write(HostConfig('b', 'b.example'))
+    done = threading.Event()
+
+    def second():
+        with store.ConfigDWriter(cfgd) as tx:
+            tx.write(HostConfig('c', 'c.example'))
+        done.set()
+
+    t = threading.Thread(target=second)
+    t.start()
+    assert not done.wait(0.2)  # blocked on the lock, first's staging intact
+    first.commit()
+    t.join(5)
+    assert done.is_set()
+    assert sorted(p.name for p in cfgd.iterdir()) == ['a.conf', 'b.conf', 'c.conf']
+    assert _siblings(tmp_path) == ['config.d']
+
+
+def test_single_host_write_waits_for_an_open_transaction(tmp_path):
+    cfgd = tmp_path / 'config.d'
+    store.write_host_config(cfgd, HostConfig('a', 'a.example'))
+    tx = store.ConfigDWriter(cfgd)
+    tx.write(HostConfig('b', 'b.example'))
+    done = threading.Event()
+
+    def save():
+        store.write_host_config(cfgd, HostConfig('c', 'c.example'))
+        done.set()
+
+    t = threading.Thread(target=save)
+    t.start()
+    assert not done.wait(0.2)  # would otherwise be dropped by the swap
+    tx.commit()
+    t.join(5)
+    assert done.is_set()
+    assert sorted(p.name for p in cfgd.iterdir()) == ['a.conf', 'b.conf', 'c.conf']
@@ -0,0 +1,120 @@
+import base64
+import os
+import struct
+
+from ssh_manager.core import deploy
+from sshd import StubSSHServer
+
+
+def _pub(comment='me@box'):
+    blob = b''.join(struct.pack('>I', len(p)) + p for p in (b'ssh-ed25519', os.urandom(32)))
+    return f'ssh-ed25519 {base64.b64encode(blob).decode()} {comment}'
+
+
+def _deployer(known, **kwargs):
+    kwargs.setdefault('password', 'secret')
+    return deploy.Deployer(known_hosts=known, allow_agent=False, look_for_keys=False,
+                           timeout=5, backoff=0.01, **kwargs)
+
+
+def _targets(server, n, key):
+    return [deploy.Target(f'h{i}', '127.0.0.1', f'u{i}', server.port, key) for i in range(n)]
+
+
+def test_deploys_concurrently_and_idempotently(tmp_path):
+    key = _pub()
+    with StubSSHServer(tmp_path / 'remote') as server:
+        known = tmp_path / 'known_hosts'
+        known.write_text(server.known_hosts_line())
+        # One user already has the key (with another comment), one has a file
+        # without a trailing newline
+        (server.home('u0') / '.ssh').mkdir(parents=True)
+        (server.home('u0') / '.ssh' / 'authorized_keys').write_text(key.rsplit(' ', 1)[0] + ' old\n')
+        (server.home('u1') / '.ssh').mkdir(parents=True)
+        (server.home('u1') / '.ssh' / 'authorized_keys').write_text('ssh-rsa AAAA other')
+
+        report = _deployer(known).deploy(_targets(server, 8, key), workers=4)
+        assert report.ok, report.to_dict()
+        assert [r.status for r in report.results] == ['present'] + ['added'] * 7
+        assert (server.home('u1') / '.ssh' / 'authorized_keys').read_text() == f'ssh-rsa AAAA other\n{key}\n'
+        auth = server.home('u5') / '.ssh' / 'authorized_keys'
+        assert auth.read_text() == key + '\n'
+        assert oct(auth.stat().st_mode & 0o777) == '0o600'
+
+        again = _deployer(known).deploy(_targets(server, 8, key), workers=4)
+        assert again.count('present') == 8
+        assert auth.read_text() == key + '\n'
+        summary = again.to_dict()
+        assert (summary['added'], summary['present'], summary['failed']) == (0, 8, 0)
+
+
+def test_retries_dropped_connections(tmp_path):
+    with StubSSHServer(tmp_path / 'remote', drop=2) as server:
+        known = tmp_path / 'known_hosts'
+        known.write_text(server.known_hosts_line())
+        result = _deployer(known, retries=2).deploy_one(_targets(server, 1, _pub())[0])
+        assert (result.status, result.attempts) == ('added', 3)
+
+
+def test_failures_are_reported_not_retried(tmp_path):
+    key = _pub()
+    with StubSSHServer(tmp_path / 'remote') as server:
+        known = tmp_path / 'known_hosts'
+        target = _targets(server, 1, key)[0]
+        # Unknown host key: rejected unless new keys are accepted
+        result = _deployer(known).deploy_one(target)
+        assert (result.status, result.attempts) == ('failed', 1)
+        assert 'not in known_hosts' in result.error
+        tofu = _deployer(known, accept_new=True)
+        assert tofu.deploy_one(target).status == 'added'
+        assert tofu.save_known_hosts() == 1
+        assert known.read_text() == server.known_hosts_line()
+        # Wrong password
+        result = _deployer(known, password='nope').deploy_one(target)
+        assert (result.status, result.attempts) == ('failed', 1)
+        assert server.connections == 3
+        # Bad key line never reaches the network
+        assert 'invalid public key' in _deployer(known).deploy_one(
+            deploy.Target('x', '127.0.0.1', 'u', server.port, 'ssh-ed25519 !!!')).error
+
+
+def test_timeout_then_give_up(tmp_path):
+    with StubSSHServer(tmp_path / 'remote', delay=2) as server:
+        known = tmp_path / 'known_hosts'
+        known.write_text(server.known_hosts_line())
+        d = deploy.Deployer(known_hosts=known, password='secret', allow_agent=False, look_for_keys=False,
+                            timeout=0.3, retries=1, backoff=0.01)
+        result = d.deploy_one(_targets(server, 1, _pub())[0])
+        assert (result.status, result.attempts) == ('failed', 2)
+
+
+def test_cli_deploy_all(monkeypatch, tmp_path):
+    import json
+
+    from click.testing import CliRunner
+
+    from ssh_manager.cli import main
+
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.delenv('SSH_AUTH_SOCK', raising=False)
+    ssh = tmp_path / '.ssh'
+    (ssh / 'config.d').mkdir(parents=True)
+    (ssh / 'keys').mkdir()
+    with StubSSHServer(tmp_path / 'remote') as server:
+        for name in ('a', 'b'):
+            (ssh / 'keys' / f'{name}_ed25519.pub').write_text(_pub(name) + '\n')
+            (ssh / 'config.d' / f'{name}.conf').write_text(
+                f'Host {name}\n  HostName 127.0.0.1\n  User {name}\n  Port {server.port}\n'
+                f'  IdentityFile ~/.ssh/keys/{name}_ed25519\n')
+        (ssh / 'config.d' / 'c.conf').write_text('Host c\n  HostName 127.0.0.1\n  IdentityFile ~/.ssh/keys/gone\n')
+        result = CliRunner().invoke(main, ['deploy', '--all', '--password', '--accept-new', '--json'],
+                                    input='secret\n')
+        assert result.exit_code == 1  # c has no public key
+        report = json.loads(result.output[result.output.index('{'):])
+        assert {r['host']: r['status'] for r in report['results']} == {'a': 'added', 'b': 'added', 'c': 'failed'}
+        assert (server.home('b') / '.ssh' / 'authorized_keys').read_text().endswith(' b\n')
+        assert server.known_hosts_line() in (ssh / 'known_hosts').read_text()
+
+        result = CliRunner().invoke(main, ['deploy', 'a', 'b', '--password'], input='secret\n')
+        assert result.exit_code == 0, result.output
+        assert 'Added 0, already present 2, failed 0' in result.output
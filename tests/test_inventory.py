@@ -0,0 +1,176 @@
+import io
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from ssh_manager.cli import main
+from ssh_manager.core import inventory, store
+from ssh_manager.core.model import HostConfig
+
+
+def _hosts():
+    return [
+        HostConfig('web', 'web.example', user='deploy', identity_file='~/.ssh/keys/web_ed25519',
+                   options=[('IdentityFile', '~/.ssh/keys/extra'), ('ForwardAgent', 'yes')]),
+        HostConfig('db', 'db.internal', port=2222),
+        HostConfig('edge', 'edge "quoted" ]', user='ops'),
+    ]
+
+
+@pytest.mark.parametrize('fmt', inventory.FORMATS)
+def test_export_import_round_trip(fmt, monkeypatch):
+    monkeypatch.setattr(inventory, '_CHUNK', 7)  # force many JSON buffer refills
+    out = io.StringIO()
+    assert inventory.export_hosts(_hosts(), out, fmt) == 3
+    records = list(inventory.iter_records(io.StringIO(out.getvalue()), fmt))
+    assert [inventory.host_from_record(r) for r in records] == _hosts()
+    empty = io.StringIO()
+    inventory.export_hosts([], empty, fmt)
+    assert list(inventory.iter_records(io.StringIO(empty.getvalue()), fmt)) == []
+
+
+def test_empty_yaml_document_has_no_records():
+    assert list(inventory.iter_records(io.StringIO('---\n'), 'yaml')) == []
+    assert list(inventory.iter_records(io.StringIO('--- ~\n'), 'yaml')) == []
+
+
+def test_malformed_input_is_reported():
+    with pytest.raises(inventory.InventoryError, match='must be a list'):
+        list(inventory.iter_records(io.StringIO('{"host": "a"}'), 'json'))
+    with pytest.raises(inventory.InventoryError, match='record 2'):
+        list(inventory.iter_records(io.StringIO('[{"host": "a"}, {"host": '), 'json'))
+    with pytest.raises(inventory.InventoryError, match='after the JSON list'):
+        list(inventory.iter_records(io.StringIO('[] []'), 'json'))
+    with pytest.raises(inventory.InventoryError, match='line 2'):
+        list(inventory.iter_records(io.StringIO('{"host": "a"}\n{oops\n'), 'ndjson'))
+    with pytest.raises(inventory.InventoryError, match='must be a list'):
+        list(inventory.iter_records(io.StringIO('host: a\n'), 'yaml'))
+
+
+def test_import_writes_only_changed_files_and_prunes(tmp_path):
+    cfgd = tmp_path / 'config.d'
+    for h in _hosts():
+        store.write_host_config(cfgd, h)
+    inode = (cfgd / 'web.conf').stat().st_ino
+    records = [h.to_dict() for h in _hosts()[:2]]
+    records[1]['port'] = 2223
+    records.append({'host': 'new', 'hostname': '10.0.0.9'})
+
+    preview = inventory.import_hosts(iter(records), cfgd, prune=True, dry_run=True)
+    assert 'Port 2222' in (cfgd / 'db.conf').read_text() and not (cfgd / 'new.conf').exists()
+
+    result = inventory.import_hosts(iter(records), cfgd, tmp_path / 'cache', prune=True)
+    assert result.to_dict() == preview.to_dict() == {
+        'added': ['new'], 'changed': ['db'], 'unchanged': 1, 'removed': ['edge']}
+    assert sorted(p.name for p in cfgd.iterdir()) == ['db.conf', 'new.conf', 'web.conf']
+    assert (cfgd / 'web.conf').stat().st_ino == inode  # not rewritten
+    assert 'Port 2223' in (cfgd / 'db.conf').read_text()
+    again = inventory.import_hosts(iter(records), cfgd, tmp_path / 'cache', prune=True)
+    assert again.to_dict() == {'added': [], 'changed': [], 'unchanged': 3, 'removed': []}
+
+
+def test_bad_records_abort_the_whole_import(tmp_path):
+    cfgd = tmp_path / 'config.d'
+    records = [{'host': 'ok'}, {'host': 'bad', 'port': 'x'}, {'hostname': 'no-alias'},
+               {'host': 'ok', 'user': 'dup'}, {'host': 'odd', 'color': 'red'}]
+    with pytest.raises(inventory.InventoryError) as err:
+        inventory.import_hosts(iter(records), cfgd)
+    assert err.value.problems == [
+        "record 2 (bad): invalid port 'x'",
+        'record 3: host is required',
+        'record 4 (ok): same host as record 1',
+        'record 5 (odd): unknown field(s) color',
+    ]
+    assert not cfgd.exists() or not list(cfgd.iterdir())
+
+
+def test_cli_export_then_import(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    for h in _hosts():
+        store.write_host_config(cfgd, h)
+    runner = CliRunner()
+    out = runner.invoke(main, ['export', '--format', 'ndjson'])
+    assert out.exit_code == 0, out.output
+    lines = [json.loads(line) for line in out.output.splitlines()]
+    assert [r['host'] for r in lines] == ['db', 'edge', 'web']
+
+    target = tmp_path / 'hosts.yaml'
+    assert runner.invoke(main, ['export', '-o', str(target)]).exit_code == 0
+    text = target.read_text().replace('db.internal', 'db2.internal')
+    target.write_text(text)
+    result = runner.invoke(main, ['import', str(target), '--no-backup', '--json'])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)['changed'] == ['db']
+    assert 'HostName db2.internal' in (cfgd / 'db.conf').read_text()
+
+    piped = runner.invoke(main, ['import', '-', '--format', 'ndjson', '--no-backup', '--dry-run'],
+                          input='{"host": "solo"}\n')
+    assert piped.exit_code == 0 and 'would import 1 new' in piped.output
+    assert runner.invoke(main, ['import', '-', '--no-backup'], input='').exit_code == 2
+
+
+def test_import_round_trips_hosts_that_share_a_file_name(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    legacy = tmp_path / 'legacy_config'
+    legacy.write_text('Host a:b\n  HostName one\nHost a-b\n  HostName two\n', encoding='utf-8')
+    runner = CliRunner()
+    assert runner.invoke(main, ['parse', '--input', str(legacy), '--no-backup']).exit_code == 0
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    assert sorted(p.name for p in cfgd.iterdir()) == ['a-b-2.conf', 'a-b.conf']
+    exported = runner.invoke(main, ['export', '--format', 'ndjson']).output
+    records = [json.loads(line) for line in exported.splitlines()]
+    assert [r['host'] for r in records] == ['a-b', 'a:b']  # file name order
+
+    result = inventory.import_hosts(iter(records), cfgd, prune=True)
+    assert result.to_dict() == {'added': [], 'changed': [], 'unchanged': 2, 'removed': []}
+    records[1]['hostname'] = 'three'
+    result = inventory.import_hosts(iter(records), cfgd, prune=True)
+    assert result.changed == ['a:b'] and not result.removed
+    assert (cfgd / 'a-b.conf').read_text().startswith('Host a:b\n  HostName three\n')
+    assert 'HostName two' in (cfgd / 'a-b-2.conf').read_text()
+
+    # Into an empty config.d the later alias gets the next free name
+    fresh = tmp_path / 'fresh.d'
+    assert inventory.import_hosts(iter(records), fresh).added == ['a-b', 'a:b']
+    assert (fresh / 'a-b.conf').read_text().startswith('Host a-b\n')
+    assert (fresh / 'a-b-2.conf').read_text().startswith('Host a:b\n')
+
+
+def test_pattern_blocks_round_trip_with_their_placement(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    legacy = tmp_path / 'legacy_config'
+    legacy.write_text('Host *.corp\n  User ops\nHost web.corp\n  HostName 10.0.0.1\n'
+                      'Host *.corp !db.corp\n  ForwardAgent yes\n', encoding='utf-8')
+    runner = CliRunner()
+    assert runner.invoke(main, ['parse', '--input', str(legacy), '--no-backup']).exit_code == 0
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    exported = runner.invoke(main, ['export', '--format', 'ndjson']).output
+    records = [json.loads(line) for line in exported.splitlines()]
+    assert [(r['host'], r.get('placement')) for r in records] == [
+        ('*.corp', 'leading'), ('web.corp', None), ('*.corp', 'trailing')]
+    assert records[2]['patterns'] == ['*.corp', '!db.corp']
+
+    result = inventory.import_hosts(iter(records), cfgd, prune=True)
+    assert result.to_dict() == {'added': [], 'changed': [], 'unchanged': 3, 'removed': []}
+    fresh = tmp_path / 'fresh.d'
+    assert inventory.import_hosts(iter(records), fresh).added == [
+        'web.corp', '+patterns.conf', '~patterns.conf']
+    for name in ('+patterns.conf', 'web.corp.conf', '~patterns.conf'):
+        assert (fresh / name).read_text() == (cfgd / name).read_text()
+
+    # Pattern files missing from the input are kept unless pruned
+    hosts_only = [r for r in records if 'placement' not in r]
+    assert inventory.import_hosts(iter(hosts_only), cfgd).unchanged == 1
+    assert inventory.import_hosts(iter(hosts_only), cfgd, prune=True).removed == [
+        '+patterns.conf', '~patterns.conf']
+    assert sorted(p.name for p in cfgd.iterdir()) == ['web.corp.conf']
+
+    with pytest.raises(inventory.InventoryError) as err:
+        inventory.import_hosts(iter([{'host': '*', 'placement': 'middle'},
+                                     {'host': 'web.corp', 'placement': 'leading'}]), cfgd)
+    assert err.value.problems == [
+        'record 1 (*): placement must be one of leading, trailing',
+        'record 2 (web.corp): placement is only for blocks of wildcard patterns',
+    ]
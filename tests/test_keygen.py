@@ -0,0 +1,163 @@
+import asyncio
+import shutil
+import stat
+
+import pytest
+
+from ssh_manager.core import keygen
+
+needs_keygen = pytest.mark.skipif(shutil.which('ssh-keygen') is None, reason='ssh-keygen not installed')
+
+
+def test_plan_host_rejects_existing_host_or_key(tmp_path):
+    cfgd, keys = tmp_path / 'config.d', tmp_path / 'keys'
+    cfgd.mkdir()
+    keys.mkdir()
+    hc = keygen.plan_host(cfgd, keys, 'web/1', user='deploy', key_type='rsa')
+    assert (hc.host, hc.hostname, hc.identity_file) == ('web-1', 'web-1', str(keys / 'web-1_rsa'))
+    (keys / 'web-1_rsa').write_text('x')
+    with pytest.raises(keygen.KeyGenError, match='already exists'):
+        keygen.plan_host(cfgd, keys, 'web/1', key_type='rsa')
+    (cfgd / 'db.conf').write_text('Host db\n')
+    with pytest.raises(keygen.KeyGenError, match='Host db already exists; db-2 is free'):
+        keygen.plan_host(cfgd, keys, 'db')
+
+
+def test_copy_id_command_targets_the_new_key(tmp_path):
+    assert keygen.copy_id_command('u', 'h', tmp_path / 'k.pub', 2222) == [
+        'ssh-copy-id', '-i', str(tmp_path / 'k.pub'), '-p', '2222', 'u@h']
+    assert keygen.copy_id_command('u', 'h') == ['ssh-copy-id', 'u@h']
+
+
+@needs_keygen
+def test_generate_key_sync_and_async(tmp_path):
+    keys = tmp_path / 'keys'
+    priv = keygen.generate_key(keys, 'a', comment='me@a', quiet=True)
+    assert priv == keys / 'a_ed25519'
+    assert stat.S_IMODE(priv.stat().st_mode) == 0o600
+    assert (keys / 'a_ed25519.pub').read_text().strip().endswith('me@a')
+    with pytest.raises(keygen.KeyGenError):
+        keygen.generate_key(keys, 'a', quiet=True)
+
+    async def many():
+        return await asyncio.gather(*(keygen.generate_key_async(keys, f'h{i}') for i in range(3)))
+
+    assert sorted(p.name for p in asyncio.run(many())) == ['h0_ed25519', 'h1_ed25519', 'h2_ed25519']
+
+
+@needs_keygen
+def test_create_host_writes_config(tmp_path):
+    cfgd, keys = tmp_path / 'config.d', tmp_path / 'keys'
+    cfgd.mkdir()
+    hc = keygen.plan_host(cfgd, keys, 'web', hostname='web.example', user='deploy')
+    path = asyncio.run(keygen.create_host_async(cfgd, keys, hc))
+    text = path.read_text()
+    assert 'HostName web.example' in text and f'IdentityFile {keys}/web_ed25519' in text
+    assert (keys / 'web_ed25519.pub').exists()
+
+
+def test_failed_and_cancelled_runs_leave_nothing_behind(monkeypatch, tmp_path):
+    keys = tmp_path / 'keys'
+
+    def fake(priv, key_type, comment):
+        # Writes a partial key, then fails (or hangs until killed)
+        return ['sh', '-c', f'touch {priv}; echo bad key type >&2; [ "{key_type}" = slow ] && sleep 30; exit 1']
+
+    monkeypatch.setattr(keygen, 'keygen_command', fake)
+    with pytest.raises(keygen.KeyGenError, match='bad key type'):
+        asyncio.run(keygen.generate_key_async(keys, 'a', 'ed25519'))
+    assert list(keys.iterdir()) == []
+
+    async def cancel():
+        task = asyncio.ensure_future(keygen.generate_key_async(keys, 'b', 'slow'))
+        while not (keys / 'b_slow').exists():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(asyncio.wait_for(cancel(), 10))
+    assert list(keys.iterdir()) == []
+
+
+def test_tui_generates_keys_in_background(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    cfgd.mkdir(parents=True)
+    for name in ('a', 'b', 'c'):
+        (cfgd / f'{name}.conf').write_text(f'Host {name}\n  HostName {name}.example\n', encoding='utf-8')
+    started = []
+    release = asyncio.Event()
+
+    async def slow_keygen(keys_dir, alias, key_type='ed25519', comment=''):
+        started.append(alias)
+        await release.wait()
+        priv = keys_dir / f'{alias}_{key_type}'
+        priv.parent.mkdir(parents=True, exist_ok=True)
+        priv.write_text('key')
+        return priv
+
+    monkeypatch.setattr(keygen, 'generate_key_async', slow_keygen)
+
+    from ssh_manager.tui.app import SSHManagerApp
+
+    async def scenario():
+        app = SSHManagerApp()
+        app.KEY_JOBS = 1
+        async with app.run_test(size=(100, 30)) as pilot:
+            while not app.hosts_loaded:
+                await pilot.pause(0.01)
+            for _ in range(3):
+                await pilot.pause(app.DETAIL_DELAY * 3)
+                await pilot.press('g')
+                await pilot.press('down')  # keep navigating while keys are made
+            await pilot.pause(0.05)
+            assert started == ['a']  # one slot: the others wait in the queue
+            assert len(app.jobs_bar.jobs) == 3
+            release.set()
+            while app.jobs_bar.jobs:
+                await pilot.pause(0.05)
+            assert started == ['a', 'b', 'c']
+            assert app.jobs_bar.message == 'Generated key c_ed25519'
+            assert 'IdentityFile' in (cfgd / 'b.conf').read_text()
+            assert app.host_list.rows[1].host.identity_file.endswith('b_ed25519')
+
+    asyncio.run(scenario())
+
+
+def test_tui_cancel_jobs(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    cfgd.mkdir(parents=True)
+    (cfgd / 'a.conf').write_text('Host a\n  HostName a.example\n', encoding='utf-8')
+
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(30)
+
+    monkeypatch.setattr(keygen, 'generate_key_async', hang)
+
+    from ssh_manager.tui.app import SSHManagerApp
+
+    async def scenario():
+        app = SSHManagerApp()
+        async with app.run_test(size=(100, 30)) as pilot:
+            while not app.hosts_loaded:
+                await pilot.pause(0.01)
+            await pilot.pause(app.DETAIL_DELAY * 3)
+            await pilot.press('g')
+            # Poll rather than sleep a fixed time: a slow start must not fail
+            for _ in range(200):
+                if app.jobs_bar.jobs.get('a_ed25519') == 'running':
+                    break
+                await pilot.pause(0.01)
+            assert app.jobs_bar.jobs == {'a_ed25519': 'running'}
+            await pilot.press('x')
+            for _ in range(200):
+                if not app.jobs_bar.jobs:
+                    break
+                await pilot.pause(0.01)
+            assert app.jobs_bar.jobs == {}
+            assert app.jobs_bar.message == 'a_ed25519 cancelled'
+            assert 'IdentityFile' not in (cfgd / 'a.conf').read_text()
+
+    asyncio.run(scenario())
@@ -0,0 +1,55 @@
+from ssh_manager.core import model, parser
+from ssh_manager.core.model import HostConfig
+
+TEXT = (
+    "Host app\n"
+    "  HostName app.example\n"
+    "  User deploy\n"
+    "  IdentityFile ~/.ssh/keys/app_ed25519\n"
+    "  LocalForward 8080 localhost:80\n"
+    "  ForwardAgent yes\n"
+    "  LocalForward 8443 localhost:443\n"
+    "  IdentityFile ~/.ssh/keys/app_rsa\n"
+)
+
+
+def test_repeated_keywords_grouped_in_options_and_serialize_round_trips():
+    h = parser.parse_host_file(TEXT)
+    assert h.identity_file == '~/.ssh/keys/app_ed25519'
+    assert h.options == {
+        'LocalForward': ['8080 localhost:80', '8443 localhost:443'],
+        'ForwardAgent': ['yes'],
+        'IdentityFile': ['~/.ssh/keys/app_rsa'],
+    }
+    assert h.get_option('localforward') == ['8080 localhost:80', '8443 localhost:443']
+    assert h.serialize() == TEXT
+
+
+def test_dict_round_trip_preserves_interleaved_order():
+    h = parser.parse_host_file(TEXT)
+    clone = HostConfig.from_dict(h.to_dict())
+    assert clone == h
+    assert clone.serialize() == TEXT
+
+
+def test_identical_option_sets_are_shared_and_slots_used():
+    a = HostConfig('a', 'a', options={'ForwardAgent': ['yes']})
+    b, c = parser.parse_ssh_config('Host b\n  ForwardAgent yes\nHost c\n  ForwardAgent yes\n')
+    assert a._options is b._options is c._options
+    assert not hasattr(a, '__dict__')
+
+
+def test_unique_option_sets_do_not_accumulate(monkeypatch):
+    monkeypatch.setattr(model, '_OPTION_SETS', {})
+    monkeypatch.setattr(model, '_OPTION_SETS_MAX', 100)
+    text = ''.join(
+        f'Host h{i}\n' + ''.join(f'  LocalForward {i * 8 + j} localhost:{j}\n' for j in range(8))
+        for i in range(500))
+    hosts = parser.parse_ssh_config(text)
+    # One entry per finished block (not per prefix), and never more than the cap
+    assert len(model._OPTION_SETS) == 100
+    assert len(hosts[-1].get_option('LocalForward')) == 8
+    h = HostConfig('x', 'x')
+    h.add_option('LocalForward', '1 localhost:1')
+    h.add_option('LocalForward', '2 localhost:2')
+    assert h._options not in model._OPTION_SETS
@@ -0,0 +1,53 @@
+import textwrap
+
+from click.testing import CliRunner
+
+from ssh_manager.cli import main
+from ssh_manager.core.names import NameRegistry
+
+
+def test_registry_disambiguates_in_order(tmp_path):
+    (tmp_path / 'db.conf').write_text('Host db\n')
+    (tmp_path / 'notes.txt').write_text('')
+    names = NameRegistry.from_dir(tmp_path)
+    assert 'db' in names and 'DB' in names and 'notes' not in names
+    assert names.owner('db') is None  # on disk, not from this run
+    assert [names.assign(a) for a in ['web!1', 'web-1', 'Web-1', 'web-1-2', 'db', 'web 1']] == [
+        'web-1', 'web-1-2', 'Web-1-3', 'web-1-2-2', 'db-2', 'web']
+    assert names.owner('web-1') == 'web!1'
+    assert names.renamed == [('web-1', 'web-1-2'), ('Web-1', 'Web-1-3'), ('web-1-2', 'web-1-2-2'), ('db', 'db-2')]
+    assert names.suggest('web-1') == 'web-1-4' and 'web-1-4' not in names
+    assert len(names.assigned) == 6 and len(NameRegistry.from_dir(tmp_path / 'missing')) == 0
+
+
+def test_cli_parse_keeps_hosts_that_share_a_file_name(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    ssh = tmp_path / '.ssh'
+    ssh.mkdir()
+    legacy = tmp_path / 'legacy_config'
+    legacy.write_text(textwrap.dedent("""\
+        Host web!1 web-primary
+          HostName a.example
+        Host web-1
+          HostName b.example
+          User deploy
+        Host *.corp
+          User ops
+        Host Web-1 other
+        """), encoding='utf-8')
+    runner = CliRunner()
+    result = runner.invoke(main, ['parse', '--input', str(legacy), '--no-backup'])
+    assert result.exit_code == 0, result.output
+    cfgd = ssh / 'config.d'
+    assert sorted(p.name for p in cfgd.glob('*.conf')) == [
+        'Web-1-3.conf', 'web-1-2.conf', 'web-1.conf', '~patterns.conf']
+    assert 'User deploy' in (cfgd / 'web-1-2.conf').read_text()
+    assert (cfgd / 'Web-1-3.conf').read_text().startswith('Host Web-1 other\n')
+    assert '2 host blocks share a file name with an earlier one' in result.output
+    assert '-> web-1-2.conf' in result.output and '-> Web-1-3.conf' in result.output
+
+    # The same input gives the same names on every run
+    result = runner.invoke(main, ['parse', '--input', str(legacy), '--no-backup', '--show-names'])
+    assert result.exit_code == 0, result.output
+    assert '(0 written, 4 unchanged)' in result.output
+    assert 'Files written:' in result.output and 'web!1 web-primary  -> web-1.conf' in result.output
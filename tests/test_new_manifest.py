@@ -0,0 +1,102 @@
+import json
+import shutil
+
+import pytest
+from click.testing import CliRunner
+
+from ssh_manager import cli
+from ssh_manager.commands import common
+from ssh_manager.core import keygen, manifest
+
+
+def test_read_manifest_formats(tmp_path):
+    (tmp_path / 'h.csv').write_text('Host,HostName,port\nweb,10.0.0.1,\ndb,,2222\n', encoding='utf-8')
+    (tmp_path / 'h.json').write_text(json.dumps({'hosts': [{'host': 'web', 'port': 2222}]}), encoding='utf-8')
+    (tmp_path / 'h.yaml').write_text('- host: web\n  user: deploy\n- {host: db}\n', encoding='utf-8')
+    assert manifest.read_manifest(tmp_path / 'h.csv') == [
+        {'host': 'web', 'hostname': '10.0.0.1', 'port': ''}, {'host': 'db', 'hostname': '', 'port': '2222'}]
+    assert manifest.read_manifest(tmp_path / 'h.json') == [{'host': 'web', 'port': 2222}]
+    assert manifest.read_manifest(tmp_path / 'h.yaml') == [{'host': 'web', 'user': 'deploy'}, {'host': 'db'}]
+    (tmp_path / 'bad.yml').write_text('host: web\n', encoding='utf-8')
+    with pytest.raises(manifest.ManifestError, match='expected a list'):
+        manifest.read_manifest(tmp_path / 'bad.yml')
+    with pytest.raises(manifest.ManifestError, match='unsupported'):
+        manifest.read_manifest(tmp_path / 'h.txt')
+
+
+def test_plan_hosts_reports_every_problem(tmp_path):
+    cfgd, keys = tmp_path / 'config.d', tmp_path / 'keys'
+    cfgd.mkdir()
+    (cfgd / 'old.conf').write_text('Host old\n')
+    entries = [
+        {'host': 'ok', 'port': '2200'},
+        {'hostname': 'x'},
+        {'host': 'p', 'port': 'ssh'},
+        {'host': 'k', 'key_type': 'dsa'},
+        {'host': 'ok'},
+        {'host': 'old'},
+        {'host': 'e', 'colour': 'red'},
+        {'host': 'OK'},
+    ]
+    with pytest.raises(manifest.ManifestError) as info:
+        manifest.plan_hosts(entries, cfgd, keys)
+    assert info.value.problems == [
+        'entry 2: host is required',
+        "entry 3 (p): invalid port 'ssh'",
+        "entry 4 (k): unsupported key_type 'dsa'",
+        'entry 5 (ok): host ok already listed in entry 1',
+        'entry 6 (old): Host old already exists; old-2 is free',
+        'entry 7 (e): unknown field(s) colour',
+        'entry 8 (OK): Host OK is already planned for ok; OK-2 is free',
+    ]
+    planned = manifest.plan_hosts([{'host': 'a'}, {'host': 'b', 'user': 'x', 'key_type': 'rsa'}],
+                                  cfgd, keys, user='deploy', port=2222)
+    assert [(h.host, h.user, h.port, t) for h, t in planned] == [('a', 'deploy', 2222, 'ed25519'),
+                                                               ('b', 'x', 2222, 'rsa')]
+
+
+def test_create_hosts_rolls_back_when_a_key_fails(monkeypatch, tmp_path):
+    cfgd, keys = tmp_path / 'config.d', tmp_path / 'keys'
+    cfgd.mkdir()
+    (cfgd / 'old.conf').write_text('Host old\n')
+
+    def fake(priv, key_type, comment):
+        code = 1 if priv.name.startswith('h3_') else 0
+        return ['sh', '-c', f'touch {priv} {priv}.pub; exit {code}']
+
+    monkeypatch.setattr(keygen, 'keygen_command', fake)
+    planned = manifest.plan_hosts([{'host': f'h{i}'} for i in range(6)], cfgd, keys)
+    with pytest.raises(keygen.KeyGenError):
+        keygen.create_hosts(cfgd, keys, planned, workers=2)
+    assert list(keys.iterdir()) == []
+    assert sorted(p.name for p in cfgd.iterdir()) == ['old.conf']
+
+
+@pytest.mark.skipif(shutil.which('ssh-keygen') is None, reason='ssh-keygen not installed')
+def test_cli_new_from_manifest_regenerates_once(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    calls = []
+    real = common.regenerate_main_config
+    monkeypatch.setattr(common, 'regenerate_main_config', lambda *a: calls.append(a) or real(*a))
+    path = tmp_path / 'hosts.yaml'
+    path.write_text('hosts:\n' + ''.join(f'  - host: n{i}\n    hostname: 10.0.0.{i}\n' for i in range(5)),
+                    encoding='utf-8')
+    result = CliRunner().invoke(cli.main, ['new', '--from', str(path), '--user', 'deploy', '--workers', '3'])
+    assert result.exit_code == 0, result.output
+    assert 'Created 5 hosts' in result.output
+    assert len(calls) == 1
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    assert sorted(p.name for p in cfgd.iterdir()) == [f'n{i}.conf' for i in range(5)]
+    assert 'User deploy' in (cfgd / 'n3.conf').read_text()
+    assert (tmp_path / '.ssh' / 'keys' / 'n3_ed25519.pub').exists()
+    # A second run is rejected up front and changes nothing
+    result = CliRunner().invoke(cli.main, ['new', '--from', str(path)])
+    assert result.exit_code == 1
+    assert 'entry 1 (n0): Host n0 already exists' in result.output
+    assert len(calls) == 1
+
+
+def test_cli_new_requires_host_or_manifest(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    result = CliRunner().invoke(cli.main, ['new'])
+    assert result.exit_code == 2 and 'Give either --host or --from' in result.output
@@ -0,0 +1,120 @@
+import json
+import textwrap
+
+from click.testing import CliRunner
+
+from ssh_manager.cli import main
+from ssh_manager.core import audit, index, parser
+
+LEGACY = textwrap.dedent("""\
+    Host *.corp !bastion.corp
+      User ops
+      IdentityFile ~/.ssh/corp_ed25519
+    Host web1 web1-alt
+      Port 2200
+    Host db
+      HostName db.example
+    Host *
+      ServerAliveInterval 30
+    """)
+
+
+def test_pattern_and_multi_alias_blocks_round_trip():
+    pattern, web, db, star = parser.parse_ssh_config(LEGACY)
+    assert pattern.is_pattern and pattern.aliases == []
+    assert (pattern.user, pattern.identity_file) == ('', None)  # kept as options, in order
+    assert web.patterns == ('web1', 'web1-alt') and web.aliases == ['web1', 'web1-alt']
+    assert web.hostname == ''  # ssh connects to whichever alias was typed
+    assert db.hostname == 'db.example' and not db.is_pattern
+    assert pattern.serialize() + star.serialize() == (
+        'Host *.corp !bastion.corp\n  User ops\n  IdentityFile ~/.ssh/corp_ed25519\n'
+        'Host *\n  ServerAliveInterval 30\n')
+    assert web.serialize() == 'Host web1 web1-alt\n  User root\n  Port 2200\n'
+    assert web.to_dict()['patterns'] == ['web1', 'web1-alt'] and 'patterns' not in db.to_dict()
+
+
+def test_parse_writes_one_file_per_block_and_shares_patterns(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    ssh = tmp_path / '.ssh'
+    ssh.mkdir()
+    (ssh / 'config').write_text(LEGACY, encoding='utf-8')
+    runner = CliRunner()
+    result = runner.invoke(main, ['parse', '--no-backup'])
+    assert result.exit_code == 0, result.output
+    assert 'Kept 2 wildcard blocks in ~patterns.conf' in result.output
+    cfgd = ssh / 'config.d'
+    assert sorted(p.name for p in cfgd.iterdir()) == ['db.conf', 'web1.conf', '~patterns.conf']
+    assert (cfgd / '~patterns.conf').read_text().startswith('Host *.corp !bastion.corp\n')
+    assert [f.name for f in index.load_host_files(cfgd)] == ['db.conf', 'web1.conf']
+
+    # The generated config includes the patterns file after the hosts, and
+    # parsing it again changes nothing (its defaults block is not copied)
+    result = runner.invoke(main, ['parse', '--no-backup'])
+    assert result.exit_code == 0, result.output
+    assert '(0 written, 3 unchanged)' in result.output
+
+    result = runner.invoke(main, ['resolve', '--json', 'web1-alt'])
+    assert result.exit_code == 0, result.output
+    options = json.loads(result.output)
+    assert options['hostname'] == 'web1-alt' and options['port'] == '2200'
+    assert options['serveraliveinterval'] == '30'
+    assert json.loads(runner.invoke(main, ['resolve', '--json', 'app.corp']).output)['user'] == 'ops'
+
+
+def test_alias_table_finds_every_alias_and_duplicates(tmp_path):
+    (tmp_path / 'a.conf').write_text('Host a a-alt shared\n  HostName a.example\n')
+    (tmp_path / 'b.conf').write_text('Host b shared\n  HostName b.example\n')
+    files = index.load_host_files(tmp_path)
+    table = index.AliasTable(files)
+    assert table.get('a-alt').name == 'a.conf' and 'b' in table and 'c' not in table
+    assert [f.name for f in table.duplicates['shared']] == ['a.conf', 'b.conf']
+    table.add(index.load_host_files(tmp_path)[0])  # the same file, re-read
+    assert list(table.duplicates) == ['shared'] and len(table) == 4
+
+    result = audit.run_audit(files, tmp_path / 'keys', home=tmp_path)
+    assert [f.message for f in result.by_code(audit.DUPLICATE_HOST)] == [
+        'Host shared defined in a.conf and b.conf']
+
+
+def test_parse_keeps_wildcard_blocks_before_the_hosts_they_preceded(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    ssh = tmp_path / '.ssh'
+    ssh.mkdir()
+    (ssh / 'config').write_text(textwrap.dedent("""\
+        Host *.corp
+          User ops
+          Port 2222
+        Host app.corp
+          User deploy
+        Host *.conf wildcard
+          HostName wildcard.example
+        Host *
+          Port 2200
+        """), encoding='utf-8')
+    runner = CliRunner()
+    result = runner.invoke(main, ['parse', '--no-backup'])
+    assert result.exit_code == 0, result.output
+    cfgd = ssh / 'config.d'
+    assert sorted(p.name for p in cfgd.iterdir()) == [
+        '+patterns.conf', 'app.corp.conf', 'wildcard.conf', '~patterns.conf']
+    assert (cfgd / '+patterns.conf').read_text() == 'Host *.corp\n  User ops\n  Port 2222\n'
+    assert 'Kept 1 wildcard blocks in +patterns.conf' in result.output
+    assert 'Warning' not in result.output
+    assert [f.name for f in index.load_host_files(cfgd)] == ['app.corp.conf', 'wildcard.conf']
+    # As in the input, *.corp's User wins over the host's own
+    options = json.loads(runner.invoke(main, ['resolve', '--json', 'app.corp']).output)
+    assert (options['user'], options['port']) == ('ops', '2222')
+
+    # A block both before and after hosts it matches cannot keep both; parse says so
+    (ssh / 'config').write_text(textwrap.dedent("""\
+        Host a.corp
+          User a
+        Host *.corp
+          User ops
+        Host b.corp
+          Port 2200
+        """), encoding='utf-8')
+    result = runner.invoke(main, ['parse', '--no-backup'])
+    assert result.exit_code == 0, result.output
+    assert not (cfgd / '+patterns.conf').exists()
+    assert "Warning: 'Host *.corp' (line 3) came before 1 host(s) it matches" in result.output
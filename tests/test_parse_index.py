@@ -0,0 +1,83 @@
+import json
+import os
+
+from click.testing import CliRunner
+
+from ssh_manager.cli import main
+from ssh_manager.core.index import ParseIndex
+
+
+def _write(cfgd, name, host, hostname):
+    p = cfgd / f'{name}.conf'
+    p.write_text(f'Host {host}\n  HostName {hostname}\n', encoding='utf-8')
+    return p
+
+
+def test_index_reparses_only_changed_files(tmp_path):
+    cfgd = tmp_path / 'config.d'
+    cfgd.mkdir()
+    cache = tmp_path / 'cache'
+    _write(cfgd, 'a', 'a', 'a.example')
+    b = _write(cfgd, 'b', 'b', 'b.example')
+
+    idx = ParseIndex(cache)
+    first = idx.scan(cfgd)
+    idx.save()
+    assert [f.host.host for f in first] == ['a', 'b']
+    assert (idx.hits, idx.misses) == (0, 2)
+
+    b.write_text('Host b\n  HostName b2.example.org\n', encoding='utf-8')
+    os.utime(b, ns=(1, 1))
+    (cfgd / 'a.conf').unlink()
+    _write(cfgd, 'c', 'c', 'c.example')
+    (cfgd / 'broken.conf').write_text('# nothing\n', encoding='utf-8')
+
+    warm = ParseIndex(cache)
+    warm.load()
+    results = warm.scan(cfgd)
+    assert [f.path.name for f in results] == ['b.conf', 'broken.conf', 'c.conf']
+    assert results[0].host.hostname == 'b2.example.org'
+    assert results[1].host is None and results[1].error
+    assert (warm.hits, warm.misses) == (0, 3)
+    warm.save()
+
+    again = ParseIndex(cache)
+    again.load()
+    again.scan(cfgd)
+    assert (again.hits, again.misses) == (3, 0)
+
+
+def test_verify_hash_detects_same_stat_content_change(tmp_path):
+    cfgd = tmp_path / 'config.d'
+    cfgd.mkdir()
+    p = _write(cfgd, 'a', 'a', 'one.example')
+    os.utime(p, ns=(5, 5))
+    idx = ParseIndex(tmp_path / 'cache', verify_hash=True)
+    idx.scan(cfgd)
+    p.write_text('Host a\n  HostName two.example\n', encoding='utf-8')  # same size
+    os.utime(p, ns=(5, 5))
+    assert idx.scan(cfgd)[0].host.hostname == 'two.example'
+    assert idx.misses == 2
+
+
+def test_cli_cache_stats_and_no_cache(monkeypatch, tmp_path):
+    from pathlib import Path as _P
+    monkeypatch.setattr(_P, 'home', lambda: tmp_path)
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    cfgd.mkdir(parents=True)
+    _write(cfgd, 'a', 'a', 'a.example')
+
+    runner = CliRunner()
+    result = runner.invoke(main, ['--no-cache', 'audit', '--json'])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)['host_count'] == 1
+    assert not (tmp_path / '.ssh' / 'manager_cache').exists()
+
+    assert runner.invoke(main, ['audit']).exit_code == 0
+    result = runner.invoke(main, ['cache', 'stats', '--json'])
+    stats = json.loads(result.output)
+    assert stats['entries'] == 1 and stats['fresh'] == 1
+
+    assert runner.invoke(main, ['cache', 'clear']).exit_code == 0
+    stats = json.loads(runner.invoke(main, ['cache', 'stats', '--json']).output)
+    assert stats['entries'] == 0 and stats['untracked'] == 1
@@ -44,3 +44,40 @@ def test_parse_relocates_identity_files(monkeypatch, tmp_path):
     # Config.d file should reference new location
     host_conf = (ssh_dir / 'config.d' / 'app1.conf').read_text()
     assert f'IdentityFile {priv}' in host_conf
+
+
+def test_failed_parse_puts_relocated_keys_back(monkeypatch, tmp_path):
+    ssh_dir = tmp_path / '.ssh'
+    ssh_dir.mkdir()
+    monkeypatch.setenv('HOME', str(tmp_path))
+    legacy = tmp_path / 'legacy'
+    legacy.mkdir()
+    for name in ('id_a', 'id_shared'):
+        (legacy / name).write_text('PRIVATEKEY', encoding='utf-8')
+        (legacy / f'{name}.pub').write_text('PUBLICKEY', encoding='utf-8')
+    (ssh_dir / 'config').write_text(textwrap.dedent(f"""\
+        Host a
+          IdentityFile {legacy}/id_a
+        Host b
+          IdentityFile {legacy}/id_shared
+        Host c
+          IdentityFile {legacy}/id_shared
+        Host d
+          HostName d.example
+        """), encoding='utf-8')
+
+    from ssh_manager.core import store
+    real_write = store.ConfigDWriter.write
+
+    def write(self, host):
+        if host.host == 'd':
+            raise OSError('disk full')
+        return real_write(self, host)
+
+    monkeypatch.setattr(store.ConfigDWriter, 'write', write)
+    result = CliRunner().invoke(main, ['parse', '--no-backup'])
+    assert result.exit_code != 0
+    # The moved key is back and the copies of the shared one are gone
+    assert sorted(p.name for p in legacy.iterdir()) == ['id_a', 'id_a.pub', 'id_shared', 'id_shared.pub']
+    assert list((ssh_dir / 'keys').iterdir()) == []
+    assert not (ssh_dir / 'config.d' / 'a.conf').exists()
@@ -13,9 +13,11 @@ def test_parse_basic():
     assert h.identity_file.endswith('test_ed25519')
     assert any('ForwardAgent' in o for o in h.extra_options)
 
-def test_parse_multi_alias_first_only():
+def test_parse_multi_alias_keeps_every_pattern():
     text = """Host web1 web1-alt web1-backup\n  HostName web1.example.com\n"""
     hosts = parser.parse_ssh_config(text)
     assert len(hosts) == 1
     assert hosts[0].host == 'web1'
-    assert hosts[0].hostname == 'web1'
+    assert hosts[0].patterns == ('web1', 'web1-alt', 'web1-backup')
+    assert hosts[0].hostname == 'web1.example.com'
+    assert hosts[0].serialize().startswith('Host web1 web1-alt web1-backup\n')
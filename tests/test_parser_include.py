@@ -0,0 +1,87 @@
+import pytest
+from click.testing import CliRunner
+
+from ssh_manager.cli import main
+from ssh_manager.core import parser
+
+
+def _tree(tmp_path):
+    ssh = tmp_path / '.ssh'
+    (ssh / 'conf.d').mkdir(parents=True)
+    (ssh / 'conf.d' / '20-db.conf').write_text('Host db\n  HostName db.internal\n', encoding='utf-8')
+    (ssh / 'conf.d' / '10-web.conf').write_text('Host web\n  HostName web.internal\n', encoding='utf-8')
+    (ssh / 'common').write_text('ForwardAgent no\nServerAliveInterval 30\n', encoding='utf-8')
+    main_cfg = ssh / 'config'
+    main_cfg.write_text(
+        'Host first\n'
+        '  HostName first.example\n'
+        '  Include common\n'
+        'Include conf.d/*.conf missing/*.conf\n'
+        'Host again\n'
+        '  Include ~/.ssh/common\n',
+        encoding='utf-8',
+    )
+    return ssh, main_cfg
+
+
+def test_includes_are_expanded_in_order_with_sources(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    ssh, main_cfg = _tree(tmp_path)
+    includes = parser.IncludeExpander(ssh)
+    with open(main_cfg, encoding='utf-8') as fh:
+        hosts = list(parser.iter_host_blocks(fh, includes, str(main_cfg)))
+    assert [h.host for h in hosts] == ['first', 'web', 'db', 'again']
+    # An Include inside a Host block splices its options into that block
+    assert hosts[0].extra_options == ['  ForwardAgent no', '  ServerAliveInterval 30']
+    assert hosts[3].extra_options == hosts[0].extra_options
+    assert (hosts[1].source, hosts[1].lineno) == (str(ssh / 'conf.d' / '10-web.conf'), 1)
+    assert hosts[0].source == str(main_cfg)
+    # `common` was included twice (once as ~/.ssh/common) but read once
+    assert includes.reads == 3
+
+
+def test_blocks_record_the_origin_of_every_option(tmp_path):
+    ssh, main_cfg = _tree(tmp_path)
+    includes = parser.IncludeExpander(ssh)
+    with open(main_cfg, encoding='utf-8') as fh:
+        first = next(parser.iter_blocks(fh, includes, str(main_cfg)))
+    assert first.source == str(main_cfg) and first.lineno == 1
+    assert first.origins == ((str(main_cfg), 2), (str(ssh / 'common'), 1), (str(ssh / 'common'), 2))
+
+
+def test_glob_results_and_files_are_memoized(tmp_path):
+    (tmp_path / 'hosts').mkdir()
+    for i in range(5):
+        (tmp_path / 'hosts' / f'h{i}.conf').write_text(f'Host h{i}\n', encoding='utf-8')
+    includes = parser.IncludeExpander(tmp_path)
+    text = '\n'.join(f'Host group{g}\n  Include hosts/*.conf' for g in range(10))
+    hosts = parser.parse_ssh_config(text, includes)
+    assert len(hosts) == 10 * 6
+    assert (includes.globs, includes.reads) == (1, 5)
+
+
+def test_include_cycles_and_depth_are_errors(tmp_path):
+    (tmp_path / 'a').write_text('Host a\nInclude b\n', encoding='utf-8')
+    (tmp_path / 'b').write_text('Include a\n', encoding='utf-8')
+    with pytest.raises(parser.IncludeError, match='cycle: .*a -> .*b -> .*a'):
+        parser.parse_ssh_config('Include a\n', parser.IncludeExpander(tmp_path))
+    # Without includes the directive is left alone, as before
+    assert parser.parse_ssh_config('Host x\n  Include a\n')[0].extra_options == ['  Include a']
+
+    for i in range(20):
+        (tmp_path / f'd{i}').write_text(f'Include d{i + 1}\n', encoding='utf-8')
+    with pytest.raises(parser.IncludeError, match='nested more than 16'):
+        parser.parse_ssh_config('Include d0\n', parser.IncludeExpander(tmp_path))
+
+
+def test_cli_parse_follows_includes(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    ssh, _ = _tree(tmp_path)
+    result = CliRunner().invoke(main, ['parse', '--no-backup'])
+    assert result.exit_code == 0, result.output
+    assert 'Parsed 4 host blocks' in result.output
+    assert len(list((ssh / 'config.d').glob('*.conf'))) == 4
+
+    (ssh / 'loop').write_text('Include loop\n', encoding='utf-8')
+    bad = CliRunner().invoke(main, ['parse', '--no-backup', '--input', str(ssh / 'loop')])
+    assert bad.exit_code == 1 and 'Include cycle' in bad.output
@@ -0,0 +1,38 @@
+import io
+
+from ssh_manager.core import parser
+
+
+def test_iter_host_blocks_from_file_handle_with_line_numbers():
+    fh = io.StringIO(
+        "# header\n"
+        "Host one\n"
+        "  HostName one.example\n"
+        "\n"
+        "Host two two-alt\n"
+        "  Port=2222\n"
+        "  ForwardAgent yes\n"
+    )
+    it = parser.iter_host_blocks(fh)
+    first = next(it)
+    assert (first.host, first.hostname, first.lineno) == ('one', 'one.example', 2)
+    second = next(it)
+    assert (second.host, second.port, second.lineno) == ('two', 2222, 5)
+    assert second.extra_options == ['  ForwardAgent yes']
+    assert next(it, None) is None
+
+
+def test_match_block_options_do_not_leak_into_previous_host():
+    text = "Host a\n  User alice\nMatch host b\n  User bob\n  ForwardAgent yes\n"
+    hosts = parser.parse_ssh_config(text)
+    assert len(hosts) == 1
+    assert hosts[0].user == 'alice'
+    assert hosts[0].extra_options == []
+
+
+def test_tokenize_line_forms():
+    assert parser.tokenize_line("   # comment") is None
+    assert parser.tokenize_line("  ") is None
+    assert parser.tokenize_line("  User bob") == ('User', 'bob')
+    assert parser.tokenize_line("Port=22") == ('Port', '22')
+    assert parser.tokenize_line("Port = 22") == ('Port', '22')
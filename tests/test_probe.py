@@ -0,0 +1,160 @@
+import asyncio
+import json
+import socket
+import threading
+
+from click.testing import CliRunner
+
+from ssh_manager.cli import main
+from ssh_manager.core import probe
+from ssh_manager.core.model import HostConfig
+
+
+def _listener():
+    # Connects complete in the kernel backlog; nothing is ever accepted
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(128)
+    return sock
+
+
+def _closed_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def _banner_server(line):
+    sock = _listener()
+
+    def serve():
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                return
+            with conn:
+                if line:
+                    conn.sendall(line)
+
+    threading.Thread(target=serve, daemon=True).start()
+    return sock
+
+
+def test_percentile_interpolates():
+    assert probe.percentile([1.0], 99) == 1.0
+    assert probe.percentile([1.0, 2.0, 3.0, 4.0, 5.0], 50) == 3.0
+    assert probe.percentile([0.0, 10.0], 90) == 9.0
+
+
+def test_probe_all_reports_in_order_with_bounded_concurrency():
+    listeners = [_listener() for _ in range(20)]
+    try:
+        targets = [probe.Target(f'h{i}', '127.0.0.1', s.getsockname()[1]) for i, s in enumerate(listeners)]
+        targets.insert(5, probe.Target('down', '127.0.0.1', _closed_port()))
+        results = asyncio.run(probe.probe_all(targets, concurrency=4, timeout=2, count=3))
+    finally:
+        for s in listeners:
+            s.close()
+    assert [r.alias for r in results] == [t.alias for t in targets]
+    down = results.pop(5)
+    assert down.status == probe.UNREACHABLE and down.samples == [] and down.error
+    assert all(r.status == probe.REACHABLE and len(r.samples) == 3 for r in results)
+    report = probe.ProbeReport(results + [down])
+    assert not report.ok and report.count(probe.REACHABLE) == 20
+    assert set(report.latency_percentiles()) == {'p50', 'p90', 'p99'}
+
+
+def test_banner_is_read_and_checked():
+    ssh, silent = _banner_server(b'SSH-2.0-Stub_1.0\r\n'), _banner_server(b'')
+    try:
+        good = asyncio.run(probe.probe_host(probe.Target('a', '127.0.0.1', ssh.getsockname()[1]),
+                                            timeout=2, banner=True))
+        quiet = asyncio.run(probe.probe_host(probe.Target('b', '127.0.0.1', silent.getsockname()[1]),
+                                             timeout=0.5, banner=True))
+    finally:
+        ssh.close()
+        silent.close()
+    assert good.status == probe.REACHABLE and good.banner == 'SSH-2.0-Stub_1.0' and good.error is None
+    assert quiet.status == probe.REACHABLE and quiet.banner is None and quiet.error == 'no SSH banner'
+
+
+def test_proxied_hosts_are_skipped_and_cache_matches_endpoint(tmp_path):
+    sock = _listener()
+    port = sock.getsockname()[1]
+    try:
+        report = probe.probe_hosts([
+            HostConfig('direct', '127.0.0.1', port=port),
+            HostConfig('inner', '10.1.2.3', options=[('ProxyJump', 'bastion')]),
+        ])
+    finally:
+        sock.close()
+    assert [r.status for r in report.results] == [probe.REACHABLE, probe.SKIPPED]
+
+    cache = probe.ProbeCache(tmp_path)
+    cache.put(report.results)
+    cache.save()
+    fresh = probe.ProbeCache(tmp_path)
+    fresh.load()
+    cached = fresh.get(HostConfig('direct', '127.0.0.1', port=port))
+    assert cached.status == probe.REACHABLE and cached.latency is not None
+    assert 'reachable' in probe.describe(cached)
+    # Moved host: the old result no longer applies
+    assert fresh.get(HostConfig('direct', '127.0.0.2', port=port)) is None
+
+
+def test_cli_probe_json_saves_results(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    cfgd.mkdir(parents=True)
+    sock = _listener()
+    up, down = sock.getsockname()[1], _closed_port()
+    (cfgd / 'up.conf').write_text(f'Host up\n  HostName 127.0.0.1\n  Port {up}\n', encoding='utf-8')
+    (cfgd / 'down.conf').write_text(f'Host down\n  HostName 127.0.0.1\n  Port {down}\n', encoding='utf-8')
+    try:
+        result = CliRunner().invoke(main, ['probe', '--json', '--count', '2', '--timeout', '2'])
+        only = CliRunner().invoke(main, ['probe', 'up', '--no-save'])
+    finally:
+        sock.close()
+    assert result.exit_code == 1, result.output
+    data = json.loads(result.output)
+    assert (data['reachable'], data['unreachable']) == (1, 1)
+    by_host = {r['host']: r for r in data['results']}
+    assert len(by_host['up']['samples_ms']) == 2 and by_host['down']['latency_ms'] is None
+    assert only.exit_code == 0 and only.output.startswith('up ')
+    saved = json.loads((tmp_path / '.ssh' / 'manager_cache' / probe.PROBES_NAME).read_text())
+    assert set(saved['entries']) == {'up', 'down'}
+
+
+def test_tui_shows_cached_badge_and_probes_on_demand(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    cfgd.mkdir(parents=True)
+    sock = _banner_server(b'SSH-2.0-Stub\r\n')
+    port = sock.getsockname()[1]
+    (cfgd / 'box.conf').write_text(f'Host box\n  HostName 127.0.0.1\n  Port {port}\n', encoding='utf-8')
+
+    from ssh_manager.tui.app import SSHManagerApp
+
+    async def scenario():
+        app = SSHManagerApp()
+        async with app.run_test(size=(100, 30)) as pilot:
+            while not app.hosts_loaded:
+                await pilot.pause(0.01)
+            await pilot.pause(app.DETAIL_DELAY * 3)
+            assert 'not probed' in str(app.detail.badge.render())
+            await pilot.press('p')
+            for _ in range(200):
+                await pilot.pause(0.01)
+                if 'reachable' in str(app.detail.badge.render()):
+                    break
+            assert 'reachable' in str(app.detail.badge.render())
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        sock.close()
+    saved = json.loads((tmp_path / '.ssh' / 'manager_cache' / probe.PROBES_NAME).read_text())
+    assert saved['entries']['box']['banner'] == 'SSH-2.0-Stub'
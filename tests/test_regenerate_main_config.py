@@ -0,0 +1,59 @@
+import os
+
+from click.testing import CliRunner
+
+from ssh_manager import cli
+from ssh_manager.core import index, mainconfig, store
+from ssh_manager.core.model import HostConfig
+
+
+def _home(monkeypatch, tmp_path):
+    from pathlib import Path as _P
+    monkeypatch.setattr(_P, 'home', lambda: tmp_path)
+    ssh = tmp_path / '.ssh'
+    (ssh / 'config.d').mkdir(parents=True)
+    return ssh
+
+
+def test_unchanged_output_is_not_rewritten(monkeypatch, tmp_path):
+    ssh = _home(monkeypatch, tmp_path)
+    mainconfig.regenerate_main_config()
+    cfg = ssh / 'config'
+    os.utime(cfg, ns=(1, 1))
+    inode = cfg.stat().st_ino
+    mainconfig.regenerate_main_config()
+    assert cfg.stat().st_mtime_ns == 1 and cfg.stat().st_ino == inode
+
+    result = CliRunner().invoke(cli.main, ['build'])
+    assert 'already up to date' in result.output
+    assert not list(ssh.glob('.*.tmp'))
+
+
+def test_single_mode_rereads_only_changed_fragments(monkeypatch, tmp_path):
+    ssh = _home(monkeypatch, tmp_path)
+    cfgd = ssh / 'config.d'
+    for alias in ['a', 'b', 'c']:
+        store.write_host_config(cfgd, HostConfig(alias, f'{alias}.example'))
+    first = mainconfig.regenerate_main_config(single=True)
+    assert first.index('Host a') < first.index('Host b') < first.index('Host c')
+    assert (ssh / 'config').read_text() == first
+
+    blobs = ssh / 'manager_cache' / index.FRAGMENTS_NAME
+    inodes = {p.name: p.stat().st_ino for p in blobs.iterdir()}
+    assert len(inodes) == 3
+
+    store.write_host_config(cfgd, HostConfig('b', 'b2.example'))
+    reads = []
+    real = index.FragmentCache.read_all
+
+    def spy(self, d):
+        texts = real(self, d)
+        reads.append((self.reads, self.writes))
+        return texts
+    monkeypatch.setattr(index.FragmentCache, 'read_all', spy)
+    second = mainconfig.regenerate_main_config(single=True)
+    assert reads == [(1, 1)]  # one file re-read, one blob rewritten
+    after = {p.name: p.stat().st_ino for p in blobs.iterdir()}
+    assert len(after) == 3 and sum(1 for n, ino in after.items() if inodes.get(n) == ino) == 2
+    assert 'HostName b2.example' in second
+    assert (ssh / 'config').read_text() == second
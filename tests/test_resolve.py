@@ -0,0 +1,113 @@
+import json
+
+from click.testing import CliRunner
+
+from ssh_manager.cli import main
+from ssh_manager.core.parser import iter_blocks
+from ssh_manager.core.resolve import Resolver, compile_pattern
+
+CONFIG = """\
+ForwardAgent no
+
+Host web1 web2
+  HostName %h.example.com
+  IdentityFile ~/.ssh/keys/web
+  User deploy
+
+Host *.corp !bastion.corp
+  ProxyJump bastion.corp
+  User corp
+
+Host db-?? Db-Main
+  Port 5022
+  IdentityFile ~/.ssh/keys/db
+
+Host !nothing
+  User never
+
+Match host web1
+  User matched
+
+Host *
+  User root
+  IdentityFile ~/.ssh/id_ed25519
+  ServerAliveInterval 10
+"""
+
+
+def _resolver():
+    return Resolver(iter_blocks(CONFIG.splitlines()))
+
+
+def test_iter_blocks_keeps_every_pattern_and_global_options():
+    blocks = list(iter_blocks(CONFIG.splitlines()))
+    assert blocks[0].patterns == () and blocks[0].options == (('ForwardAgent', 'no'),)
+    assert blocks[1].patterns == ('web1', 'web2') and blocks[1].lineno == 3
+    # The Match block and its options are dropped
+    assert [b.patterns for b in blocks[2:]] == [('*.corp', '!bastion.corp'), ('db-??', 'Db-Main'),
+                                                ('!nothing',), ('*',)]
+
+
+def test_first_match_wins_and_identity_files_accumulate():
+    r = _resolver()
+    web2 = r.resolve('web2')
+    assert web2['hostname'] == ['web2.example.com']
+    assert web2['user'] == ['deploy']
+    assert web2['identityfile'] == ['~/.ssh/keys/web', '~/.ssh/id_ed25519']
+    assert web2['forwardagent'] == ['no'] and web2['serveraliveinterval'] == ['10']
+    assert web2['port'] == ['22']
+
+
+def test_wildcards_negation_and_case():
+    r = _resolver()
+    assert r.resolve('app.corp')['proxyjump'] == ['bastion.corp']
+    assert r.resolve('app.corp')['user'] == ['corp']
+    assert 'proxyjump' not in r.resolve('bastion.corp')  # negated
+    assert r.resolve('db-01')['port'] == ['5022']
+    assert r.resolve('db-001')['port'] == ['22']  # ? is exactly one character
+    assert r.resolve('DB-MAIN')['port'] == ['5022']
+    assert r.resolve('unknown') == {
+        'host': ['unknown'], 'forwardagent': ['no'], 'user': ['root'],
+        'identityfile': ['~/.ssh/id_ed25519'], 'serveraliveinterval': ['10'],
+        'hostname': ['unknown'], 'port': ['22'],
+    }
+    assert r.aliases() == ['web1', 'web2', 'Db-Main']
+    # Only * and ? are special to ssh
+    assert compile_pattern('[ab]*')('[ab]x') and not compile_pattern('[ab]*')('ax')
+
+
+def test_matches_naive_scan():
+    from fnmatch import fnmatchcase
+
+    r = _resolver()
+    for alias in ['web1', 'x.corp', 'bastion.corp', 'db-12', 'db-main', 'nothing', 'zzz']:
+        expected = []
+        for n, block in enumerate(r.blocks):
+            pats = [p.lower() for p in block.patterns]
+            pos = [p for p in pats if not p.startswith('!')]
+            neg = [p[1:] for p in pats if p.startswith('!')]
+            if not pats or (any(fnmatchcase(alias, p) for p in pos)
+                            and not any(fnmatchcase(alias, p) for p in neg)):
+                expected.append(n)
+        assert r.matching_blocks(alias) == expected, alias
+
+
+def test_cli_resolve_uses_config_d_and_defaults(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    cfgd.mkdir(parents=True)
+    (cfgd / 'a.conf').write_text('Host a\n  HostName 10.0.0.1\n  User alice\n', encoding='utf-8')
+    (cfgd / 'b.conf').write_text('Host b b-alt\n  HostName 10.0.0.2\n  ServerAliveInterval 60\n',
+                                 encoding='utf-8')
+    runner = CliRunner()
+    one = runner.invoke(main, ['resolve', 'b-alt'])
+    assert one.exit_code == 0, one.output
+    lines = one.output.splitlines()
+    assert lines[0] == 'host b-alt'
+    assert 'hostname 10.0.0.2' in lines and 'serveraliveinterval 60' in lines
+    assert 'compression yes' in lines  # from the generated defaults block
+    every = runner.invoke(main, ['resolve', '--all', '--json'])
+    data = json.loads(every.output)
+    assert list(data) == ['a', 'b', 'b-alt']
+    assert data['a']['user'] == 'alice' and data['a']['serveraliveinterval'] == '10'
+    assert runner.invoke(main, ['resolve']).exit_code == 2
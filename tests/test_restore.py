@@ -0,0 +1,124 @@
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from ssh_manager.cli import main
+from ssh_manager.core import backup, index, restore
+
+
+def _tree(ssh):
+    (ssh / 'config.d').mkdir(parents=True)
+    (ssh / 'keys').mkdir()
+    (ssh / 'config').write_text('Include config.d/*.conf\n', encoding='utf-8')
+    for alias in ['a', 'b']:
+        key = ssh / 'keys' / f'{alias}_ed25519'
+        (ssh / 'config.d' / f'{alias}.conf').write_text(
+            f'Host {alias}\n  HostName {alias}.example\n  IdentityFile {key}\n', encoding='utf-8')
+        key.write_text(f'PRIVATE-{alias}', encoding='utf-8')
+        key.chmod(0o600)
+        (ssh / 'keys' / f'{alias}_ed25519.pub').write_text(f'PUB-{alias}', encoding='utf-8')
+
+
+def test_diff_hashes_only_on_stat_mismatch(tmp_path, monkeypatch):
+    ssh = tmp_path / '.ssh'
+    _tree(ssh)
+    snap = backup.create_snapshot(ssh, ssh / 'manager_backups')
+    source = restore.SnapshotSource(snap)
+    calls = []
+    real = backup.file_sha256
+    monkeypatch.setattr(backup, 'file_sha256', lambda p: calls.append(p) or real(p))
+    assert restore.diff_snapshot(source, ssh) == []
+    assert calls == []
+
+    os.utime(ssh / 'config', ns=(1, 1))  # touched, same content
+    (ssh / 'keys' / 'a_ed25519').chmod(0o644)
+    (ssh / 'config.d' / 'b.conf').unlink()
+    changes = {c.entry.path: c.kind for c in restore.diff_snapshot(source, ssh)}
+    assert changes == {'keys/a_ed25519': restore.MODE, 'config.d/b.conf': restore.ADDED}
+    assert calls == [ssh / 'config']
+
+
+def test_host_filter_restores_only_that_host(tmp_path):
+    ssh = tmp_path / '.ssh'
+    _tree(ssh)
+    for fmt in ['dir', 'tar.gz']:
+        backups = ssh / 'manager_backups'
+        snap = (backup.create_snapshot(ssh, backups) if fmt == 'dir'
+                else backup.create_archive(ssh, backups, fmt))
+        source = restore.SnapshotSource(snap)
+        only = restore.host_paths(source, 'a')
+        assert only == {'config.d/a.conf', 'keys/a_ed25519', 'keys/a_ed25519.pub'}
+
+        (ssh / 'keys' / 'a_ed25519').write_text('CHANGED', encoding='utf-8')
+        (ssh / 'config.d' / 'b.conf').write_text('Host b\n  HostName other\n', encoding='utf-8')
+        changes = restore.diff_snapshot(source, ssh, only)
+        assert [c.entry.path for c in changes] == ['keys/a_ed25519']
+        restore.apply_changes(source, ssh, changes)
+        key = ssh / 'keys' / 'a_ed25519'
+        assert key.read_text() == 'PRIVATE-a'
+        assert key.stat().st_mode & 0o777 == 0o600
+        assert 'other' in (ssh / 'config.d' / 'b.conf').read_text()
+        (ssh / 'config.d' / 'b.conf').write_text(
+            f"Host b\n  HostName b.example\n  IdentityFile {ssh / 'keys' / 'b_ed25519'}\n",
+            encoding='utf-8')
+
+
+def test_cli_restore_dry_run_and_apply(monkeypatch, tmp_path):
+    from pathlib import Path as _P
+    monkeypatch.setattr(_P, 'home', lambda: tmp_path)
+    ssh = tmp_path / '.ssh'
+    _tree(ssh)
+    runner = CliRunner()
+    assert runner.invoke(main, ['backup']).exit_code == 0
+    (ssh / 'config.d' / 'a.conf').write_text('Host a\n  HostName broken\n', encoding='utf-8')
+
+    result = runner.invoke(main, ['restore', '--dry-run', '--diff'])
+    assert result.exit_code == 0, result.output
+    assert 'M config.d/a.conf' in result.output
+    assert '+  HostName a.example' in result.output
+    assert 'broken' in (ssh / 'config.d' / 'a.conf').read_text()
+
+    result = runner.invoke(main, ['restore', '--yes', '--no-backup', '--host', 'a'])
+    assert result.exit_code == 0, result.output
+    assert 'Restored 1 file(s)' in result.output
+    assert 'a.example' in (ssh / 'config.d' / 'a.conf').read_text()
+
+
+def test_cli_restore_of_host_files_refreshes_caches_and_main_config(monkeypatch, tmp_path):
+    from pathlib import Path as _P
+    monkeypatch.setattr(_P, 'home', lambda: tmp_path)
+    ssh = tmp_path / '.ssh'
+    _tree(ssh)
+    runner = CliRunner()
+    assert runner.invoke(main, ['backup']).exit_code == 0
+    (ssh / 'config.d' / 'a.conf').write_text('Host a\n  HostName broken\n', encoding='utf-8')
+    assert json.loads(runner.invoke(main, ['resolve', '--json', 'a']).output)['hostname'] == 'broken'
+    cache = index.FragmentCache(ssh / 'manager_cache')
+    cache.load()
+    assert 'a.conf' in cache.entries
+
+    result = runner.invoke(main, ['restore', '--yes', '--no-backup', '--host', 'a'])
+    assert result.exit_code == 0, result.output
+    cache = index.FragmentCache(ssh / 'manager_cache')
+    cache.load()
+    assert 'a.conf' not in cache.entries
+    assert '# defaults' in (ssh / 'config').read_text()  # regenerated
+    assert json.loads(runner.invoke(main, ['resolve', '--json', 'a']).output)['hostname'] == 'a.example'
+
+
+def test_crafted_manifest_cannot_write_outside_ssh_dir(tmp_path):
+    ssh = tmp_path / '.ssh'
+    _tree(ssh)
+    snap = backup.create_snapshot(ssh, ssh / 'manager_backups')
+    source = restore.SnapshotSource(snap)
+    good = source.entries()[0]
+    for rel in ['../evil', '/tmp/evil', 'config.d/../../evil']:
+        bad = backup.ManifestEntry(rel, good.sha256, good.size, good.mtime_ns, good.mode)
+        source._entries = [bad]
+        with pytest.raises(ValueError):
+            restore.diff_snapshot(source, ssh)
+        with pytest.raises(ValueError):
+            restore.apply_changes(source, ssh, [restore.Change(bad, restore.ADDED)])
+    assert not (tmp_path / 'evil').exists()
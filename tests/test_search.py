@@ -0,0 +1,66 @@
+import json
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from ssh_manager.cli import main
+from ssh_manager.core.model import HostConfig
+from ssh_manager.core.search import SearchIndex
+
+
+def _index():
+    return SearchIndex.build([
+        ('web.conf', HostConfig('web', 'web-prod-01.example.com', user='deploy')),
+        ('web-stage.conf', HostConfig('web-stage', '10.0.0.5', user='deploy')),
+        ('db.conf', HostConfig('db', 'db1.internal', user='postgres',
+                               options=[('ProxyJump', 'bastion-eu')])),
+        ('webby.conf', HostConfig('webby', 'webby.local', user='root')),
+    ])
+
+
+def test_ranking_and_multi_term():
+    idx = _index()
+    # Exact alias beats prefix, prefix beats HostName hits
+    assert [m.doc_id for m in idx.search('web')] == ['web.conf', 'webby.conf', 'web-stage.conf']
+    assert [m.doc_id for m in idx.search('deploy stage')] == ['web-stage.conf']
+    assert idx.search('bastion')[0].field == 'option'
+    assert [m.doc_id for m in idx.search('db1')] == ['db.conf']
+    assert idx.search('nothing-like-this') == []
+
+
+def test_fuzzy_fallbacks():
+    idx = _index()
+    idx.ensure_postings()
+    assert idx.search('wbstg')[0].doc_id == 'web-stage.conf'  # subsequence
+    assert idx.search('web-stagx')[0].doc_id == 'web-stage.conf'  # one typo
+
+
+def test_incremental_updates_and_narrowing():
+    idx = _index()
+    idx.ensure_postings()
+    assert len(idx.search('we')) == 3
+    # narrowed from the previous result; web.conf matches on its HostName
+    assert [m.doc_id for m in idx.search('web-')] == ['web-stage.conf', 'web.conf']
+    idx.add('web-stage.conf', HostConfig('api-stage', '10.0.0.5'))
+    assert [m.doc_id for m in idx.search('web-')] == ['web.conf']
+    assert idx.search('api')[0].doc_id == 'web-stage.conf'
+    idx.remove('db.conf')
+    assert idx.search('bastion') == []
+    idx.add('new.conf', HostConfig('bastion-new', 'b.example'))
+    assert [m.doc_id for m in idx.search('bastion')] == ['new.conf']
+
+
+def test_cli_find_json(monkeypatch, tmp_path):
+    monkeypatch.setattr(Path, 'home', lambda: tmp_path)
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    cfgd.mkdir(parents=True)
+    (cfgd / 'web.conf').write_text('Host web\n  HostName web.example\n  User deploy\n  Port 2222\n',
+                                   encoding='utf-8')
+    (cfgd / 'db.conf').write_text('Host db\n  HostName db.example\n', encoding='utf-8')
+    result = CliRunner().invoke(main, ['find', 'web', '--json'])
+    assert result.exit_code == 0, result.output
+    data = json.loads(result.output)
+    assert [(r['host'], r['port'], r['field']) for r in data] == [('web', 2222, 'alias')]
+    assert data[0]['file'].endswith('web.conf')
+    result = CliRunner().invoke(main, ['find', 'example'])
+    assert 'db' in result.output and 'web' in result.output
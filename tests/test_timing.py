@@ -0,0 +1,86 @@
+import asyncio
+import json
+import pstats
+import time
+
+from click.testing import CliRunner
+
+from ssh_manager.cli import main
+from ssh_manager.core import timing
+
+
+def test_spans_nest_and_count_against_the_innermost():
+    assert timing.span('x') is timing.span('y')  # shared no-op while nothing records
+    items = [1, 2]
+    assert timing.timed(items, 'x') is items
+    recorder = timing.start()
+    try:
+        with timing.span('outer'):
+            timing.add(1, 10)
+            with timing.span('inner') as inner:
+                inner.add(2, 5)
+                timing.add(1, 1)
+        for _ in timing.timed(iter([1, 2, 3]), 'steps'):
+            time.sleep(0.02)  # consumer time is not the iterator's
+    finally:
+        assert timing.stop() is recorder
+    spans = {s['name']: s for s in recorder.to_dict()['spans']}
+    assert (spans['outer']['files'], spans['outer']['bytes']) == (1, 10)
+    assert (spans['inner']['files'], spans['inner']['bytes']) == (3, 6)
+    assert spans['outer']['seconds'] >= spans['inner']['seconds']
+    assert spans['steps']['calls'] == 4 and spans['steps']['seconds'] < 0.02
+    assert recorder.to_dict()['other'] >= 0.05
+    assert timing.mode_from_env('0') is None and timing.mode_from_env('JSON') == 'json'
+    assert timing.mode_from_env('1') == 'table'
+
+
+def _config(tmp_path):
+    ssh = tmp_path / '.ssh'
+    ssh.mkdir()
+    (ssh / 'config').write_text(''.join(f'Host h{i}\n  HostName n{i}\n' for i in range(5)), encoding='utf-8')
+
+
+def test_cli_profile_reports_phases_on_stderr(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    _config(tmp_path)
+    result = CliRunner().invoke(main, ['--profile-json', 'parse'])
+    assert result.exit_code == 0, result.output
+    assert 'Parsed 5 host blocks' in result.stdout and '{' not in result.stdout
+    report = json.loads(result.stderr[result.stderr.index('{'):])
+    assert report['command'] == 'parse'
+    spans = {s['name']: s for s in report['spans']}
+    assert {'backup', 'parse', 'write', 'commit', 'rebuild'} <= set(spans)
+    assert spans['write']['files'] == 5 and spans['write']['calls'] == 5
+    assert spans['backup']['files'] == 1  # the config itself
+    assert timing.active() is None
+
+    monkeypatch.setenv('SSH_MANAGER_PROFILE', '1')
+    dump = tmp_path / 'build.prof'
+    result = CliRunner().invoke(main, ['--profile-dump', str(dump), 'build'])
+    assert result.exit_code == 0, result.output
+    assert 'Profile of build:' in result.stderr and 'rebuild' in result.stderr
+    assert pstats.Stats(str(dump)).total_calls > 0
+
+
+def test_tui_shows_load_timings_when_profiling(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('SSH_MANAGER_PROFILE', '1')
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    cfgd.mkdir(parents=True)
+    for i in range(3):
+        (cfgd / f'h{i}.conf').write_text(f'Host h{i}\n  HostName n{i}\n', encoding='utf-8')
+
+    from ssh_manager.tui.app import SSHManagerApp
+
+    async def scenario():
+        app = SSHManagerApp()
+        async with app.run_test(size=(100, 30)) as pilot:
+            while not app.hosts_loaded:
+                await pilot.pause(0.01)
+            assert app.jobs_bar.message.startswith('Loaded 3 hosts in ')
+            assert 'load hosts' in app.jobs_bar.message
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        timing.stop()
@@ -0,0 +1,105 @@
+import asyncio
+
+
+def test_host_list_loads_in_background_and_renders_detail_lazily(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    cfgd.mkdir(parents=True)
+    for i in range(250):
+        (cfgd / f'h{i:03d}.conf').write_text(f'Host h{i}\n  HostName n{i}\n', encoding='utf-8')
+    (cfgd / 'zz.conf').write_text('# no host\n', encoding='utf-8')
+
+    from ssh_manager.tui.app import SSHManagerApp
+
+    async def scenario():
+        app = SSHManagerApp()
+        async with app.run_test(size=(100, 30)) as pilot:
+            while not app.hosts_loaded:
+                await pilot.pause(0.01)
+            hosts = app.host_list
+            assert len(hosts.rows) == 251
+            assert hosts.rows[-1].host is None  # parse errors stay visible as rows
+            # More rows than fit on screen, but only the visible ones are rendered
+            assert hosts.virtual_size.height == 251
+            await pilot.press('pagedown')
+            await pilot.pause(app.DETAIL_DELAY * 3)
+            assert hosts.cursor > 0
+            assert app.detail.current.host_cfg.host == f'h{hosts.cursor}'
+            assert app.detail.input_hostname.value == ''  # form filled only on edit
+            await pilot.press('e')
+            assert app.detail.input_hostname.value == f'n{hosts.cursor}'
+            await pilot.press('end')
+            await pilot.pause(app.DETAIL_DELAY * 3)
+            assert hosts.cursor == 250 and app.detail.current is None
+
+    asyncio.run(scenario())
+
+
+def test_search_box_filters_host_list(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    cfgd.mkdir(parents=True)
+    for name, hostname in [('web1', 'w1.example'), ('web2', 'w2.example'), ('db', 'db.internal')]:
+        (cfgd / f'{name}.conf').write_text(f'Host {name}\n  HostName {hostname}\n', encoding='utf-8')
+
+    from ssh_manager.tui.app import SSHManagerApp
+
+    async def scenario():
+        app = SSHManagerApp()
+        async with app.run_test(size=(100, 30)) as pilot:
+            while not app.hosts_loaded:
+                await pilot.pause(0.01)
+            await pilot.press('slash')
+            for ch in 'internal':
+                await pilot.press(ch)
+            await pilot.pause()
+            assert [r.host.host for r in app.host_list.rows] == ['db']
+            await pilot.press('escape')
+            await pilot.pause()
+            assert len(app.host_list.rows) == 3
+
+    asyncio.run(scenario())
+
+
+
+def test_apps_do_not_share_loaded_rows():
+    from ssh_manager.tui.app import SSHManagerApp
+
+    first, second = SSHManagerApp(), SSHManagerApp()
+    assert first._all_rows is not second._all_rows
+    assert first._rows_by_name is not second._rows_by_name
+
+
+def test_audit_runs_off_the_ui_thread(monkeypatch, tmp_path):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    cfgd = tmp_path / '.ssh' / 'config.d'
+    cfgd.mkdir(parents=True)
+    (cfgd / 'web.conf').write_text('Host web\n  HostName w.example\n', encoding='utf-8')
+
+    import threading
+
+    from ssh_manager.core import audit
+    from ssh_manager.tui.app import AuditModal, SSHManagerApp
+
+    real = audit.audit_layout
+    audit_threads = []
+
+    def audit_layout(*args):
+        audit_threads.append(threading.current_thread())
+        return real(*args)
+    monkeypatch.setattr(audit, 'audit_layout', audit_layout)
+
+    async def scenario():
+        app = SSHManagerApp()
+        async with app.run_test(size=(100, 30)) as pilot:
+            while not app.hosts_loaded:
+                await pilot.pause(0.01)
+            await pilot.press('a')
+            for _ in range(200):
+                if isinstance(app.screen, AuditModal):
+                    break
+                await pilot.pause(0.01)
+            assert isinstance(app.screen, AuditModal)
+            assert audit_threads and audit_threads[0] is not threading.main_thread()
+
+    asyncio.run(scenario())